@@ -1,28 +1,42 @@
 """API endpoints for the casting module."""
 
-from dataclasses import asdict
-from typing import Callable
+import json
+import os
+from typing import Callable, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
-from .models import CastingCallLogStore
+from .cache import DossierCache
+from .idempotency import MAX_KEY_LENGTH, IdempotencyCache, IdempotencyConflict
+from .models import CastingCallLog, CastingCallLogStore
 from .pipeline import DossierCompiler
 from ..llm import LLMClient
+from ..dossier.codecs import CODECS, get_codec
 from ..dossier.models import CharacterStore
+from ..dossier.persistence import export_characters
+from ..dossier.sqlite_store import SQLiteCharacterStore
 
 
 router = APIRouter()
 
 # In-memory stores
 casting_call_log = CastingCallLogStore()
-character_store = CharacterStore()
+# Setting CHARACTER_STORE_PATH persists characters in SQLite, shared by all
+# workers; otherwise they live in this process only.
+character_store = (
+    SQLiteCharacterStore() if os.getenv("CHARACTER_STORE_PATH") else CharacterStore()
+)
+# Persistent across restarts; the database is opened on first use.
+dossier_cache = DossierCache()
+# Results of ``POST /casting-call/compile`` by ``Idempotency-Key``.
+compile_requests = IdempotencyCache()
 
 
 def _default_compiler() -> DossierCompiler:
     """Create a ``DossierCompiler`` with a fresh ``LLMClient``."""
 
-    return DossierCompiler(llm_client=LLMClient())
+    return DossierCompiler(llm_client=LLMClient(), cache=dossier_cache)
 
 
 # Factory used to obtain a ``DossierCompiler`` instance. Tests may monkeypatch
@@ -30,64 +44,301 @@ def _default_compiler() -> DossierCompiler:
 compiler_factory: Callable[[], DossierCompiler] = _default_compiler
 
 
+# Page size bounds for ``GET /casting-call/candidates``.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1_000
+
+
+def _log_entry(log_id: int, log: CastingCallLog) -> dict:
+    """Serialize one log entry; cheaper than ``asdict``, which deep-copies."""
+
+    candidate = log.candidate
+    return {
+        "id": log_id,
+        "book_id": casting_call_log.book_of(log_id),
+        "candidate": {
+            "name": candidate.name,
+            "source_chunks": list(candidate.source_chunks),
+            "duplicate": candidate.duplicate,
+            "minor_role": candidate.minor_role,
+        },
+        "selected": log.selected,
+    }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return whether an ``If-None-Match`` header matches ``etag``."""
+
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
 @router.get("/casting-call/candidates")
-def get_casting_call_candidates() -> list[dict]:
-    """Return all casting call log entries as JSON."""
+def get_casting_call_candidates(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    book_id: Optional[str] = None,
+    selected: Optional[bool] = None,
+    duplicate: Optional[bool] = None,
+    minor_role: Optional[bool] = None,
+    name_prefix: Optional[str] = None,
+):
+    """Return one page of casting call log entries as JSON.
 
-    return [asdict(log) for log in casting_call_log.all()]
+    Entries are returned in id order as ``{"items": [...], "next_cursor":
+    ...}``; pass ``next_cursor`` back as ``cursor`` to fetch the next page
+    (it is ``null`` on the last page). ``book_id``, the boolean flags and a
+    case-insensitive ``name_prefix`` filter the entries server-side.
 
+    The response carries an ``ETag`` for the current state of the log. A
+    request whose ``If-None-Match`` matches it gets an empty ``304`` without
+    reading the log.
+    """
+
+    etag = f'"{casting_call_log.token}-{casting_call_log.version}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        after = int(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor") from None
+    logs, next_after = casting_call_log.page(
+        after,
+        limit,
+        book_id=book_id,
+        selected=selected,
+        duplicate=duplicate,
+        minor_role=minor_role,
+        name_prefix=name_prefix,
+    )
+    response.headers["ETag"] = etag
+    return {
+        "items": [_log_entry(log_id, log) for log_id, log in logs],
+        "next_cursor": None if next_after is None else str(next_after),
+    }
 
-class SelectionPayload(BaseModel):
-    """Payload specifying which candidates were selected."""
 
-    selected_ids: list[int]
+class CandidateFilter(BaseModel):
+    """Server-side filter over the casting call log.
+
+    Fields mirror the query parameters of ``GET /casting-call/candidates``;
+    unset fields do not filter.
+    """
+
+    book_id: Optional[str] = None
+    duplicate: Optional[bool] = None
+    minor_role: Optional[bool] = None
+    name_prefix: Optional[str] = None
+
+
+class CandidateSelection(BaseModel):
+    """Selection resolved on the server instead of listed by the client.
+
+    With ``select_all`` set, the selection is every candidate matching
+    ``filter`` except ``excluded_ids``.
+    """
+
+    select_all: bool = False
+    filter: CandidateFilter = CandidateFilter()
+    excluded_ids: list[int] = []
+
+
+def selection_ids(selection: CandidateSelection, listed: list[int], **flags) -> list[int]:
+    """Return the ids of ``selection``, or ``listed`` unless it selects all.
+
+    ``flags`` further filter a ``select_all`` selection (see
+    :meth:`CastingCallLogStore.ids`).
+    """
+
+    if not selection.select_all:
+        return listed
+    excluded = set(selection.excluded_ids)
+    return [
+        log_id
+        for log_id in casting_call_log.ids(**selection.filter.model_dump(), **flags)
+        if log_id not in excluded
+    ]
+
+
+class SelectionPayload(CandidateSelection):
+    """Payload specifying which candidates were selected.
+
+    Either list ``selected_ids`` explicitly, or set ``select_all`` to select
+    every candidate matching ``filter`` except ``excluded_ids``.
+    """
+
+    selected_ids: list[int] = []
 
 
 @router.post("/casting-call/select")
-def select_casting_call_candidates(payload: SelectionPayload) -> list[dict]:
-    """Mark candidates as selected and return their summaries.
+def select_casting_call_candidates(payload: SelectionPayload) -> dict:
+    """Mark candidates as selected and return how many are selected.
+
+    The ``selected_ids`` field contains ids from the casting call log. Any
+    candidate whose id appears in that list is marked as selected; all others
+    are cleared. With ``select_all`` the selection is instead resolved on the
+    server from ``filter`` and ``excluded_ids``, so clients never enumerate
+    the log. The response is ``{"selected": count}``; page through
+    ``GET /casting-call/candidates?selected=true`` for the entries.
+    """
+
+    selected = casting_call_log.set_selected(selection_ids(payload, payload.selected_ids))
+    return {"selected": len(selected)}
+
+
+class CompilePayload(CandidateSelection):
+    """Payload specifying which candidates to compile.
 
-    The ``selected_ids`` field contains indices into the casting call log. Any
-    candidate whose index appears in that list is marked as selected; all others
-    are cleared. The updated summaries for the selected candidates are returned
-    for confirmation.
+    Either list ``candidate_ids``, or send the selection of
+    ``POST /casting-call/select`` with ``select_all`` to compile every
+    selected candidate matching ``filter`` except ``excluded_ids``. Only
+    candidates marked as selected are compiled.
+
+    ``source_work`` is the title keying the dossier cache, so characters
+    already compiled from the same work are reused; it defaults to the title
+    recorded for each candidate's book.
+    ``force_refresh`` bypasses the cache.
     """
 
-    logs = casting_call_log.all()
-    selected_summaries = []
-    selected_set = set(payload.selected_ids)
-    for idx, log in enumerate(logs):
-        if idx in selected_set:
-            log.selected = True
-            selected_summaries.append(asdict(log))
-        else:
-            log.selected = False
-    return selected_summaries
+    candidate_ids: list[int] = []
+    source_work: Optional[str] = None
+    force_refresh: bool = False
 
 
-class CompilePayload(BaseModel):
-    """Payload specifying candidate IDs to compile."""
+def compile_ids(payload: CompilePayload) -> list[int]:
+    """Return the candidate ids ``payload`` asks to compile, in order."""
 
-    candidate_ids: list[int]
+    return selection_ids(payload, payload.candidate_ids, selected=True)
 
 
 @router.post("/casting-call/compile")
-def compile_casting_call_candidates(payload: CompilePayload) -> list[dict]:
+def compile_casting_call_candidates(
+    payload: CompilePayload,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=MAX_KEY_LENGTH),
+) -> list[dict]:
     """Compile dossiers for selected candidates.
 
-    For each requested ``candidate_id`` that is marked as selected, run the
-    :class:`DossierCompiler`, persist the resulting dossier to
-    ``character_store`` and return the compiled summaries.
+    For each requested candidate (see :class:`CompilePayload`) that is
+    marked as selected, run the :class:`DossierCompiler`, persist the
+    resulting dossier to ``character_store`` and return the compiled
+    summaries. Cached dossiers
+    are returned without an LLM call unless ``force_refresh`` is set.
+
+    With an ``Idempotency-Key`` header, repeats of the request (double
+    clicks, client retries) get the first request's result, waiting for it
+    if it is still running, instead of compiling again. Such replies carry
+    ``Idempotent-Replayed: true``. Reusing a key with a different body is
+    rejected with ``422``.
     """
 
-    logs = casting_call_log.all()
+    if idempotency_key is None:
+        return _compile(payload)
+    fingerprint = json.dumps(payload.model_dump(), sort_keys=True)
+    try:
+        result, replayed = compile_requests.run(
+            idempotency_key, fingerprint, lambda: _compile(payload)
+        )
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from None
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+def source_work_of(payload: CompilePayload, log_id: int) -> Optional[str]:
+    """Work title keying the dossier cache for candidate ``log_id``.
+
+    The payload's ``source_work``, else the title recorded for the
+    candidate's book. Book ids themselves never key the cache.
+    """
+
+    return payload.source_work or casting_call_log.work_of(casting_call_log.book_of(log_id))
+
+
+def remember_work(log_id: int, dossier: dict) -> None:
+    """Record the ``source_material`` of ``dossier`` as its book's title.
+
+    Only fills in books without a known title, so later candidates of the
+    book are looked up in the cache under it.
+    """
+
+    book_id = casting_call_log.book_of(log_id)
+    title = dossier.get("source_material")
+    if book_id is not None and title and "error" not in dossier:
+        if casting_call_log.work_of(book_id) is None:
+            casting_call_log.set_work(book_id, title)
+
+
+def _compile(payload: CompilePayload) -> list[dict]:
     compiler = compiler_factory()
     compiled: list[dict] = []
-    for idx in payload.candidate_ids:
-        if 0 <= idx < len(logs) and logs[idx].selected:
-            result = compiler.compile(logs[idx].candidate)
+    for idx in compile_ids(payload):
+        log = casting_call_log.get(idx)
+        if log is not None and log.selected:
+            result = compiler.compile(
+                log.candidate,
+                source_work=source_work_of(payload, idx),
+                force_refresh=payload.force_refresh,
+            )
             if "error" not in result:
                 character_store.insert(result)
+                remember_work(idx, result)
             compiled.append(result)
     return compiled
 
+
+# Dossier fields included in ``GET /characters`` summaries.
+CHARACTER_SUMMARY_FIELDS = ("name", "role", "source_material", "parent_cid")
+
+
+@router.get("/characters/export")
+def export_all_characters(codec: str = "compact") -> Response:
+    """Download every stored character as a character stream.
+
+    ``codec`` is ``compact`` (binary, dictionary-compressed) or ``json``;
+    see :func:`backend.dossier.persistence.export_characters` for the format.
+    """
+
+    if codec not in CODECS:
+        raise HTTPException(status_code=400, detail=f"codec must be one of {sorted(CODECS)}")
+    return Response(
+        content=export_characters(character_store.all(), get_codec(codec)),
+        media_type="application/octet-stream",
+    )
+
+
+@router.get("/characters")
+def list_characters(
+    name: Optional[str] = None,
+    role: Optional[str] = None,
+    source_material: Optional[str] = None,
+    parent_cid: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> list[dict]:
+    """Return summaries of compiled characters matching all given filters.
+
+    ``name`` matches characters whose name contains every word of it;
+    ``role``, ``source_material`` and the lineage parent ``parent_cid``
+    match case-insensitively. Filters are answered from the character
+    store's secondary indexes, in insertion order, up to ``limit`` results.
+    """
+
+    characters = character_store.query(
+        name=name,
+        role=role,
+        source_material=source_material,
+        parent_cid=parent_cid,
+        limit=limit,
+    )
+    return [
+        {
+            "character_id": character.character_id,
+            **{key: character.dossier.get(key) for key in CHARACTER_SUMMARY_FIELDS},
+        }
+        for character in characters
+    ]
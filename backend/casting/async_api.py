@@ -0,0 +1,151 @@
+"""Asyncio variant of the casting API.
+
+``router`` serves the same routes as :mod:`backend.casting.api` and shares
+its stores, but ``POST /casting-call/compile`` is a coroutine that compiles
+through :class:`~backend.llm.AsyncLLMClient`. A worker therefore serves as
+many concurrent compile requests as the provider can, instead of one per
+threadpool thread. Mount it in place of the sync router::
+
+    from backend.casting.async_api import router
+    app.include_router(router)
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+
+from . import api
+from .api import CompilePayload, compile_ids, remember_work, source_work_of
+from .idempotency import MAX_KEY_LENGTH, IdempotencyConflict
+from .pipeline import DossierCompiler
+from ..llm import AsyncLLMClient
+
+# Candidates of one request compiled at the same time.
+COMPILE_CONCURRENCY = int(os.getenv("COMPILE_CONCURRENCY", "4"))
+# How often a running compile checks whether its client went away.
+DISCONNECT_POLL_SECONDS = 0.25
+# Non-standard status (as used by nginx) for requests whose client left.
+CLIENT_CLOSED_REQUEST = 499
+
+router = APIRouter()
+
+_llm_client: Optional[AsyncLLMClient] = None
+
+
+def _default_async_compiler() -> DossierCompiler:
+    """Create a ``DossierCompiler`` on the process-wide ``AsyncLLMClient``.
+
+    The client is shared so that all requests reuse one connection pool.
+    """
+
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = AsyncLLMClient()
+    return DossierCompiler(llm_client=_llm_client, cache=api.dossier_cache)
+
+
+# Factory used to obtain a ``DossierCompiler`` whose ``llm_client`` is async.
+# Tests may monkeypatch this to avoid real LLM calls.
+async_compiler_factory: Callable[[], DossierCompiler] = _default_async_compiler
+
+
+async def _cancel_on_disconnect(request: Request, work: Awaitable[Any]) -> Any:
+    """Await ``work``, cancelling it if the client disconnects first.
+
+    Raises :class:`asyncio.CancelledError` after cancelling, so callers can
+    tell an abandoned request from a finished one.
+    """
+
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise asyncio.CancelledError("client disconnected")
+    finally:
+        # Also covers cancellation of this coroutine itself.
+        if not task.done():
+            task.cancel()
+
+
+async def _compile(payload: CompilePayload) -> list[dict]:
+    """Compile the selected candidates of ``payload`` concurrently.
+
+    At most ``COMPILE_CONCURRENCY`` LLM calls of this request run at once.
+    Results keep the order of the requested ids and are stored only once all
+    of them are in, so a cancelled request stores nothing.
+    """
+
+    compiler = async_compiler_factory()
+    limit = asyncio.Semaphore(COMPILE_CONCURRENCY)
+    selected = []
+    log_ids = []
+    for idx in compile_ids(payload):
+        log = api.casting_call_log.get(idx)
+        if log is not None and log.selected:
+            selected.append((log.candidate, source_work_of(payload, idx)))
+            log_ids.append(idx)
+
+    async def compile_one(candidate, source_work) -> dict:
+        async with limit:
+            return await compiler.acompile(
+                candidate,
+                source_work=source_work,
+                force_refresh=payload.force_refresh,
+            )
+
+    compiled = await asyncio.gather(*(compile_one(*job) for job in selected))
+    for idx, result in zip(log_ids, compiled):
+        if "error" not in result:
+            await asyncio.to_thread(api.character_store.insert, result)
+            remember_work(idx, result)
+    return list(compiled)
+
+
+@router.post("/casting-call/compile")
+async def compile_casting_call_candidates(
+    payload: CompilePayload,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=MAX_KEY_LENGTH),
+):
+    """Async :func:`backend.casting.api.compile_casting_call_candidates`.
+
+    Same request, response and ``Idempotency-Key`` handling. If the client
+    disconnects, outstanding LLM calls are cancelled, nothing is stored and
+    the request ends with status ``499``; a duplicate waiting on the same
+    key then compiles in its place.
+    """
+
+    try:
+        if idempotency_key is None:
+            return await _cancel_on_disconnect(request, _compile(payload))
+        fingerprint = json.dumps(payload.model_dump(), sort_keys=True)
+        result, replayed = await api.compile_requests.arun(
+            idempotency_key,
+            fingerprint,
+            lambda: _cancel_on_disconnect(request, _compile(payload)),
+        )
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from None
+    except asyncio.CancelledError:
+        if not await request.is_disconnected():
+            raise
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+# Every other route only touches in-memory or local stores and is shared
+# with the sync router.
+router.routes.extend(
+    route for route in api.router.routes if route.path != "/casting-call/compile"
+)
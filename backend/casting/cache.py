@@ -0,0 +1,165 @@
+"""Persistent cache of compiled dossiers keyed by character identity."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+
+DEFAULT_CACHE_PATH = ".cache/dossier_cache.sqlite3"
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]")
+_NON_DIGIT = re.compile(r"[^0-9]")
+
+
+def normalize_identity(text: str) -> str:
+    """Lower-case ``text`` and strip non-alphanumerics for cache keys."""
+
+    return _NON_ALNUM.sub("", text.lower())
+
+
+def _similar(a: str, b: str, threshold: float) -> float:
+    """Return the match ratio of ``a`` and ``b``, or ``0.0`` below ``threshold``.
+
+    Keys whose digits differ never match: numbers (volume, year, an id in a
+    title) identify, so ``"1342"`` is not a misspelling of ``"13420"``.
+    """
+
+    if _NON_DIGIT.sub("", a) != _NON_DIGIT.sub("", b):
+        return 0.0
+    matcher = SequenceMatcher(None, a, b)
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return 0.0
+    ratio = matcher.ratio()
+    return ratio if ratio >= threshold else 0.0
+
+
+class DossierCache:
+    """SQLite-backed cache of compiled dossiers.
+
+    Entries are keyed by the normalized character name plus the normalized
+    title of the source work, so the same character compiled from another
+    edition or another book of the same work is reused. Pass titles, never
+    book ids: ids of unrelated books may look alike. Lookups fall back to
+    fuzzy matching of both parts, but keys whose digits differ never match.
+    A lookup without a work always misses, since the same name may belong to
+    a different character elsewhere. The database is opened lazily on first
+    use.
+
+    Parameters
+    ----------
+    path:
+        SQLite database file. Defaults to ``DOSSIER_CACHE_PATH`` or
+        ``.cache/dossier_cache.sqlite3``.
+    threshold:
+        Minimum :class:`~difflib.SequenceMatcher` ratio for fuzzy hits.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.85) -> None:
+        self.path = path or os.getenv("DOSSIER_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # name key -> work keys; loaded from the database on first use.
+        self._keys: Optional[Dict[str, Set[str]]] = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open the database, commit on success and always close it."""
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS dossier_cache ("
+                    " name_key TEXT NOT NULL,"
+                    " work_key TEXT NOT NULL,"
+                    " dossier TEXT NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " PRIMARY KEY (name_key, work_key))"
+                )
+                yield conn
+        finally:
+            conn.close()
+
+    def _load_keys(self) -> Dict[str, Set[str]]:
+        if self._keys is None:
+            keys: Dict[str, Set[str]] = {}
+            with self._connect() as conn:
+                for name_key, work_key in conn.execute(
+                    "SELECT name_key, work_key FROM dossier_cache"
+                ):
+                    keys.setdefault(name_key, set()).add(work_key)
+            self._keys = keys
+        return self._keys
+
+    def _resolve(
+        self, name: str, source_work: Optional[str]
+    ) -> Optional[tuple[str, str]]:
+        """Find the stored ``(name_key, work_key)`` best matching the request."""
+
+        if source_work is None:
+            return None
+        keys = self._load_keys()
+        name_key = normalize_identity(name)
+        if name_key not in keys:
+            best = 0.0
+            match = None
+            for key in keys:
+                ratio = _similar(name_key, key, self.threshold)
+                if ratio > best:
+                    best, match = ratio, key
+            if match is None:
+                return None
+            name_key = match
+
+        works = keys[name_key]
+        work_key = normalize_identity(source_work)
+        if work_key in works:
+            return name_key, work_key
+        best = 0.0
+        match = None
+        for key in works:
+            ratio = _similar(work_key, key, self.threshold)
+            if ratio > best:
+                best, match = ratio, key
+        return (name_key, match) if match is not None else None
+
+    def get(self, name: str, source_work: Optional[str] = None) -> Optional[dict]:
+        """Return a cached dossier for ``name`` from the work titled ``source_work``.
+
+        Returns ``None`` when ``source_work`` is omitted.
+        """
+
+        with self._lock:
+            resolved = self._resolve(name, source_work)
+            if resolved is None:
+                return None
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT dossier FROM dossier_cache"
+                    " WHERE name_key = ? AND work_key = ?",
+                    resolved,
+                ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, name: str, source_work: str, dossier: dict) -> None:
+        """Store ``dossier`` for ``name`` from ``source_work``, replacing any entry."""
+
+        name_key = normalize_identity(name)
+        work_key = normalize_identity(source_work)
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO dossier_cache"
+                    " (name_key, work_key, dossier, created_at) VALUES (?, ?, ?, ?)",
+                    (name_key, work_key, json.dumps(dossier), time.time()),
+                )
+            self._load_keys().setdefault(name_key, set()).add(work_key)
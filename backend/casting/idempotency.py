@@ -0,0 +1,197 @@
+"""Idempotency-key cache for expensive, non-repeatable requests."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_TTL_SECONDS = 3_600.0
+# Longest accepted key, as in common API conventions.
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(ValueError):
+    """Raised when a key is reused with a different request."""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "done", "result", "error", "waiters")
+
+    def __init__(self, fingerprint: str) -> None:
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # Futures of coroutines waiting in :meth:`IdempotencyCache.arun`.
+        self.waiters: List[asyncio.Future] = []
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class IdempotencyCache:
+    """Remember results of requests by their ``Idempotency-Key``.
+
+    The first request with a key runs; any request that arrives with the
+    same key while it is running waits for it and gets the same result. Once
+    finished, the result is replayed for ``ttl`` seconds. If the run raises,
+    the waiting requests get the same exception and the key is forgotten, so
+    a later retry runs again; if it is cancelled (its client went away), a
+    waiting request takes over instead. Reusing a key for a different request (another
+    ``fingerprint``) raises :class:`IdempotencyConflict`.
+
+    Entries live in process memory, so each worker process has its own.
+
+    Parameters
+    ----------
+    ttl:
+        Seconds a finished result is replayed. Defaults to
+        ``IDEMPOTENCY_TTL_SECONDS`` or one hour.
+    clock:
+        Monotonic time source, replaceable in tests.
+    """
+
+    def __init__(
+        self, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        if ttl is None:
+            ttl = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        # Finished keys in expiry order; all share one ttl, so that is
+        # completion order and purging pops from the front.
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _purge(self, now: float) -> None:
+        while self._finished:
+            key, expires_at = next(iter(self._finished.items()))
+            if expires_at > now:
+                break
+            del self._finished[key]
+            del self._entries[key]
+
+    def _claim(self, key: str, fingerprint: str) -> Tuple[_Entry, bool]:
+        """Return the live entry for ``key`` and whether the caller owns it."""
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f"idempotency key must be 1-{MAX_KEY_LENGTH} characters")
+        with self._lock:
+            self._purge(self._clock())
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry(fingerprint)
+        if entry.fingerprint != fingerprint:
+            raise IdempotencyConflict(f"idempotency key '{key}' was used for another request")
+        return entry, owner
+
+    def _settle(
+        self, key: str, entry: _Entry, result: Any = None, error: Optional[BaseException] = None
+    ) -> None:
+        """Record the owner's outcome and wake the waiters."""
+
+        with self._lock:
+            if error is None:
+                entry.result = result
+                self._finished[key] = self._clock() + self.ttl
+            else:
+                entry.error = error
+                self._entries.pop(key, None)
+            # Set under the lock so that :meth:`_subscribe` cannot miss it.
+            entry.done.set()
+            waiters, entry.waiters = entry.waiters, []
+        for waiter in waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # The waiter's event loop is closed; nobody is left to wake.
+                pass
+
+    def _subscribe(self, entry: _Entry) -> Optional[asyncio.Future]:
+        """Return a future of the running loop set when ``entry`` settles.
+
+        Returns ``None`` if it has settled already.
+        """
+
+        waiter = asyncio.get_running_loop().create_future()
+        with self._lock:
+            if entry.done.is_set():
+                return None
+            entry.waiters.append(waiter)
+        return waiter
+
+    @staticmethod
+    def _replay(entry: _Entry) -> Tuple[Any, bool]:
+        if entry.error is not None:
+            raise entry.error
+        return entry.result, True
+
+    def run(self, key: str, fingerprint: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return ``(result, replayed)`` for the request identified by ``key``.
+
+        ``compute`` is called only if no live entry exists for ``key``;
+        ``replayed`` is ``True`` when the result came from an earlier or
+        concurrent request. If the run being waited on was cancelled, the
+        waiter runs ``compute`` itself.
+        """
+
+        while True:
+            entry, owner = self._claim(key, fingerprint)
+            if not owner:
+                entry.done.wait()
+                if isinstance(entry.error, asyncio.CancelledError):
+                    continue
+                return self._replay(entry)
+            try:
+                result = compute()
+            except BaseException as exc:
+                self._settle(key, entry, error=exc)
+                raise
+            self._settle(key, entry, result)
+            return result, False
+
+    async def arun(
+        self, key: str, fingerprint: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Coroutine version of :meth:`run` for an async ``compute``.
+
+        Waiting for a concurrent run awaits a future that the run resolves
+        when it settles, so waiters hold neither the event loop nor a worker
+        thread, however many duplicates arrive.
+        """
+
+        while True:
+            entry, owner = self._claim(key, fingerprint)
+            if not owner:
+                waiter = self._subscribe(entry)
+                if waiter is not None:
+                    await waiter
+                if isinstance(entry.error, asyncio.CancelledError):
+                    continue
+                return self._replay(entry)
+            try:
+                result = await compute()
+            except BaseException as exc:
+                self._settle(key, entry, error=exc)
+                raise
+            self._settle(key, entry, result)
+            return result, False
+
+    def clear(self) -> None:
+        """Forget every finished entry (running ones complete normally)."""
+
+        with self._lock:
+            for key in self._finished:
+                del self._entries[key]
+            self._finished.clear()
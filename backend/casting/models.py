@@ -1,10 +1,14 @@
 """Data models for the casting pipeline."""
 
-from dataclasses import dataclass, field
-from typing import List
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
 
 
-@dataclass
+@dataclass(slots=True)
 class CharacterCandidate:
     """Represents an extracted character candidate.
 
@@ -23,7 +27,102 @@ class CharacterCandidate:
     minor_role: bool = False
 
 
-@dataclass
+def chunks_to_bitset(chunks: Iterable[int]) -> int:
+    """Encode chunk indices as an integer bitset (bit ``i`` set for chunk ``i``)."""
+
+    bits = 0
+    for idx in chunks:
+        if idx < 0:
+            raise ValueError(f"chunk index must be non-negative, got {idx}")
+        bits |= 1 << idx
+    return bits
+
+
+def bitset_to_chunks(bits: int) -> List[int]:
+    """Decode an integer bitset into a sorted list of chunk indices."""
+
+    chunks: List[int] = []
+    while bits:
+        low = bits & -bits
+        chunks.append(low.bit_length() - 1)
+        bits ^= low
+    return chunks
+
+
+class CompactCandidate:
+    """Memory-lean working form of :class:`CharacterCandidate`.
+
+    Provenance is held as an integer bitset so that merging two candidates is
+    a single bitwise OR and identical provenance compares (and hashes) as one
+    integer. Candidates are converted back with :meth:`to_candidate` so the
+    JSON produced by the API keeps its ``source_chunks`` list shape.
+    """
+
+    __slots__ = ("name", "provenance", "duplicate", "minor_role")
+
+    def __init__(
+        self,
+        name: str,
+        provenance: int = 0,
+        duplicate: bool = False,
+        minor_role: bool = False,
+    ) -> None:
+        self.name = name
+        self.provenance = provenance
+        self.duplicate = duplicate
+        self.minor_role = minor_role
+
+    @classmethod
+    def from_candidate(cls, candidate: CharacterCandidate) -> "CompactCandidate":
+        """Build a compact candidate from a ``CharacterCandidate``."""
+
+        return cls(
+            name=candidate.name,
+            provenance=chunks_to_bitset(candidate.source_chunks),
+            duplicate=candidate.duplicate,
+            minor_role=candidate.minor_role,
+        )
+
+    def to_candidate(self) -> CharacterCandidate:
+        """Return the equivalent ``CharacterCandidate``."""
+
+        return CharacterCandidate(
+            name=self.name,
+            source_chunks=bitset_to_chunks(self.provenance),
+            duplicate=self.duplicate,
+            minor_role=self.minor_role,
+        )
+
+    def merge(self, other: "CompactCandidate") -> None:
+        """Fold ``other``'s provenance into this candidate."""
+
+        self.provenance |= other.provenance
+
+    @property
+    def chunk_count(self) -> int:
+        """Number of distinct chunks the candidate was mentioned in."""
+
+        return self.provenance.bit_count()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactCandidate):
+            return NotImplemented
+        return (
+            self.name == other.name
+            and self.provenance == other.provenance
+            and self.duplicate == other.duplicate
+            and self.minor_role == other.minor_role
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactCandidate(name={self.name!r}, "
+            f"source_chunks={bitset_to_chunks(self.provenance)!r}, "
+            f"duplicate={self.duplicate!r}, minor_role={self.minor_role!r})"
+        )
+
+
+@dataclass(slots=True)
 class CastingCallLog:
     """Record of a candidate considered during a casting call."""
 
@@ -31,18 +130,391 @@ class CastingCallLog:
     selected: bool = False
 
 
+# Boolean attributes of a log entry with a secondary index in the store.
+FLAG_FIELDS = ("selected", "duplicate", "minor_role")
+
+
+# Consecutive ids per chunk of a log snapshot.
+CHUNK_SIZE = 1_024
+
+
+def _set_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of the set bits of ``mask`` in ascending order."""
+
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@dataclass(frozen=True)
+class _LogSnapshot:
+    """Immutable state of a :class:`CastingCallLogStore`.
+
+    Ids ``first_id`` to ``next_id - 1`` are stored densely in chunks of
+    ``CHUNK_SIZE``. Each flag in ``FLAG_FIELDS`` is indexed by one bitmask
+    per chunk. A writer copies the tuple of chunks and only the chunks it
+    touches, so a write costs O(n / CHUNK_SIZE + touched chunks), not O(n).
+    Book partitions are append-only id lists shared between snapshots;
+    each snapshot reads only the first ``book_sizes[book]`` ids of a list.
+    """
+
+    first_id: int = 0
+    next_id: int = 0
+    chunks: Tuple[Tuple[CastingCallLog, ...], ...] = ()
+    book_chunks: Tuple[Tuple[Optional[str], ...], ...] = ()
+    flags: Dict[str, Tuple[int, ...]] = field(
+        default_factory=lambda: {name: () for name in FLAG_FIELDS}
+    )
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(FLAG_FIELDS, 0))
+    books: Dict[Optional[str], List[int]] = field(default_factory=dict)
+    book_sizes: Dict[Optional[str], int] = field(default_factory=dict)
+    # Title of the work each book is an edition of, where known.
+    works: Dict[str, str] = field(default_factory=dict)
+    version: int = 0
+
+    def __len__(self) -> int:
+        return self.next_id - self.first_id
+
+    def locate(self, log_id: Any) -> Optional[Tuple[int, int]]:
+        """Return ``(chunk, offset)`` of ``log_id``, or ``None`` if absent."""
+
+        if not isinstance(log_id, int) or not self.first_id <= log_id < self.next_id:
+            return None
+        return divmod(log_id - self.first_id, CHUNK_SIZE)
+
+    def get(self, log_id: Any) -> Optional[CastingCallLog]:
+        position = self.locate(log_id)
+        return None if position is None else self.chunks[position[0]][position[1]]
+
+    def has(self, name: str, log_id: int) -> bool:
+        chunk, offset = self.locate(log_id)
+        return bool(self.flags[name][chunk] >> offset & 1)
+
+    def flagged(self, name: str, start: int = 0) -> Iterator[int]:
+        """Yield ids whose flag ``name`` is set, from ``start`` upwards."""
+
+        first = max(start, self.first_id) - self.first_id
+        for chunk in range(first // CHUNK_SIZE, len(self.chunks)):
+            mask = self.flags[name][chunk]
+            if chunk == first // CHUNK_SIZE:
+                mask &= -1 << first % CHUNK_SIZE
+            base = self.first_id + chunk * CHUNK_SIZE
+            for offset in _set_bits(mask):
+                yield base + offset
+
+    def logs(self) -> Iterator[Tuple[int, CastingCallLog]]:
+        log_id = self.first_id
+        for chunk in self.chunks:
+            for log in chunk:
+                yield log_id, log
+                log_id += 1
+
+
+def _flag_values(log: CastingCallLog) -> Dict[str, bool]:
+    return {
+        "selected": log.selected,
+        "duplicate": log.candidate.duplicate,
+        "minor_role": log.candidate.minor_role,
+    }
+
+
 class CastingCallLogStore:
-    """Simple in-memory persistence for ``CastingCallLog`` entries."""
+    """In-memory ``CastingCallLog`` entries with stable ids and indexes.
+
+    Ids are assigned sequentially by :meth:`add` and never reused, not even
+    after :meth:`clear`, so they stay valid as the log grows. :meth:`get` is
+    O(1). Each flag in ``FLAG_FIELDS`` has a secondary index (a bitmask of
+    the ids where it is true), and each book has a partition of its ids in
+    ascending order. Filtered queries therefore touch only matching entries.
+    Change flags through the store (:meth:`update`, :meth:`set_selected`)
+    so the indexes stay in sync.
+
+    The store is safe to share between threads. All state lives in an
+    immutable snapshot: readers grab the current one without locking and
+    see a consistent log for the whole call, while writers serialize on a
+    lock and publish a new snapshot with a single assignment. Snapshots are
+    chunked, so a write copies only the chunks it touches (see
+    ``CHUNK_SIZE``). Entries are replaced, never mutated, so a
+    ``CastingCallLog`` handed out once does not change afterwards.
+
+    ``version`` changes on every mutation, and ``token`` is unique to this
+    store instance, so together they identify a snapshot of the log (e.g.
+    for HTTP ETags).
+    """
 
     def __init__(self) -> None:
-        self._logs: List[CastingCallLog] = []
+        self.token = uuid4().hex
+        self._snapshot = _LogSnapshot()
+        self._write_lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """Counter bumped by every write."""
+
+        return self._snapshot.version
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __contains__(self, log_id: object) -> bool:
+        return self._snapshot.locate(log_id) is not None
+
+    def _commit(
+        self,
+        snap: _LogSnapshot,
+        changed: Dict[int, CastingCallLog],
+        book_id: Optional[str] = None,
+    ) -> None:
+        """Publish ``snap`` with ``changed`` entries (re)written.
+
+        Ids from ``snap.next_id`` on are new entries of ``book_id``; they
+        must be consecutive. Must be called with the write lock held.
+        """
+
+        if not changed:
+            return
+
+        chunks = list(snap.chunks)
+        book_chunks = list(snap.book_chunks)
+        flags = {name: list(masks) for name, masks in snap.flags.items()}
+        counts = dict(snap.counts)
+        by_chunk: Dict[int, List[int]] = {}
+        for log_id in sorted(changed):
+            by_chunk.setdefault((log_id - snap.first_id) // CHUNK_SIZE, []).append(log_id)
+        added = 0
+        for chunk, ids in by_chunk.items():
+            if chunk == len(chunks):
+                chunks.append(())
+                book_chunks.append(())
+                for masks in flags.values():
+                    masks.append(0)
+            entries = list(chunks[chunk])
+            masks = {name: flags[name][chunk] for name in FLAG_FIELDS}
+            for log_id in ids:
+                offset = (log_id - snap.first_id) % CHUNK_SIZE
+                log = changed[log_id]
+                if offset == len(entries):
+                    entries.append(log)
+                    added += 1
+                else:
+                    entries[offset] = log
+                bit = 1 << offset
+                for name, value in _flag_values(log).items():
+                    if value != bool(masks[name] & bit):
+                        masks[name] ^= bit
+                        counts[name] += 1 if value else -1
+            chunks[chunk] = tuple(entries)
+            for name, mask in masks.items():
+                flags[name][chunk] = mask
+            if len(entries) > len(book_chunks[chunk]):
+                book_chunks[chunk] += (book_id,) * (len(entries) - len(book_chunks[chunk]))
+
+        books, book_sizes = snap.books, snap.book_sizes
+        if added:
+            books = dict(books)
+            partition = books.setdefault(book_id, [])
+            # Append-only: older snapshots keep reading their own prefix.
+            partition.extend(range(snap.next_id, snap.next_id + added))
+            book_sizes = {**book_sizes, book_id: len(partition)}
+        self._snapshot = _LogSnapshot(
+            first_id=snap.first_id,
+            next_id=snap.next_id + added,
+            chunks=tuple(chunks),
+            book_chunks=tuple(book_chunks),
+            flags={name: tuple(masks) for name, masks in flags.items()},
+            counts=counts,
+            books=books,
+            book_sizes=book_sizes,
+            works=snap.works,
+            version=snap.version + 1,
+        )
+
+    def add(
+        self,
+        candidate: CharacterCandidate,
+        selected: bool = False,
+        book_id: Optional[str] = None,
+    ) -> int:
+        """Persist a candidate to the log and return its id."""
+
+        return self.add_many([candidate], selected=selected, book_id=book_id)[0]
+
+    def add_many(
+        self,
+        candidates: Iterable[CharacterCandidate],
+        selected: bool = False,
+        book_id: Optional[str] = None,
+    ) -> List[int]:
+        """Persist several candidates in one write and return their ids."""
+
+        with self._write_lock:
+            snap = self._snapshot
+            changed = {
+                log_id: CastingCallLog(candidate=candidate, selected=selected)
+                for log_id, candidate in enumerate(candidates, start=snap.next_id)
+            }
+            self._commit(snap, changed, book_id)
+            return list(changed)
+
+    def update(self, log_id: int, candidate: CharacterCandidate) -> None:
+        """Replace the candidate logged at ``log_id``, keeping its selection."""
+
+        self.update_many({log_id: candidate})
+
+    def update_many(self, candidates: Dict[int, CharacterCandidate]) -> None:
+        """Replace several logged candidates in one write.
+
+        Raises ``KeyError`` if an id is not in the log.
+        """
+
+        with self._write_lock:
+            snap = self._snapshot
+            changed = {}
+            for log_id, candidate in candidates.items():
+                log = snap.get(log_id)
+                if log is None:
+                    raise KeyError(log_id)
+                changed[log_id] = CastingCallLog(candidate=candidate, selected=log.selected)
+            self._commit(snap, changed)
+
+    def get(self, log_id: int) -> Optional[CastingCallLog]:
+        """Return the entry with ``log_id``, or ``None``."""
+
+        return self._snapshot.get(log_id)
 
-    def add(self, candidate: CharacterCandidate, selected: bool = False) -> None:
-        """Persist a candidate to the log."""
+    def book_of(self, log_id: int) -> Optional[str]:
+        """Return the book ``log_id`` was logged for."""
 
-        self._logs.append(CastingCallLog(candidate=candidate, selected=selected))
+        snap = self._snapshot
+        position = snap.locate(log_id)
+        return None if position is None else snap.book_chunks[position[0]][position[1]]
+
+    def work_of(self, book_id: Optional[str]) -> Optional[str]:
+        """Return the title of the work ``book_id`` is an edition of, if known."""
+
+        return None if book_id is None else self._snapshot.works.get(book_id)
+
+    def set_work(self, book_id: str, title: str) -> None:
+        """Record ``title`` as the work ``book_id`` is an edition of."""
+
+        with self._write_lock:
+            snap = self._snapshot
+            if snap.works.get(book_id) == title:
+                return
+            self._snapshot = replace(
+                snap, works={**snap.works, book_id: title}, version=snap.version + 1
+            )
+
+    def books(self) -> List[Optional[str]]:
+        """Return the books with logged candidates."""
+
+        return list(self._snapshot.book_sizes)
+
+    def set_selected(self, log_ids: Iterable[int]) -> List[int]:
+        """Select exactly ``log_ids`` and clear every other selection.
+
+        Only the previously selected and the requested entries are touched.
+        Returns the selected ids in ascending order; unknown ids are ignored.
+        """
+
+        with self._write_lock:
+            snap = self._snapshot
+            wanted = {log_id for log_id in log_ids if snap.locate(log_id) is not None}
+            selected = set(snap.flagged("selected"))
+            changed = {
+                log_id: CastingCallLog(
+                    candidate=snap.get(log_id).candidate, selected=log_id in wanted
+                )
+                for log_id in selected ^ wanted
+            }
+            self._commit(snap, changed)
+            return sorted(wanted)
+
+    def _iter_ids(
+        self,
+        snap: _LogSnapshot,
+        after: Optional[int] = None,
+        book_id: Optional[str] = None,
+        selected: Optional[bool] = None,
+        duplicate: Optional[bool] = None,
+        minor_role: Optional[bool] = None,
+        name_prefix: Optional[str] = None,
+    ) -> Iterator[int]:
+        """Yield matching ids of ``snap`` above ``after`` in ascending order.
+
+        The walk starts from the smallest positive set (the book's partition
+        or a ``True`` flag), or from ``after + 1`` over all ids, so a page
+        only visits entries from the cursor onwards.
+        """
+
+        start = max(0 if after is None else after + 1, snap.first_id)
+        filters = {"selected": selected, "duplicate": duplicate, "minor_role": minor_role}
+        required = [name for name, value in filters.items() if value is True]
+        excluded = [name for name, value in filters.items() if value is False]
+        if book_id is not None:
+            partition = snap.books.get(book_id, [])
+            size = snap.book_sizes.get(book_id, 0)
+            first = bisect_left(partition, start, 0, size)
+            base: Iterable[int] = (partition[i] for i in range(first, size))
+        elif required:
+            base = snap.flagged(min(required, key=snap.counts.__getitem__), start)
+        else:
+            base = range(start, snap.next_id)
+        prefix = name_prefix.casefold() if name_prefix else None
+        for log_id in base:
+            if not all(snap.has(name, log_id) for name in required) or any(
+                snap.has(name, log_id) for name in excluded
+            ):
+                continue
+            if prefix is not None and not snap.get(log_id).candidate.name.casefold().startswith(
+                prefix
+            ):
+                continue
+            yield log_id
+
+    def ids(self, **filters: Any) -> List[int]:
+        """Return ids matching all given filters, in ascending order.
+
+        Accepts ``book_id``, the flags in ``FLAG_FIELDS`` (keep entries whose
+        flag equals the given value) and a case-insensitive ``name_prefix``.
+        """
+
+        return list(self._iter_ids(self._snapshot, **filters))
+
+    def query(self, **filters: Any) -> List[Tuple[int, CastingCallLog]]:
+        """Return ``(id, entry)`` pairs for :meth:`ids` with ``filters``."""
+
+        snap = self._snapshot
+        return [(log_id, snap.get(log_id)) for log_id in self._iter_ids(snap, **filters)]
+
+    def page(
+        self, after: Optional[int] = None, limit: int = 100, **filters: Any
+    ) -> Tuple[List[Tuple[int, CastingCallLog]], Optional[int]]:
+        """Return one page of :meth:`query` results after id ``after``.
+
+        Returns the ``(id, entry)`` pairs and the id to pass as ``after`` for
+        the next page, or ``None`` on the last page. Cost depends on the page
+        and filters, not on the size of the log.
+        """
+
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        snap = self._snapshot
+        ids = list(islice(self._iter_ids(snap, after=after, **filters), limit + 1))
+        next_after = ids[limit - 1] if len(ids) > limit else None
+        return [(log_id, snap.get(log_id)) for log_id in ids[:limit]], next_after
 
     def all(self) -> List[CastingCallLog]:
-        """Return all log entries."""
+        """Return all log entries in id order."""
+
+        return [log for chunk in self._snapshot.chunks for log in chunk]
+
+    def clear(self) -> None:
+        """Remove every entry. Ids keep counting up, so none is reused."""
 
-        return list(self._logs)
+        with self._write_lock:
+            snap = self._snapshot
+            self._snapshot = _LogSnapshot(
+                first_id=snap.next_id, next_id=snap.next_id, version=snap.version + 1
+            )
@@ -1,19 +1,42 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Optional
+import asyncio
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import lru_cache, reduce
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Tuple
 import re
+import threading
 from difflib import SequenceMatcher
 import json
 from pathlib import Path
 import jsonschema
 import logging
 
-from .models import CharacterCandidate, CastingCallLogStore
+from .cache import DossierCache
+from .models import (
+    CharacterCandidate,
+    CastingCallLogStore,
+    CompactCandidate,
+    chunks_to_bitset,
+)
 from .prompts import CASTING_DIRECTOR_PROMPT, DOSSIER_COMPILER_PROMPT
-from ..llm import LLMClient
+from ..llm import ContextLengthError, LLMClient, LLMTimeoutError
 
 logger = logging.getLogger(__name__)
 
+_NON_ALNUM = re.compile(r"[^a-z0-9]")
+
+# Chunks shorter than this are not bisected further after an LLM failure.
+MIN_SPLIT_CHARS = 200
+# Times a timed-out piece is resent at the same size before it is split.
+TIMEOUT_RETRIES = 1
+# Successful requests near a model's safe chunk size before the size grows,
+# and the factor it grows by.
+SAFE_SIZE_RECOVERY = 20
+SAFE_SIZE_GROWTH = 1.25
+
 
 @dataclass
 class CharacterExtractionPipeline:
@@ -21,9 +44,27 @@ class CharacterExtractionPipeline:
 
     llm_client: LLMClient
     store: Optional[CastingCallLogStore] = None
+    # Learned maximum chunk length per model. Pass a shared dict to carry
+    # what one pipeline learned over to others using the same model.
+    safe_chunk_sizes: Dict[str, int] = field(default_factory=dict)
+    # Successes near the safe size per model since it last changed.
+    _safe_size_streaks: Dict[str, int] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _preview_thread: Optional[threading.Thread] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _preview_result: Optional[List[CharacterCandidate]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def run(
-        self, book_id: str, source: str = "gutenberg"
+        self,
+        book_id: str,
+        source: str = "gutenberg",
+        workers: int = 1,
+        preview: bool = False,
+        preview_chunks: int = 8,
     ) -> List[CharacterCandidate]:
         """Run the character extraction pipeline for a given book.
 
@@ -34,6 +75,18 @@ class CharacterExtractionPipeline:
         source:
             Source from which the book text will be fetched. Defaults to
             ``"gutenberg"``.
+        workers:
+            Number of worker processes. Values above ``1`` switch to
+            :meth:`map_reduce_candidates`, which yields the same candidates
+            as the sequential path. Defaults to ``1``.
+        preview:
+            When ``True`` only a stratified sample of ``preview_chunks`` chunks
+            is extracted before returning provisional candidates. The rest of
+            the book is extracted on a background thread that keeps the
+            casting log up to date; see :meth:`wait_for_preview`.
+        preview_chunks:
+            Number of chunks sampled for the preview and extracted between
+            casting log updates afterwards. Defaults to ``8``.
 
         Returns
         -------
@@ -41,17 +94,138 @@ class CharacterExtractionPipeline:
             Deduplicated list of character candidates extracted from the text.
         """
         text = self.fetch_text(book_id, source)
+        title = work_title(text)
+        if self.store is not None and title:
+            # Keys the dossier cache for this book's candidates.
+            self.store.set_work(book_id, title)
         chunks = self.chunk_text(text)
-        candidates = self.extract_characters(chunks)
-        deduped = self.deduplicate_candidates(candidates)
+        if preview:
+            return self._run_preview(chunks, preview_chunks, book_id)
+        if workers > 1:
+            deduped = self.map_reduce_candidates(chunks, workers=workers)
+        else:
+            candidates = self.extract_characters(chunks)
+            deduped = self.deduplicate_candidates(candidates)
         flagged = self.flag_duplicate_candidates(deduped)
 
         if self.store is not None:
-            for cand in flagged:
-                self.store.add(cand)
+            self.store.add_many(flagged, book_id=book_id)
 
         return flagged
 
+    def wait_for_preview(
+        self, timeout: Optional[float] = None
+    ) -> Optional[List[CharacterCandidate]]:
+        """Wait for a preview run's background extraction to finish.
+
+        Returns the final flagged candidates, or ``None`` if the background
+        extraction is still running after ``timeout`` seconds or failed.
+        """
+
+        if self._preview_thread is not None:
+            self._preview_thread.join(timeout)
+            if self._preview_thread.is_alive():
+                return None
+        return self._preview_result
+
+    def _run_preview(
+        self, chunks: List[str], sample_size: int, book_id: Optional[str] = None
+    ) -> List[CharacterCandidate]:
+        """Extract a stratified sample now and the remaining chunks later."""
+
+        sample = _stratified_sample(len(chunks), sample_size)
+        # Candidates extracted per chunk; chunks not yet extracted are empty.
+        extracted: List[List[CharacterCandidate]] = [[] for _ in chunks]
+        for idx in sample:
+            extracted[idx] = self.extract_characters([chunks[idx]], offset=idx)
+        provisional = self._merge_extracted(extracted)
+        log_ids: Dict[str, int] = {}
+        self._sync_store(log_ids, provisional, book_id)
+
+        sampled = set(sample)
+        remaining = [idx for idx in range(len(chunks)) if idx not in sampled]
+        self._preview_result = provisional if not remaining else None
+        self._preview_thread = None
+        if remaining:
+            self._preview_thread = threading.Thread(
+                target=self._fill_preview,
+                args=(
+                    chunks, remaining, extracted, log_ids, max(1, sample_size), book_id
+                ),
+                name="casting-preview-fill",
+                daemon=True,
+            )
+            self._preview_thread.start()
+        return provisional
+
+    def _fill_preview(
+        self,
+        chunks: List[str],
+        remaining: List[int],
+        extracted: List[List[CharacterCandidate]],
+        log_ids: Dict[str, int],
+        batch_size: int,
+        book_id: Optional[str] = None,
+    ) -> None:
+        """Background half of a preview run.
+
+        After each batch the candidates are merged again in book order, so
+        the last update is exactly what :meth:`run` returns without preview.
+        """
+
+        try:
+            for start in range(0, len(remaining), batch_size):
+                for idx in remaining[start : start + batch_size]:
+                    extracted[idx] = self.extract_characters([chunks[idx]], offset=idx)
+                flagged = self._merge_extracted(extracted)
+                self._sync_store(log_ids, flagged, book_id)
+            self._preview_result = flagged
+        except Exception:
+            logger.exception("Background preview extraction failed")
+
+    def _merge_extracted(
+        self, extracted: List[List[CharacterCandidate]]
+    ) -> List[CharacterCandidate]:
+        """Deduplicate and flag per-chunk candidates as :meth:`run` does.
+
+        Fuzzy merging depends on the order names are first seen, so chunks
+        are always merged in book order, whatever order they were extracted
+        in.
+        """
+
+        candidates = [cand for found in extracted for cand in found]
+        return self.flag_duplicate_candidates(self.deduplicate_candidates(candidates))
+
+    def _sync_store(
+        self,
+        log_ids: Dict[str, int],
+        candidates: List[CharacterCandidate],
+        book_id: Optional[str] = None,
+    ) -> None:
+        """Log ``candidates``, reusing the entry logged for each name.
+
+        ``log_ids`` maps normalized names to log ids and is updated with new
+        entries. A logged name that is no longer a candidate of its own was
+        merged into a name found earlier in the book; its entry is flagged
+        as a duplicate rather than removed, so ids stay stable.
+        """
+
+        if self.store is None:
+            return
+        current = {_normalize_name(cand.name): cand for cand in candidates}
+        changed = {
+            log_ids[key]: cand for key, cand in current.items() if key in log_ids
+        }
+        for key, log_id in log_ids.items():
+            if key not in current:
+                merged = self.store.get(log_id).candidate
+                if not merged.duplicate:
+                    changed[log_id] = replace(merged, duplicate=True)
+        self.store.update_many(changed)
+        new = [key for key in current if key not in log_ids]
+        ids = self.store.add_many([current[key] for key in new], book_id=book_id)
+        log_ids.update(zip(new, ids))
+
     # The following methods are expected to be implemented by subclasses or
     # provided via mixins. They are declared here to document the expected
     # interface of the pipeline steps.
@@ -66,15 +240,22 @@ class CharacterExtractionPipeline:
         raise NotImplementedError
 
     def extract_characters(
-        self, chunks: List[str]
+        self, chunks: List[str], offset: int = 0
     ) -> List[CharacterCandidate]:
-        """Extract character candidates from text chunks."""
+        """Extract character candidates from text chunks.
+
+        ``offset`` is added to each chunk's position so that provenance
+        refers to the chunk's index in the whole book when ``chunks`` is only
+        a shard of it.
+
+        Chunks that keep timing out or exceed the model's context are split; see
+        :meth:`_generate_characters`. Candidates found in any piece are
+        attributed to the original chunk index.
+        """
 
         candidates: List[CharacterCandidate] = []
-        for idx, chunk in enumerate(chunks):
-            prompt = f"{CASTING_DIRECTOR_PROMPT}\n{chunk}"
-            response = self.llm_client.generate(prompt)
-            for item in response.get("characters", []):
+        for idx, chunk in enumerate(chunks, start=offset):
+            for item in self._generate_characters(chunk):
                 try:
                     candidate = CharacterCandidate(**item)
                     candidate.source_chunks.append(idx)
@@ -83,6 +264,89 @@ class CharacterExtractionPipeline:
                     continue
         return candidates
 
+    def _generate_characters(self, chunk: str) -> List[dict]:
+        """Return the raw ``characters`` items the LLM lists for ``chunk``.
+
+        If the model already failed on chunks longer than its learned safe
+        size, ``chunk`` is cut to that size before any request is sent. A
+        piece that hits a context-length error is bisected at whitespace and
+        both halves are retried, lowering the safe size for the model.
+
+        Timeouts say nothing certain about the prompt size, so a timed-out
+        piece is first resent as is, up to ``TIMEOUT_RETRIES`` times. Only
+        then is it bisected, and the safe size is left alone. After
+        ``SAFE_SIZE_RECOVERY`` successful requests near the safe size, it
+        grows by ``SAFE_SIZE_GROWTH``, so one bad stretch does not shrink
+        every later prompt. Pieces shorter than ``MIN_SPLIT_CHARS`` re-raise
+        the error.
+        """
+
+        model = _model_key(self.llm_client)
+        limit = self.safe_chunk_sizes.get(model)
+        pieces = _cut_text(chunk, limit) if limit else [chunk]
+        # (piece, timeouts so far), in reverse order of sending.
+        pending = [(piece, 0) for piece in reversed(pieces)]
+
+        items: List[dict] = []
+        while pending:
+            piece, timeouts = pending.pop()
+            prompt = f"{CASTING_DIRECTOR_PROMPT}\n{piece}"
+            try:
+                response = self.llm_client.generate(prompt)
+            except LLMTimeoutError:
+                if timeouts < TIMEOUT_RETRIES:
+                    logger.warning(
+                        "Retrying %s-char chunk for %s after timeout", len(piece), model
+                    )
+                    pending.append((piece, timeouts + 1))
+                    continue
+                if len(piece) < MIN_SPLIT_CHARS:
+                    raise
+                logger.warning(
+                    "Splitting %s-char chunk for %s after %s timeouts",
+                    len(piece),
+                    model,
+                    timeouts + 1,
+                )
+                left, right = _bisect_text(piece)
+                pending.extend([(right, 0), (left, 0)])
+                continue
+            except ContextLengthError:
+                if len(piece) < MIN_SPLIT_CHARS:
+                    raise
+                left, right = _bisect_text(piece)
+                learned = max(len(left), len(right))
+                if learned < self.safe_chunk_sizes.get(model, len(piece)):
+                    self.safe_chunk_sizes[model] = learned
+                    self._safe_size_streaks[model] = 0
+                logger.warning(
+                    "Splitting %s-char chunk for %s after context-length error; "
+                    "safe size now %s",
+                    len(piece),
+                    model,
+                    self.safe_chunk_sizes[model],
+                )
+                pending.extend([(right, 0), (left, 0)])
+                continue
+            self._record_success(model, len(piece))
+            items.extend(response.get("characters", []))
+        return items
+
+    def _record_success(self, model: str, size: int) -> None:
+        """Grow the safe size of ``model`` after enough successes near it."""
+
+        limit = self.safe_chunk_sizes.get(model)
+        if limit is None or size * 2 < limit:
+            return
+        streak = self._safe_size_streaks.get(model, 0) + 1
+        if streak >= SAFE_SIZE_RECOVERY:
+            self.safe_chunk_sizes[model] = int(limit * SAFE_SIZE_GROWTH)
+            logger.info(
+                "Safe chunk size for %s raised to %s", model, self.safe_chunk_sizes[model]
+            )
+            streak = 0
+        self._safe_size_streaks[model] = streak
+
     def deduplicate_candidates(
         self, candidates: List[CharacterCandidate]
     ) -> List[CharacterCandidate]:
@@ -101,31 +365,92 @@ class CharacterExtractionPipeline:
             Consolidated list of candidates with merged ``source_chunks``.
         """
 
-        def normalize(name: str) -> str:
-            """Lower-case and strip non-alphanumeric characters."""
-            return re.sub(r"[^a-z0-9]", "", name.lower())
+        state = DedupState()
+        state.update(candidates)
+        return [cand.to_candidate() for cand in state.finalize()]
+
+    def map_reduce_candidates(
+        self,
+        chunks: List[str],
+        workers: int = 2,
+        shard_size: Optional[int] = None,
+    ) -> List[CharacterCandidate]:
+        """Extract and deduplicate ``chunks`` across worker processes.
 
-        merged: dict[str, CharacterCandidate] = {}
+        Contiguous shards of chunks are extracted in worker processes, each
+        producing a partial :class:`DedupState`. The partial states are merged
+        in shard order and finalized, giving exactly the result of
+        ``deduplicate_candidates(extract_characters(chunks))``.
+
+        Parameters
+        ----------
+        chunks:
+            Text chunks of the whole book.
+        workers:
+            Size of the process pool. Defaults to ``2``.
+        shard_size:
+            Number of chunks per shard. Defaults to splitting the book into
+            four shards per worker so slow shards even out.
+        """
+
+        if not chunks:
+            return []
+        if shard_size is None:
+            shard_size = max(1, -(-len(chunks) // (workers * 4)))
+        offsets = list(range(0, len(chunks), shard_size))
+        shards = [chunks[start : start + shard_size] for start in offsets]
+        # Workers only need the extraction stage; leave the log store behind.
+        worker_pipeline = replace(self, store=None)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            states = executor.map(
+                _extract_shard, repeat(worker_pipeline), offsets, shards
+            )
+            state = reduce(DedupState.merge, states, DedupState())
+
+        return [cand.to_candidate() for cand in state.finalize()]
+
+    @staticmethod
+    def _merge_compact(
+        candidates: Iterable[CompactCandidate],
+    ) -> List[CompactCandidate]:
+        """Fuzzy-merge compact candidates by normalized name.
+
+        Keys are matched in insertion order and the first key with a
+        :class:`~difflib.SequenceMatcher` ratio of at least ``0.85`` wins.
+        Exact normalized matches short-circuit the scan; since a key is only
+        inserted when no earlier key matched it, no earlier key can match an
+        identical name either.
+        """
+
+        merged: dict[str, CompactCandidate] = {}
+        # One matcher per key keeps SequenceMatcher's per-``b`` lookup tables
+        # alive instead of rebuilding them for every comparison.
+        matchers: dict[str, SequenceMatcher] = {}
         for cand in candidates:
-            norm = normalize(cand.name)
+            norm = _normalize_name(cand.name)
 
-            # Attempt fuzzy match against existing normalized keys.
-            match_key = None
-            for key in merged.keys():
-                ratio = SequenceMatcher(None, norm, key).ratio()
-                if ratio >= 0.85:
-                    match_key = key
-                    break
+            match_key = norm if norm in merged else None
+            if match_key is None:
+                # Attempt fuzzy match against existing normalized keys. The
+                # cheap upper bounds reject most keys before ``ratio``.
+                for key, matcher in matchers.items():
+                    matcher.set_seq1(norm)
+                    if (
+                        matcher.real_quick_ratio() >= 0.85
+                        and matcher.quick_ratio() >= 0.85
+                        and matcher.ratio() >= 0.85
+                    ):
+                        match_key = key
+                        break
 
             if match_key is None:
-                merged[norm] = CharacterCandidate(
-                    name=cand.name, source_chunks=list(cand.source_chunks)
+                merged[norm] = CompactCandidate(
+                    name=cand.name, provenance=cand.provenance
                 )
+                matchers[norm] = SequenceMatcher(None, "", norm)
             else:
-                existing = merged[match_key]
-                existing.source_chunks.extend(cand.source_chunks)
-                # ensure unique provenance entries
-                existing.source_chunks = sorted(set(existing.source_chunks))
+                merged[match_key].merge(cand)
 
         return list(merged.values())
 
@@ -139,30 +464,162 @@ class CharacterExtractionPipeline:
         minor roles.
         """
 
-        groups: dict[tuple[int, ...], List[CharacterCandidate]] = {}
-        for cand in candidates:
-            key = tuple(sorted(cand.source_chunks))
-            groups.setdefault(key, []).append(cand)
-
-        for group in groups.values():
-            if len(group) > 1:
-                for cand in group:
-                    cand.duplicate = True
+        # Bitsets make identical provenance a single hashable integer.
+        bitsets = [chunks_to_bitset(cand.source_chunks) for cand in candidates]
+        counts = Counter(bitsets)
 
-        for cand in candidates:
-            if len(cand.source_chunks) <= 1:
+        for cand, bits in zip(candidates, bitsets):
+            if counts[bits] > 1:
+                cand.duplicate = True
+            if bits.bit_count() <= 1:
                 cand.minor_role = True
 
         return candidates
 
 
+def _normalize_name(name: str) -> str:
+    """Lower-case and strip non-alphanumeric characters."""
+    return _NON_ALNUM.sub("", name.lower())
+
+
+def _model_key(llm_client: object) -> str:
+    """Identify the model behind ``llm_client`` for safe-size learning."""
+
+    for attr in ("model", "api_url"):
+        value = getattr(llm_client, attr, None)
+        if value:
+            return str(value)
+    return type(llm_client).__name__
+
+
+def _bisect_text(text: str) -> Tuple[str, str]:
+    """Split ``text`` in two at the whitespace closest to its middle."""
+
+    mid = len(text) // 2
+    before = text.rfind(" ", 0, mid)
+    after = text.find(" ", mid)
+    candidates = [pos for pos in (before, after) if pos > 0]
+    cut = min(candidates, key=lambda pos: abs(pos - mid)) if candidates else mid
+    return text[:cut], text[cut:]
+
+
+def _cut_text(text: str, limit: int) -> List[str]:
+    """Cut ``text`` into pieces of at most ``limit`` characters at whitespace."""
+
+    pieces: List[str] = []
+    while len(text) > limit:
+        cut = text.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+
+_TITLE_LINE = re.compile(r"^Title:[ \t]*(\S.*?)\s*$", re.MULTILINE)
+# Characters of a text searched for its ``Title:`` header.
+TITLE_SEARCH_CHARS = 5_000
+
+
+def work_title(text: str) -> Optional[str]:
+    """Return the title in the ``Title:`` header of a Gutenberg text, if any."""
+
+    match = _TITLE_LINE.search(text, 0, TITLE_SEARCH_CHARS)
+    return match.group(1) if match else None
+
+
+def _stratified_sample(total: int, size: int) -> List[int]:
+    """Pick the middle chunk of ``size`` equal strata of ``total`` chunks."""
+
+    if size >= total:
+        return list(range(total))
+    if size <= 0:
+        return []
+    return sorted({(2 * i + 1) * total // (2 * size) for i in range(size)})
+
+
+class DedupState:
+    """Mergeable partial state of candidate deduplication.
+
+    The state maps each distinct normalized name, in order of first
+    occurrence, to a :class:`CompactCandidate` carrying the first spelling
+    seen and the union of its provenance. Fuzzy matching only depends on the
+    first occurrence of each normalized name, so it is deferred to
+    :meth:`finalize`. Merging the states of contiguous shards in order is
+    associative and reproduces the state of the whole sequence.
+    """
+
+    __slots__ = ("_entries",)
+
+    def __init__(self) -> None:
+        self._entries: dict[str, CompactCandidate] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, candidate: CharacterCandidate) -> None:
+        """Record a raw candidate."""
+
+        bits = chunks_to_bitset(candidate.source_chunks)
+        norm = _normalize_name(candidate.name)
+        entry = self._entries.get(norm)
+        if entry is None:
+            self._entries[norm] = CompactCandidate(
+                name=candidate.name, provenance=bits
+            )
+        else:
+            entry.provenance |= bits
+
+    def update(self, candidates: Iterable[CharacterCandidate]) -> None:
+        """Record each candidate in ``candidates``."""
+
+        for cand in candidates:
+            self.add(cand)
+
+    def merge(self, other: "DedupState") -> "DedupState":
+        """Fold the state of a later shard into this one and return ``self``."""
+
+        for norm, entry in other._entries.items():
+            existing = self._entries.get(norm)
+            if existing is None:
+                self._entries[norm] = CompactCandidate(
+                    name=entry.name, provenance=entry.provenance
+                )
+            else:
+                existing.merge(entry)
+        return self
+
+    def finalize(self) -> List[CompactCandidate]:
+        """Fuzzy-merge the recorded names into the final candidate list."""
+
+        return CharacterExtractionPipeline._merge_compact(self._entries.values())
+
+
+def _extract_shard(
+    pipeline: CharacterExtractionPipeline, offset: int, chunks: List[str]
+) -> DedupState:
+    """Worker entry point: extract one shard and deduplicate it locally."""
+
+    state = DedupState()
+    state.update(pipeline.extract_characters(chunks, offset=offset))
+    return state
+
+
 @dataclass
 class DossierCompiler:
     """Generate a character dossier for a candidate."""
 
     llm_client: LLMClient
+    cache: Optional[DossierCache] = None
 
-    def compile(self, candidate: CharacterCandidate, retries: int = 1) -> dict:
+    def compile(
+        self,
+        candidate: CharacterCandidate,
+        retries: int = 1,
+        source_work: Optional[str] = None,
+        force_refresh: bool = False,
+    ) -> dict:
         """Compile a dossier for ``candidate``.
 
         Parameters
@@ -172,40 +629,127 @@ class DossierCompiler:
         retries:
             Number of times to retry generation if validation fails.
             Defaults to ``1``.
+        source_work:
+            Work the candidate comes from, used to key the dossier cache.
+            Pass its title, not a book id. When omitted, the cache is not
+            read, and new dossiers are cached under their own
+            ``source_material``.
+        force_refresh:
+            Skip the cache lookup and compile afresh, replacing any cached
+            dossier. Defaults to ``False``.
         """
 
-        prompt = f"{DOSSIER_COMPILER_PROMPT}\nName: {candidate.name}"
-        schema_path = (
-            Path(__file__).resolve().parents[2] / "character_dossier_expanded_method_i.json"
-        )
-        schema = json.loads(schema_path.read_text())
+        if self.cache is not None and not force_refresh:
+            cached = self.cache.get(candidate.name, source_work)
+            if cached is not None:
+                logger.info("Dossier cache hit for %s", candidate.name)
+                return cached
+
+        result = self._compile_uncached(candidate, retries)
+        if self.cache is not None and "error" not in result:
+            work = source_work or result.get("source_material")
+            if work:
+                self.cache.put(candidate.name, work, result)
+        return result
 
+    async def acompile(
+        self,
+        candidate: CharacterCandidate,
+        retries: int = 1,
+        source_work: Optional[str] = None,
+        force_refresh: bool = False,
+    ) -> dict:
+        """Coroutine version of :meth:`compile`.
+
+        ``llm_client`` must have a coroutine ``generate``, such as
+        :class:`~backend.llm.AsyncLLMClient`. Cache reads and writes run in a
+        worker thread, so the event loop never blocks. Cancelling the task
+        cancels the in-flight LLM request.
+        """
+
+        if self.cache is not None and not force_refresh:
+            cached = await asyncio.to_thread(self.cache.get, candidate.name, source_work)
+            if cached is not None:
+                logger.info("Dossier cache hit for %s", candidate.name)
+                return cached
+
+        prompt = self._prompt(candidate)
         for attempt in range(retries + 1):
             try:
-                result = self.llm_client.generate(prompt)
+                result = await self.llm_client.generate(prompt)
             except Exception as exc:
-                logger.exception("LLM generation failed for %s", candidate.name)
-                if attempt == retries:
-                    return {
-                        "name": candidate.name,
-                        "error": f"LLM generation failed: {exc}",
-                    }
-                continue
+                outcome = self._generation_failed(candidate, exc, attempt == retries)
+            else:
+                outcome = self._validated(candidate, result, attempt == retries)
+            if outcome is not None:
+                break
+
+        if self.cache is not None and "error" not in outcome:
+            work = source_work or outcome.get("source_material")
+            if work:
+                await asyncio.to_thread(self.cache.put, candidate.name, work, outcome)
+        return outcome
+
+    @staticmethod
+    def _prompt(candidate: CharacterCandidate) -> str:
+        return f"{DOSSIER_COMPILER_PROMPT}\nName: {candidate.name}"
+
+    @staticmethod
+    def _generation_failed(
+        candidate: CharacterCandidate, exc: Exception, last: bool
+    ) -> Optional[dict]:
+        """Log an LLM failure; return the error result on the last attempt."""
+
+        logger.exception("LLM generation failed for %s", candidate.name)
+        if last:
+            return {"name": candidate.name, "error": f"LLM generation failed: {exc}"}
+        return None
+
+    @staticmethod
+    def _validated(candidate: CharacterCandidate, result: dict, last: bool) -> Optional[dict]:
+        """Check ``result`` against the dossier schema.
+
+        Returns ``result`` if it is valid, the error result if this was the
+        last attempt, and ``None`` to retry.
+        """
 
+        try:
+            jsonschema.validate(instance=result, schema=_dossier_schema())
+            return result
+        except jsonschema.ValidationError as err:
+            logger.exception(
+                "Schema validation failed for %s: %s",
+                candidate.name,
+                err.message,
+            )
+            if last:
+                return {
+                    "name": candidate.name,
+                    "error": f"Validation failed: {err.message}",
+                }
+            return None
+
+    def _compile_uncached(self, candidate: CharacterCandidate, retries: int) -> dict:
+        """Call the LLM and validate its dossier against the schema."""
+
+        prompt = self._prompt(candidate)
+        for attempt in range(retries + 1):
             try:
-                jsonschema.validate(instance=result, schema=schema)
-                return result
-            except jsonschema.ValidationError as err:
-                logger.exception(
-                    "Schema validation failed for %s: %s",
-                    candidate.name,
-                    err.message,
-                )
-                if attempt == retries:
-                    return {
-                        "name": candidate.name,
-                        "error": f"Validation failed: {err.message}",
-                    }
+                result = self.llm_client.generate(prompt)
+            except Exception as exc:
+                outcome = self._generation_failed(candidate, exc, attempt == retries)
+            else:
+                outcome = self._validated(candidate, result, attempt == retries)
+            if outcome is not None:
+                return outcome
+
+
+@lru_cache(maxsize=1)
+def _dossier_schema() -> dict:
+    schema_path = (
+        Path(__file__).resolve().parents[2] / "character_dossier_expanded_method_i.json"
+    )
+    return json.loads(schema_path.read_text())
 
 
 @dataclass
@@ -259,10 +803,10 @@ class CastingCallWorkflow:
             errors.append({"stage": "extraction", "error": str(exc)})
             return compiled, errors
 
-        logs = self.store.all()
         for idx in selected_ids:
-            if 0 <= idx < len(logs):
-                candidate = logs[idx].candidate
+            log = self.store.get(idx)
+            if log is not None:
+                candidate = log.candidate
                 result = self.compiler.compile(candidate)
                 if "error" in result:
                     errors.append({
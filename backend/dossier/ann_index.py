@@ -0,0 +1,227 @@
+"""Approximate nearest-neighbour index for large memory stores."""
+
+from __future__ import annotations
+
+import os
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .vector_index import Query, Vector, VectorIndex, top_k_indices
+
+
+class IVFIndex(VectorIndex):
+    """Inverted-file (IVF-flat) cosine index.
+
+    Vectors are stored exactly, as in :class:`VectorIndex`, and additionally
+    partitioned into ``nlist`` clusters found by spherical k-means. A query
+    scores the centroids, visits the ``nprobe`` closest clusters and ranks
+    only their members exactly. Raising ``nprobe`` trades latency for recall;
+    ``nprobe == nlist`` is an exact search.
+
+    Until ``train_size`` vectors have been added the index answers queries
+    exhaustively; it then trains itself, and later inserts are assigned to
+    their nearest centroid incrementally. Call :meth:`train` to retrain, for
+    example after the data distribution has drifted. Cluster assignment during
+    training runs on ``workers`` threads (NumPy releases the GIL in the matrix
+    products).
+
+    Parameters
+    ----------
+    nlist:
+        Number of clusters. Defaults to ``100``.
+    nprobe:
+        Clusters visited per query. Defaults to ``8``.
+    train_size:
+        Vectors required before automatic training; defaults to
+        ``40 * nlist``. Training uses at most this many sampled vectors.
+    kmeans_iterations:
+        Lloyd iterations during training. Defaults to ``10``.
+    workers:
+        Threads used for assignment. Defaults to ``os.cpu_count()``.
+    seed:
+        Seed for centroid initialisation and sampling.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        embed: Optional[Callable[[str], Vector]] = None,
+        nlist: int = 100,
+        nprobe: int = 8,
+        train_size: Optional[int] = None,
+        kmeans_iterations: int = 10,
+        workers: Optional[int] = None,
+        seed: int = 0,
+        initial_capacity: int = 64,
+        dtype: str = "float32",
+        rerank_factor: int = 4,
+        spill: bool = True,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        super().__init__(
+            dim=dim,
+            embed=embed,
+            initial_capacity=initial_capacity,
+            dtype=dtype,
+            rerank_factor=rerank_factor,
+            spill=spill,
+            spill_dir=spill_dir,
+        )
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size or 40 * nlist
+        self.kmeans_iterations = kmeans_iterations
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[array] = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Return the nearest centroid of each row, computed in parallel blocks."""
+
+        block = max(1024, -(-len(vectors) // self.workers))
+        if len(vectors) <= block or self.workers == 1:
+            return np.argmax(vectors @ centroids.T, axis=1)
+        starts = range(0, len(vectors), block)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            parts = pool.map(
+                lambda start: np.argmax(vectors[start : start + block] @ centroids.T, axis=1),
+                starts,
+            )
+            return np.concatenate(list(parts))
+
+    def train(self) -> None:
+        """Cluster the stored vectors and rebuild the inverted lists."""
+
+        vectors = self.vectors
+        count = len(vectors)
+        if count == 0:
+            return
+        rng = np.random.default_rng(self.seed)
+        nlist = min(self.nlist, count)
+        sample = vectors
+        if count > self.train_size:
+            sample = vectors[rng.choice(count, self.train_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            labels = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Re-seed empty clusters with random sample points.
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        self._centroids = centroids.astype(np.float32)
+        labels = self._assign(vectors, self._centroids)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+        self._lists = [
+            array("q", order[bounds[i] : bounds[i + 1]].tolist()) for i in range(nlist)
+        ]
+
+    def add(self, item: Any) -> None:
+        super().add(item)
+        self._after_append(len(self._items) - 1)
+
+    def add_many(self, items: Sequence[Any]) -> None:
+        start = len(self._items)
+        super().add_many(items)
+        self._after_append(start)
+
+    def _after_append(self, start: int) -> None:
+        """Assign rows from ``start`` onwards, training first if due."""
+
+        if self._centroids is None:
+            if len(self._items) >= self.train_size:
+                self.train()
+            return
+        labels = self._assign(self.rows(start, len(self._items)), self._centroids)
+        for row, label in enumerate(labels.tolist(), start=start):
+            self._lists[label].append(row)
+
+    def compacted(self) -> "IVFIndex":
+        """Copy without tombstoned rows; centroids are kept, lists renumbered."""
+
+        index = super().compacted()
+        if self._centroids is not None:
+            remap = np.full(len(self._items), -1, dtype=np.int64)
+            live = [row for row in range(len(self._items)) if row not in self._deleted]
+            remap[live] = np.arange(len(live))
+            index._lists = []
+            for members in self._lists:
+                rows = remap[np.frombuffer(members, dtype=np.int64)]
+                index._lists.append(array("q", rows[rows >= 0].tolist()))
+        else:
+            index._lists = []
+        return index
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Row ids in the ``nprobe`` clusters closest to ``query``."""
+
+        if self._centroids is None:
+            return None
+        probes = top_k_indices(self._centroids @ query, nprobe)
+        lists = [np.frombuffer(self._lists[i], dtype=np.int64) for i in probes]
+        return np.concatenate(lists) if lists else np.empty(0, dtype=np.int64)
+
+    def search_scored(
+        self,
+        query: Query,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        rows: Optional[Sequence[int]] = None,
+    ) -> List[Tuple[Any, float]]:
+        """Score the probed clusters, restricted to ``rows`` if given.
+
+        A ``rows`` filter smaller than the probed candidates is scanned
+        exactly instead, so selective filters never lose recall.
+        """
+
+        if not self._items:
+            return []
+        vector = self._as_vector(query)
+        candidates = self._candidates(vector, nprobe or self.nprobe)
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.intp)
+            if candidates is None or len(rows) <= len(candidates):
+                candidates = rows
+            else:
+                candidates = np.intersect1d(candidates, rows)
+        if candidates is None:
+            return super().search_scored(vector, top_k)
+        scores = self._approx_scores(vector, candidates)
+        ranked = self._rank(vector, top_k, scores, candidates)
+        return [(self._items[row], score) for row, score in ranked]
+
+    def search(
+        self,
+        query: Query,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        rows: Optional[Sequence[int]] = None,
+    ) -> List[Any]:
+        return [item for item, _ in self.search_scored(query, top_k, nprobe, rows)]
+
+    def search_many(
+        self,
+        queries: Sequence[Query],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        rows: Optional[Sequence[int]] = None,
+    ) -> List[List[Any]]:
+        if self._centroids is None:
+            return super().search_many(queries, top_k, rows)
+        return [
+            self.search(query, top_k, nprobe, rows) for query in self._query_matrix(queries)
+        ]
@@ -0,0 +1,215 @@
+"""Serialization codecs for stored character dossiers.
+
+A codec turns a JSON-compatible value into ``bytes`` and back. Two are
+available:
+
+- ``json`` – compact JSON, via ``orjson`` when it is installed and the
+  standard library otherwise. Output is interchangeable between the two.
+- ``compact`` – MessagePack (or JSON when ``msgpack`` is missing)
+  compressed with zstd (or zlib when ``zstandard`` is missing). The
+  compressor is primed with a dictionary built from the dossier schema, so
+  the key names every dossier repeats cost almost nothing even in a
+  single small frame.
+
+Every ``compact`` frame starts with a 1-byte header (serializer and
+compressor) and a 4-byte id of the dictionary, so it decodes correctly
+wherever the same optional packages and schema are available, and fails
+loudly otherwise.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+try:  # Optional: faster JSON.
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:  # Optional: smaller, faster binary serializer.
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+try:  # Optional: better ratio and speed than zlib.
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / "character_dossier_expanded_method_i.json"
+
+# ``compact`` frame header: serializer in the high nibble, compressor low.
+_SERIALIZERS = ("json", "msgpack")
+_COMPRESSORS = ("zlib", "zstd")
+_HEADER_SIZE = 5
+
+
+class Codec:
+    """Encodes JSON-compatible values as ``bytes``."""
+
+    name = ""
+    media_type = "application/octet-stream"
+
+    def encode(self, value: Any) -> bytes:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:  # pragma: no cover - interface
+        raise NotImplementedError
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+_DUMPS: Dict[str, Callable[[Any], bytes]] = {"json": _json_dumps, "msgpack": _msgpack_dumps}
+_LOADS: Dict[str, Callable[[bytes], Any]] = {"json": _json_loads, "msgpack": _msgpack_loads}
+
+
+class JSONCodec(Codec):
+    """Compact JSON, using ``orjson`` when available."""
+
+    name = "json"
+    media_type = "application/json"
+
+    def encode(self, value: Any) -> bytes:
+        return _json_dumps(value)
+
+    def decode(self, data: bytes) -> Any:
+        return _json_loads(data)
+
+
+def _skeleton(schema: Dict[str, Any]) -> Any:
+    """Return an empty instance of ``schema`` containing all its keys."""
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: _skeleton(sub) for key, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_skeleton(schema.get("items", {}))]
+    return ""
+
+
+@lru_cache(maxsize=None)
+def schema_dictionary(serializer: str, schema_path: str = str(SCHEMA_PATH)) -> bytes:
+    """Return the compression dictionary for ``serializer``.
+
+    The dictionary is an empty dossier with every key of the schema,
+    encoded by the same serializer as the frames, so its byte strings match
+    the ones frames repeat.
+    """
+
+    schema = json.loads(Path(schema_path).read_text())
+    return _DUMPS[serializer](_skeleton(schema))
+
+
+def _dictionary_id(dictionary: bytes) -> bytes:
+    return hashlib.blake2b(dictionary, digest_size=4).digest()
+
+
+class CompactCodec(Codec):
+    """MessagePack or JSON, compressed with a schema-keyed dictionary.
+
+    Parameters
+    ----------
+    level:
+        Compression level. Defaults to ``3`` for zstd and ``6`` for zlib.
+    serializer, compressor:
+        Force ``"json"``/``"msgpack"`` and ``"zlib"``/``"zstd"``. By default
+        the best installed option is used.
+    schema_path:
+        JSON schema the dictionary is built from.
+    """
+
+    name = "compact"
+
+    def __init__(
+        self,
+        level: Optional[int] = None,
+        serializer: Optional[str] = None,
+        compressor: Optional[str] = None,
+        schema_path: Path = SCHEMA_PATH,
+    ) -> None:
+        self.serializer = serializer or ("msgpack" if msgpack is not None else "json")
+        self.compressor = compressor or ("zstd" if zstandard is not None else "zlib")
+        self._require(self.serializer, self.compressor)
+        self.level = level if level is not None else (3 if self.compressor == "zstd" else 6)
+        self.schema_path = str(schema_path)
+        self._header = bytes(
+            [_SERIALIZERS.index(self.serializer) << 4 | _COMPRESSORS.index(self.compressor)]
+        ) + _dictionary_id(schema_dictionary(self.serializer, self.schema_path))
+
+    @staticmethod
+    def _require(serializer: str, compressor: str) -> None:
+        if serializer not in _SERIALIZERS or compressor not in _COMPRESSORS:
+            raise ValueError(f"unknown serializer or compressor: {serializer}, {compressor}")
+        if serializer == "msgpack" and msgpack is None:
+            raise ImportError("the msgpack package is required for this frame")
+        if compressor == "zstd" and zstandard is None:
+            raise ImportError("the zstandard package is required for this frame")
+
+    def encode(self, value: Any) -> bytes:
+        payload = _DUMPS[self.serializer](value)
+        dictionary = schema_dictionary(self.serializer, self.schema_path)
+        if self.compressor == "zstd":
+            compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=zstandard.ZstdCompressionDict(dictionary)
+            )
+            return self._header + compressor.compress(payload)
+        compressor = zlib.compressobj(self.level, zdict=dictionary)
+        return self._header + compressor.compress(payload) + compressor.flush()
+
+    def decode(self, data: bytes) -> Any:
+        if len(data) < _HEADER_SIZE:
+            raise ValueError("truncated compact frame")
+        kind = data[0]
+        try:
+            serializer, compressor = _SERIALIZERS[kind >> 4], _COMPRESSORS[kind & 0x0F]
+        except IndexError:
+            raise ValueError(f"unknown compact frame header {kind:#04x}") from None
+        self._require(serializer, compressor)
+        dictionary = schema_dictionary(serializer, self.schema_path)
+        if data[1:_HEADER_SIZE] != _dictionary_id(dictionary):
+            raise ValueError("frame was encoded with a different schema dictionary")
+        body = data[_HEADER_SIZE:]
+        if compressor == "zstd":
+            decompressor = zstandard.ZstdDecompressor(
+                dict_data=zstandard.ZstdCompressionDict(dictionary)
+            )
+            payload = decompressor.decompressobj().decompress(body)
+        else:
+            decompressor = zlib.decompressobj(zdict=dictionary)
+            payload = decompressor.decompress(body) + decompressor.flush()
+        return _LOADS[serializer](payload)
+
+
+CODECS: Dict[str, Callable[[], Codec]] = {"json": JSONCodec, "compact": CompactCodec}
+
+
+def get_codec(name: str) -> Codec:
+    """Return a default-configured codec by name (``json`` or ``compact``)."""
+
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise ValueError(f"unknown codec '{name}'; expected one of {sorted(CODECS)}") from None
@@ -0,0 +1,167 @@
+"""Embedding providers for dossier entries."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+# Words whose feature hashes are memoised before the memo is reset.
+_WORD_CACHE_SIZE = 100_000
+
+
+class EmbeddingProvider(ABC):
+    """Interface for turning texts into fixed-size vectors.
+
+    Subclasses implement :meth:`encode` for a batch of texts. Callers use
+    :meth:`embed_batch`, which serves repeated texts from an LRU cache keyed
+    by content hash and sends the misses to :meth:`encode` in batches of
+    ``batch_size``.
+
+    Parameters
+    ----------
+    dim:
+        Dimension of the produced vectors.
+    batch_size:
+        Maximum number of texts passed to one :meth:`encode` call.
+    cache_size:
+        Maximum number of cached vectors; ``0`` disables the cache.
+    """
+
+    def __init__(self, dim: int, batch_size: int = 256, cache_size: int = 10_000) -> None:
+        self.dim = dim
+        self.batch_size = max(1, batch_size)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Worker processes get the configuration, not the lock or the cache.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_cache"] = OrderedDict()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a ``(len(texts), dim)`` ``float32`` array of embeddings."""
+        raise NotImplementedError
+
+    @staticmethod
+    def content_key(text: str) -> bytes:
+        """Cache key for ``text``."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` using the cache where possible."""
+
+        result = np.empty((len(texts), self.dim), dtype=np.float32)
+        keys = [self.content_key(text) for text in texts]
+        missing: "OrderedDict[bytes, List[int]]" = OrderedDict()
+        with self._lock:
+            for row, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    result[row] = cached
+                else:
+                    missing.setdefault(key, []).append(row)
+
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start : start + self.batch_size]
+            vectors = self.encode([texts[rows[0]] for _, rows in batch])
+            with self._lock:
+                for (key, rows), vector in zip(batch, vectors):
+                    result[rows] = vector
+                    if self.cache_size:
+                        self._cache[key] = vector.copy()
+                        if len(self._cache) > self.cache_size:
+                            self._cache.popitem(last=False)
+        return result
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a single ``text``."""
+        return self.embed_batch([text])[0]
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Offline embeddings from hashed word and character n-gram features.
+
+    Each word and each character n-gram of the padded words is hashed with
+    CRC32 into one of ``dim`` buckets with a hash-derived sign; counts are
+    accumulated with NumPy and rows are L2-normalised. No model or network is
+    needed and vectors are stable across processes, so texts sharing
+    vocabulary or word fragments land close together.
+
+    Parameters
+    ----------
+    dim:
+        Number of hash buckets. Defaults to ``256``.
+    ngram_range:
+        Inclusive range of character n-gram sizes. Defaults to ``(3, 4)``.
+    """
+
+    def __init__(
+        self,
+        dim: int = 256,
+        ngram_range: tuple[int, int] = (3, 4),
+        batch_size: int = 256,
+        cache_size: int = 10_000,
+    ) -> None:
+        super().__init__(dim=dim, batch_size=batch_size, cache_size=cache_size)
+        self.ngram_range = ngram_range
+        # Word -> feature hashes; vocabularies repeat far more than texts do.
+        self._hash_cache: Dict[str, List[int]] = {}
+
+    def _word_features(self, word: str) -> List[str]:
+        low, high = self.ngram_range
+        features = [word]
+        padded = f"<{word}>"
+        for size in range(low, high + 1):
+            features.extend(padded[i : i + size] for i in range(len(padded) - size + 1))
+        return features
+
+    def _word_hashes(self, word: str) -> List[int]:
+        """CRC32 of every feature of ``word``, memoised per word."""
+
+        hashes = self._hash_cache.get(word)
+        if hashes is None:
+            if len(self._hash_cache) >= _WORD_CACHE_SIZE:
+                self._hash_cache.clear()
+            hashes = [zlib.crc32(f.encode("utf-8")) for f in self._word_features(word)]
+            self._hash_cache[word] = hashes
+        return hashes
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        counts: List[int] = []
+        hashes: List[int] = []
+        for text in texts:
+            before = len(hashes)
+            for word in _WORD.findall(text.lower()):
+                hashes.extend(self._word_hashes(word))
+            counts.append(len(hashes) - before)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if hashes:
+            hashed = np.asarray(hashes, dtype=np.uint32)
+            rows = np.repeat(np.arange(len(texts), dtype=np.intp), counts)
+            cells = rows * self.dim + (hashed % self.dim)
+            signs = np.where(hashed & 0x80000000, -1.0, 1.0)
+            # bincount sums duplicate cells far faster than np.add.at.
+            sums = np.bincount(cells, weights=signs, minlength=matrix.size)
+            matrix = sums.reshape(matrix.shape).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
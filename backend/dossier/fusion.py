@@ -0,0 +1,55 @@
+"""Rank fusion for combining lexical and vector retrieval results."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .indexes import entry_key
+
+# Rank offset from Cormack et al.; damps the weight of the very top ranks.
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Any]],
+    top_k: Optional[int] = None,
+    k: int = RRF_K,
+    key: Callable[[Any], Hashable] = entry_key,
+) -> List[Tuple[Any, float]]:
+    """Fuse ranked lists with reciprocal rank fusion.
+
+    Each item scores ``sum(1 / (k + rank))`` over the lists it appears in,
+    with ranks starting at 1. Only ranks are used, so lists from scorers on
+    different scales (BM25, cosine) combine without calibration.
+
+    Parameters
+    ----------
+    rankings:
+        Ranked result lists, best first.
+    top_k:
+        Number of fused results to return; all by default.
+    k:
+        Rank offset. Defaults to ``60``.
+    key:
+        Maps an item to the identity used to merge duplicates.
+
+    Returns
+    -------
+    list of tuple
+        ``(item, fused score)`` pairs, best first. Ties keep the order in
+        which items were first seen.
+    """
+
+    scores: Dict[Hashable, float] = {}
+    items: Dict[Hashable, Any] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            item_key = key(item)
+            if item_key not in items:
+                items[item_key] = item
+                scores[item_key] = 0.0
+            scores[item_key] += 1.0 / (k + rank)
+    fused = sorted(scores.items(), key=lambda pair: -pair[1])
+    if top_k is not None:
+        fused = fused[:top_k]
+    return [(items[item_key], score) for item_key, score in fused]
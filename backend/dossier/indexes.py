@@ -1,21 +1,114 @@
+import heapq
+import math
+import re
 from abc import ABC, abstractmethod
-from typing import Any, List
+from array import array
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple
 
 
 class BaseIndex(ABC):
-    """Simple interface for index implementations."""
+    """Simple interface for index implementations.
+
+    The built-in indexes also accept ``rows``, a sequence of item positions,
+    in ``search``; only those items are considered. Filtering layers such as
+    :class:`~backend.dossier.partitioned.PartitionedIndex` use it to narrow a
+    query before any item is scored.
+
+    Items are removed with :meth:`delete`, which leaves a tombstone: the row
+    stays in place but is skipped by searches. :meth:`compacted` returns a
+    copy without the tombstoned rows.
+    """
+
+    # Replaced by a per-instance set on the first delete.
+    _deleted: Set[int] = frozenset()
+    _key_rows: Optional[Dict[Hashable, int]] = None
+
+    def __len__(self) -> int:
+        """Number of stored rows, tombstoned ones included."""
+        return len(self._items)
+
+    @property
+    def tombstones(self) -> int:
+        """Number of deleted rows still held by the index."""
+        return len(self._deleted)
+
+    def delete(self, item: Any) -> bool:
+        """Tombstone the row holding ``item``; return whether it was found.
+
+        Items are matched by :func:`entry_key`. The key-to-row map is built
+        on the first delete and extended with rows added since.
+        """
+
+        if self._key_rows is None:
+            self._key_rows = {}
+            self._key_rows_count = 0
+        for row in range(self._key_rows_count, len(self._items)):
+            if row not in self._deleted:
+                self._key_rows[entry_key(self._items[row])] = row
+        self._key_rows_count = len(self._items)
+        row = self._key_rows.pop(entry_key(item), None)
+        if row is None:
+            return False
+        self._delete_row(row)
+        return True
+
+    def _delete_row(self, row: int) -> None:
+        if not isinstance(self._deleted, set):
+            self._deleted = set()
+        self._deleted.add(row)
+
+    def live_items(self) -> List[Any]:
+        """Items that have not been deleted, in row order."""
+
+        if not self._deleted:
+            return list(self._items)
+        return [item for row, item in enumerate(self._items) if row not in self._deleted]
+
+    def compacted(self) -> "BaseIndex":
+        """Return a copy of the index without tombstoned rows."""
+        raise NotImplementedError
 
     @abstractmethod
     def add(self, item: Any) -> None:
         """Add an item to the index."""
         raise NotImplementedError
 
+    def add_many(self, items: Sequence[Any]) -> None:
+        """Add ``items`` in order; indexes override this with a batch append."""
+        for item in items:
+            self.add(item)
+
     @abstractmethod
     def search(self, query: str, top_k: int = 5) -> List[Any]:
         """Search the index for items matching the query."""
         raise NotImplementedError
 
 
+def entry_key(item: Any) -> Hashable:
+    """Identity of ``item`` across indexes.
+
+    The same entry may come back from several indexes as equal but distinct
+    objects (e.g. after loading from disk), so entries are keyed by type, id,
+    owner and content rather than by object identity. The owner is the
+    ``character_id`` metadata, else ``dossier_name`` and ``dossier_source``,
+    as in :class:`~backend.dossier.living_dossier.LivingDossier`.
+    """
+
+    if hasattr(item, "id") and hasattr(item, "content"):
+        metadata = getattr(item, "metadata", None) or {}
+        owner = metadata.get(
+            "character_id", (metadata.get("dossier_name"), metadata.get("dossier_source"))
+        )
+        return (type(item).__name__, item.id, owner, item.content)
+    return item
+
+
+def _item_text(item: Any) -> str:
+    """Return the searchable text of ``item``."""
+    return str(getattr(item, 'content', item))
+
+
 class ListIndex(BaseIndex):
     """Index that stores items in a list and performs keyword search."""
 
@@ -25,7 +118,134 @@ class ListIndex(BaseIndex):
     def add(self, item: Any) -> None:
         self._items.append(item)
 
-    def search(self, query: str, top_k: int = 5) -> List[Any]:
+    def search(
+        self, query: str, top_k: int = 5, rows: Optional[Sequence[int]] = None
+    ) -> List[Any]:
         query_lower = query.lower()
-        results = [item for item in self._items if query_lower in str(getattr(item, 'content', item)).lower()]
+        if rows is None:
+            rows = range(len(self._items))
+        deleted = self._deleted
+        items = [self._items[row] for row in rows if row not in deleted]
+        results = [item for item in items if query_lower in _item_text(item).lower()]
         return results[:top_k]
+
+    def compacted(self) -> "ListIndex":
+        index = ListIndex()
+        index._items = self.live_items()
+        return index
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split ``text`` into lower-cased word tokens."""
+    return _TOKEN.findall(text.lower())
+
+
+class InvertedIndex(BaseIndex):
+    """Token index ranking items with Okapi BM25.
+
+    Items are tokenized once on :meth:`add`. Each term keeps a postings list
+    of item ids and term frequencies in compact ``array`` buffers, so a query
+    only touches the items that share a term with it. The ``top_k`` best
+    scores are selected with a heap; ties keep insertion order. Deleted items
+    are skipped and left out of the length statistics, but still count
+    towards document frequencies until the index is compacted.
+
+    Parameters
+    ----------
+    k1:
+        Term-frequency saturation. Defaults to ``1.5``.
+    b:
+        Length normalisation strength. Defaults to ``0.75``.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._items: List[Any] = []
+        self._postings: Dict[str, Tuple[Sequence[int], Sequence[int]]] = {}
+        self._lengths: Sequence[int] = array('I')
+        self._total_length = 0
+        self._deleted_length = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: Any) -> None:
+        doc_id = len(self._items)
+        tokens = tokenize(_item_text(item))
+        if not isinstance(self._lengths, array):
+            # Indexes opened from disk hold read-only buffers until written.
+            self._lengths = array('I', self._lengths)
+        self._items.append(item)
+        self._lengths.append(len(tokens))
+        self._total_length += len(tokens)
+        for term, freq in Counter(tokens).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array('I'), array('I'))
+            elif not isinstance(postings[0], array):
+                postings = self._postings[term] = (
+                    array('I', postings[0]),
+                    array('I', postings[1]),
+                )
+            postings[0].append(doc_id)
+            postings[1].append(freq)
+
+    def _delete_row(self, row: int) -> None:
+        super()._delete_row(row)
+        self._deleted_length += int(self._lengths[row])
+
+    def compacted(self) -> "InvertedIndex":
+        index = InvertedIndex(k1=self.k1, b=self.b)
+        for item in self.live_items():
+            index.add(item)
+        return index
+
+    def scores(
+        self, query: str, rows: Optional[Sequence[int]] = None
+    ) -> Dict[int, float]:
+        """Return BM25 scores of all items sharing a term with ``query``.
+
+        With ``rows`` only those items are scored; corpus statistics still
+        cover the whole index.
+        """
+
+        deleted = self._deleted
+        count = len(self._items) - len(deleted)
+        if count <= 0:
+            return {}
+        allowed = None if rows is None else set(rows)
+        avg_length = (self._total_length - self._deleted_length) / count or 1.0
+        k1, b = self.k1, self.b
+        lengths = self._lengths
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            doc_ids, freqs = postings
+            df = len(doc_ids)
+            idf = math.log(1.0 + (count - df + 0.5) / (df + 0.5))
+            for doc_id, freq in zip(doc_ids.tolist(), freqs.tolist()):
+                if (allowed is not None and doc_id not in allowed) or doc_id in deleted:
+                    continue
+                norm = k1 * (1.0 - b + b * lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (k1 + 1.0) / (freq + norm)
+        return scores
+
+    def search_scored(
+        self, query: str, top_k: int = 5, rows: Optional[Sequence[int]] = None
+    ) -> List[Tuple[Any, float]]:
+        """Return ``(item, BM25 score)`` pairs for the ``top_k`` best items."""
+
+        scores = self.scores(query, rows)
+        best = heapq.nsmallest(top_k, scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [(self._items[doc_id], score) for doc_id, score in best]
+
+    def search(
+        self, query: str, top_k: int = 5, rows: Optional[Sequence[int]] = None
+    ) -> List[Any]:
+        return [item for item, _ in self.search_scored(query, top_k, rows)]
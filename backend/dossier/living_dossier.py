@@ -1,29 +1,176 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Dict, List
+from itertools import repeat
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union
 
-from .indexes import ListIndex
+from .embeddings import EmbeddingProvider
+from .fusion import RRF_K, reciprocal_rank_fusion
+from .indexes import BaseIndex, ListIndex
 from .models import LinguisticProfileEntry, PsychProfileEntry
+from .partitioned import PARTITION_KEY, PartitionedIndex, matching_rows
+from .vector_index import VectorIndex
+
+# Searchable entry types and the index holding each.
+ENTRY_INDEXES = {
+    "psych_profile": "psych_profile_index",
+    "linguistic_profile": "linguistic_profile_index",
+}
+# Optional vector companions of the profile indexes, used by hybrid search.
+VECTOR_INDEXES = {
+    "psych_profile": "psych_vector_index",
+    "linguistic_profile": "linguistic_vector_index",
+}
+# Candidates each index contributes to a hybrid search before fusion.
+HYBRID_DEPTH = 50
+# Metadata naming the stored dossier, and the work it comes from, when no
+# ``character_id`` is given.
+DOSSIER_KEY = "dossier_name"
+DOSSIER_SOURCE_KEY = "dossier_source"
+
+
+def _entry_hash(entry: Any) -> str:
+    """Hash of an entry's content and metadata; embeddings are derived data."""
+
+    payload = json.dumps([entry.content, entry.metadata], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _owner(entry: Any) -> Optional[Hashable]:
+    """Upsert owner of ``entry``: its character id, else ``(name, source)``."""
+
+    metadata = entry.metadata or {}
+    if PARTITION_KEY in metadata:
+        return metadata[PARTITION_KEY]
+    if DOSSIER_KEY in metadata:
+        return (metadata[DOSSIER_KEY], metadata.get(DOSSIER_SOURCE_KEY))
+    return None
+
+
+def _is_vector_index(index: BaseIndex) -> bool:
+    """Whether ``index`` ranks by embedding and so takes vector queries."""
+
+    if isinstance(index, PartitionedIndex):
+        factory = index.index_factory
+        return any(isinstance(part, VectorIndex) for part in index.partitions.values()) or (
+            isinstance(factory, type) and issubclass(factory, VectorIndex)
+        )
+    return isinstance(index, VectorIndex)
+
+
+def _release_embeddings(entries: Sequence[Any], indexes: Sequence[BaseIndex]) -> None:
+    """Drop the ``embedding`` lists of ``entries`` once a vector index holds them.
+
+    Vector indexes keep their own copy of each row, so a list of boxed
+    floats per entry would only add several times the matrix's memory.
+    """
+
+    if any(_is_vector_index(index) for index in indexes):
+        for entry in entries:
+            entry.embedding = None
 
 
 @dataclass
 class LivingDossier:
-    """Container for various dossier indices."""
+    """Container for various dossier indices.
+
+    Any :class:`BaseIndex` may be supplied for either index, e.g.
+    ``LivingDossier(psych_profile_index=InvertedIndex())`` for BM25 ranking.
+    When ``embedding_provider`` is set, stored entries are embedded before
+    they are indexed. A :class:`PartitionedIndex` keeps each character's
+    entries in a separate sub-index for multi-character deployments.
+
+    ``psych_vector_index`` and ``linguistic_vector_index`` optionally index
+    the same entries by embedding next to a lexical profile index, for
+    :meth:`hybrid_search`.
 
-    psych_profile_index: ListIndex = field(default_factory=ListIndex)
-    linguistic_profile_index: ListIndex = field(default_factory=ListIndex)
+    :meth:`store_dossier` upserts: entries are identified by their owner
+    (``character_id``, else the dossier's ``name`` and ``source_material``),
+    type and id, and only entries whose content hash changed are re-embedded
+    and re-indexed.
+    Replaced and deleted entries are tombstoned in the indexes. Once
+    tombstones exceed ``compaction_threshold`` of the stored rows, the
+    indexes are compacted on a background thread and swapped in; searches
+    keep using the old indexes until then. Set the threshold to ``None`` to
+    compact only via :meth:`compact`.
+    """
+
+    psych_profile_index: BaseIndex = field(default_factory=ListIndex)
+    linguistic_profile_index: BaseIndex = field(default_factory=ListIndex)
+    embedding_provider: Optional[EmbeddingProvider] = None
+    psych_vector_index: Optional[BaseIndex] = None
+    linguistic_vector_index: Optional[BaseIndex] = None
+    compaction_threshold: Optional[float] = 0.25
+    # owner -> (entry type, entry id) -> (content hash, entry); built lazily.
+    _entries: Optional[Dict[Any, Dict[Tuple[str, str], Tuple[str, Any]]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _lock: threading.RLock = field(
+        default_factory=threading.RLock, init=False, repr=False, compare=False
+    )
+    _compaction_thread: Optional[threading.Thread] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def add_psych_profile(self, item: Any) -> None:
-        self.psych_profile_index.add(item)
+        with self._lock:
+            indexes = [self.psych_profile_index]
+            if self.psych_vector_index is not None:
+                indexes.append(self.psych_vector_index)
+            for index in indexes:
+                index.add(item)
+            _release_embeddings([item], indexes)
 
     def add_linguistic_profile(self, item: Any) -> None:
-        self.linguistic_profile_index.add(item)
+        with self._lock:
+            indexes = [self.linguistic_profile_index]
+            if self.linguistic_vector_index is not None:
+                indexes.append(self.linguistic_vector_index)
+            for index in indexes:
+                index.add(item)
+            _release_embeddings([item], indexes)
+
+    def _indexes_for(self, entry: Any) -> List[BaseIndex]:
+        if isinstance(entry, LinguisticProfileEntry):
+            names = ("linguistic_profile_index", "linguistic_vector_index")
+        else:
+            names = ("psych_profile_index", "psych_vector_index")
+        return [getattr(self, name) for name in names if getattr(self, name) is not None]
+
+    def _all_indexes(self) -> List[Tuple[str, BaseIndex]]:
+        names = list(ENTRY_INDEXES.values()) + list(VECTOR_INDEXES.values())
+        return [(name, getattr(self, name)) for name in names if getattr(self, name) is not None]
+
+    def _registry(self) -> Dict[Any, Dict[Tuple[str, str], Tuple[str, Any]]]:
+        """Stored entries by owner, rebuilt from the indexes on first use."""
+
+        if self._entries is None:
+            entries: Dict[Any, Dict[Tuple[str, str], Tuple[str, Any]]] = {}
+            for index in (self.psych_profile_index, self.linguistic_profile_index):
+                for entry in index.live_items():
+                    owner = _owner(entry) if hasattr(entry, "metadata") else None
+                    # Entries without an owner were appended, not upserted.
+                    if owner is not None and hasattr(entry, "id"):
+                        entries.setdefault(owner, {})[
+                            (type(entry).__name__, entry.id)
+                        ] = (_entry_hash(entry), entry)
+            self._entries = entries
+        return self._entries
+
+    def _remove(self, entry: Any) -> None:
+        for index in self._indexes_for(entry):
+            index.delete(entry)
 
     def parse_psych_profile(self, dossier: Dict[str, Any]) -> List[PsychProfileEntry]:
         """Extract ``PsychProfileEntry`` objects from ``dossier``.
 
         The method looks for an ``inner_world`` section and converts its
         textual fields and memory journal entries into ``PsychProfileEntry``
-        instances.
+        instances. Entries are tagged with ``kind`` metadata, either
+        ``memory_journal`` or ``trait``; journal ``tags`` are kept as well.
         """
 
         entries: List[PsychProfileEntry] = []
@@ -35,15 +182,23 @@ class LivingDossier:
                     parts = [
                         f"{sub_key.replace('_', ' ').title()}: {sub_val}"
                         for sub_key, sub_val in item.items()
+                        if sub_key != "tags"
                     ]
                     content = "; ".join(parts)
+                    metadata: Dict[str, Any] = {"kind": "memory_journal"}
+                    if isinstance(item.get("tags"), list):
+                        metadata["tags"] = list(item["tags"])
                     entries.append(
                         PsychProfileEntry(
-                            id=f"memory_journal_{idx}", content=content
+                            id=f"memory_journal_{idx}",
+                            content=content,
+                            metadata=metadata,
                         )
                     )
             elif isinstance(value, str):
-                entries.append(PsychProfileEntry(id=key, content=value))
+                entries.append(
+                    PsychProfileEntry(id=key, content=value, metadata={"kind": "trait"})
+                )
 
         return entries
 
@@ -62,14 +217,404 @@ class LivingDossier:
 
         for key, value in profile.items():
             if isinstance(value, str):
-                entries.append(LinguisticProfileEntry(id=key, content=value))
+                entries.append(
+                    LinguisticProfileEntry(id=key, content=value, metadata={"kind": "trait"})
+                )
 
         return entries
 
-    def store_dossier(self, dossier: Dict[str, Any]) -> None:
-        """Store ``dossier`` and update profile indexes."""
+    def embed_entries(self, entries: List[Any]) -> None:
+        """Fill in missing ``embedding`` values with one batched provider call."""
+
+        if self.embedding_provider is None:
+            return
+        pending = [entry for entry in entries if entry.embedding is None]
+        if not pending:
+            return
+        vectors = self.embedding_provider.embed_batch([e.content for e in pending])
+        for entry, vector in zip(pending, vectors):
+            entry.embedding = vector.tolist()
+
+    def _prepare(
+        self, dossier: Dict[str, Any], character_id: Optional[str] = None
+    ) -> Tuple[Optional[Hashable], List[Any]]:
+        """Parse ``dossier`` into owner-tagged entries.
+
+        The owner is ``character_id``, else the dossier's name together with
+        its ``source_material``, so namesakes from different works stay
+        apart. A dossier without either has no owner.
+        """
+
+        entries: List[Any] = self.parse_psych_profile(dossier)
+        entries += self.parse_linguistic_profile(dossier)
+        if character_id is not None:
+            owner: Optional[Hashable] = character_id
+            tags: Dict[str, Any] = {PARTITION_KEY: character_id}
+        elif dossier.get("name"):
+            source = dossier.get("source_material") or None
+            owner = (dossier["name"], source)
+            tags = {DOSSIER_KEY: dossier["name"]}
+            if source is not None:
+                tags[DOSSIER_SOURCE_KEY] = source
+        else:
+            return None, entries
+        for entry in entries:
+            entry.metadata = {**(entry.metadata or {}), **tags}
+        return owner, entries
+
+    def _upsert(self, owner: Optional[Hashable], entries: List[Any]) -> List[Any]:
+        """Reconcile ``owner``'s stored entries with ``entries``.
+
+        Tombstones replaced and vanished entries and returns the new or
+        changed entries, which the caller must index. Entries without an
+        owner cannot be matched to earlier versions, so they are all
+        returned for appending. Call with the lock held.
+        """
+
+        if owner is None:
+            return list(entries)
+        stored = self._registry().setdefault(owner, {})
+        seen = set()
+        changed = []
+        for entry in entries:
+            entry_id = (type(entry).__name__, entry.id)
+            seen.add(entry_id)
+            digest = _entry_hash(entry)
+            previous = stored.get(entry_id)
+            if previous is not None:
+                if previous[0] == digest:
+                    continue
+                self._remove(previous[1])
+            stored[entry_id] = (digest, entry)
+            changed.append(entry)
+        for entry_id in [entry_id for entry_id in stored if entry_id not in seen]:
+            self._remove(stored.pop(entry_id)[1])
+        return changed
+
+    def _append(self, entries: List[Any]) -> None:
+        """Batch-append embedded ``entries`` to their indexes.
+
+        Embeddings are dropped from the entries once a vector index holds
+        them.
+        """
+
+        psych = [e for e in entries if not isinstance(e, LinguisticProfileEntry)]
+        linguistic = [e for e in entries if isinstance(e, LinguisticProfileEntry)]
+        with self._lock:
+            for group, names in (
+                (psych, ("psych_profile_index", "psych_vector_index")),
+                (linguistic, ("linguistic_profile_index", "linguistic_vector_index")),
+            ):
+                if not group:
+                    continue
+                indexes = [getattr(self, name) for name in names if getattr(self, name) is not None]
+                for index in indexes:
+                    index.add_many(group)
+                _release_embeddings(group, indexes)
+
+    def store_dossier(
+        self, dossier: Dict[str, Any], character_id: Optional[str] = None
+    ) -> int:
+        """Store ``dossier`` and update profile indexes.
+
+        With ``character_id`` every entry is tagged with it, which routes the
+        entries to that character's partition of a :class:`PartitionedIndex`.
+        Storing a dossier again replaces its previous version: unchanged
+        entries are left alone, changed ones are re-indexed and entries that
+        disappeared are deleted. Returns the number of entries indexed.
+        """
+
+        owner, entries = self._prepare(dossier, character_id)
+        with self._lock:
+            changed = self._upsert(owner, entries)
+            self.embed_entries(changed)
+            self._append(changed)
+        self._maybe_compact()
+        return len(changed)
+
+    def store_dossiers(
+        self,
+        dossiers: Sequence[Dict[str, Any]],
+        character_ids: Optional[Sequence[Optional[str]]] = None,
+        workers: Optional[int] = None,
+        chunk_size: int = 64,
+    ) -> int:
+        """Bulk-ingest ``dossiers``, e.g. to backfill a library.
+
+        Dossiers are parsed and embedded in ``chunk_size`` groups by
+        ``workers`` processes (one batched provider call per group). The
+        results are then upserted as by :meth:`store_dossier` and appended
+        to each index in a single ``add_many`` call.
+
+        Parameters
+        ----------
+        dossiers:
+            Compiled dossiers.
+        character_ids:
+            Optional character id per dossier.
+        workers:
+            Worker processes; defaults to ``os.cpu_count()``. ``1`` runs
+            inline.
+        chunk_size:
+            Dossiers per worker task.
+
+        Returns
+        -------
+        int
+            Number of entries indexed.
+        """
+
+        if character_ids is None:
+            character_ids = [None] * len(dossiers)
+        elif len(character_ids) != len(dossiers):
+            raise ValueError("character_ids must match dossiers")
+        jobs = list(zip(dossiers, character_ids))
+        chunks = [jobs[i : i + chunk_size] for i in range(0, len(jobs), max(1, chunk_size))]
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(chunks) <= 1:
+            prepared = map(_prepare_chunk, repeat(self.embedding_provider), chunks)
+            results = [pair for chunk in prepared for pair in chunk]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                prepared = executor.map(_prepare_chunk, repeat(self.embedding_provider), chunks)
+                results = [pair for chunk in prepared for pair in chunk]
+
+        # A later dossier for the same owner supersedes earlier ones, as it
+        # would when stored one at a time. Dossiers without an owner are all
+        # kept.
+        last = {owner: position for position, (owner, _) in enumerate(results)}
+        with self._lock:
+            changed = []
+            for position, (owner, entries) in enumerate(results):
+                if owner is None or last[owner] == position:
+                    changed.extend(self._upsert(owner, entries))
+            self.embed_entries(changed)
+            self._append(changed)
+        self._maybe_compact()
+        return len(changed)
+
+    def delete_dossier(self, owner: Hashable, source_material: Optional[str] = None) -> int:
+        """Delete every entry stored for ``owner``.
+
+        ``owner`` is a character id, or the name of a dossier stored without
+        one; ``source_material`` then picks the work it came from. Returns
+        the number of entries removed.
+        """
+
+        with self._lock:
+            registry = self._registry()
+            stored = registry.pop(owner, None)
+            if stored is None:
+                stored = registry.pop((owner, source_material or None), {})
+            for _, entry in stored.values():
+                self._remove(entry)
+        self._maybe_compact()
+        return len(stored)
+
+    def _maybe_compact(self) -> None:
+        if self.compaction_threshold is None:
+            return
+        indexes = [index for _, index in self._all_indexes()]
+        tombstones = sum(index.tombstones for index in indexes)
+        rows = sum(len(index) for index in indexes)
+        if tombstones and tombstones > self.compaction_threshold * rows:
+            self.compact(background=True)
+
+    def compact(self, background: bool = False) -> None:
+        """Replace indexes holding tombstones with compacted copies.
+
+        With ``background`` the work runs on a daemon thread (at most one at a
+        time); see :meth:`wait_for_compaction`.
+        """
+
+        if not background:
+            self._compact()
+            return
+        with self._lock:
+            thread = self._compaction_thread
+            if thread is not None and thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self._compact, daemon=True)
+            self._compaction_thread.start()
+
+    def _compact(self) -> None:
+        # Writers wait on the lock; readers keep the old index until the swap.
+        with self._lock:
+            for name, index in self._all_indexes():
+                if index.tombstones:
+                    setattr(self, name, index.compacted())
+
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> bool:
+        """Block until a background compaction finishes.
+
+        Returns ``True`` when no compaction is running anymore.
+        """
+
+        thread = self._compaction_thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def search(
+        self,
+        query: Any,
+        top_k: int = 5,
+        entry_type: str = "psych_profile",
+        character_id: Optional[str] = None,
+        kind: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+    ) -> List[Any]:
+        """Search one profile index with optional character and metadata filters.
+
+        Parameters
+        ----------
+        query:
+            Query passed to the index (text, or a vector for vector indexes).
+        top_k:
+            Maximum number of results.
+        entry_type:
+            ``psych_profile`` or ``linguistic_profile``.
+        character_id:
+            Restrict results to one character.
+        kind:
+            ``memory_journal`` or ``trait``.
+        tags:
+            Keep entries carrying any of these tags.
+
+        Filters are resolved before the index scores anything; see
+        :meth:`_search_index`.
+        """
+
+        if entry_type not in ENTRY_INDEXES:
+            raise ValueError(f"unknown entry type: {entry_type}")
+        index = getattr(self, ENTRY_INDEXES[entry_type])
+        return self._search_index(index, [query], top_k, character_id, _where(kind, tags))[0]
+
+    def hybrid_search(
+        self,
+        queries: Union[str, Sequence[str]],
+        top_k: int = 5,
+        character_id: Optional[str] = None,
+        kind: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        entry_types: Sequence[str] = tuple(ENTRY_INDEXES),
+        depth: int = HYBRID_DEPTH,
+        rrf_k: int = RRF_K,
+    ) -> Union[List[Any], List[List[Any]]]:
+        """Search lexical and vector indexes together and fuse the results.
+
+        Every profile index of the requested ``entry_types`` and its vector
+        companion, if set, contributes its ``depth`` best matches. Lexical
+        indexes receive the query text; vector indexes receive the query
+        embeddings, computed for the whole batch in one provider call. The
+        ranked lists are merged with reciprocal rank fusion.
+
+        Parameters
+        ----------
+        queries:
+            One query, or a batch of queries answered in a single call.
+        top_k:
+            Fused results returned per query.
+        character_id, kind, tags:
+            Filters, as in :meth:`search`.
+        entry_types:
+            Profiles to search; both by default.
+        depth:
+            Candidates taken from each index before fusion.
+        rrf_k:
+            Reciprocal rank fusion offset.
+
+        Returns
+        -------
+        list
+            The fused top-``top_k`` entries for a single query, or one such
+            list per query for a batch.
+        """
+
+        single = isinstance(queries, str)
+        texts = [queries] if single else list(queries)
+        if not texts:
+            return []
+        where = _where(kind, tags)
+        depth = max(depth, top_k)
+        vectors: Optional[Sequence[Any]] = None
+        rankings: List[List[List[Any]]] = [[] for _ in texts]
+        for entry_type in entry_types:
+            if entry_type not in ENTRY_INDEXES:
+                raise ValueError(f"unknown entry type: {entry_type}")
+            for name in (ENTRY_INDEXES[entry_type], VECTOR_INDEXES[entry_type]):
+                index = getattr(self, name)
+                if index is None:
+                    continue
+                batch: Sequence[Any] = texts
+                if _is_vector_index(index):
+                    if vectors is None:
+                        vectors = (
+                            self.embedding_provider.embed_batch(texts)
+                            if self.embedding_provider is not None
+                            else texts
+                        )
+                    batch = vectors
+                results = self._search_index(index, batch, depth, character_id, where)
+                for ranking, result in zip(rankings, results):
+                    ranking.append(result)
+        fused = [
+            [item for item, _ in reciprocal_rank_fusion(ranking, top_k, rrf_k)]
+            for ranking in rankings
+        ]
+        return fused[0] if single else fused
+
+    @staticmethod
+    def _search_index(
+        index: BaseIndex,
+        queries: Sequence[Any],
+        top_k: int,
+        character_id: Optional[str],
+        where: Dict[str, Any],
+    ) -> List[List[Any]]:
+        """Run ``queries`` against ``index`` with filters resolved first.
+
+        With a :class:`PartitionedIndex` only ``character_id``'s partition is
+        read; other indexes are narrowed with a scan of their entries'
+        metadata. Batches use the index's ``search_many`` when it has one.
+        """
+
+        if isinstance(index, PartitionedIndex):
+            if len(queries) == 1:
+                return [index.search(queries[0], top_k, character_id, where)]
+            return index.search_many(queries, top_k, character_id, where)
+        if character_id is not None:
+            where = {**where, PARTITION_KEY: character_id}
+        options: Dict[str, Any] = {}
+        if where:
+            rows = matching_rows(index._items, where)
+            if not rows:
+                return [[] for _ in range(len(queries))]
+            options["rows"] = rows
+        if len(queries) > 1 and hasattr(index, "search_many"):
+            return index.search_many(queries, top_k, **options)
+        return [index.search(query, top_k, **options) for query in queries]
+
+
+def _prepare_chunk(
+    provider: Optional[EmbeddingProvider],
+    jobs: Sequence[Tuple[Dict[str, Any], Optional[str]]],
+) -> List[Tuple[Optional[Hashable], List[Any]]]:
+    """Parse and embed a group of dossiers; runs in a worker process."""
+
+    parser = LivingDossier(embedding_provider=provider)
+    prepared = [parser._prepare(dossier, character_id) for dossier, character_id in jobs]
+    parser.embed_entries([entry for _, entries in prepared for entry in entries])
+    return prepared
+
+
+def _where(kind: Optional[str], tags: Optional[List[str]]) -> Dict[str, Any]:
+    """Metadata filter for the ``kind`` and ``tags`` search options."""
 
-        for entry in self.parse_psych_profile(dossier):
-            self.add_psych_profile(entry)
-        for entry in self.parse_linguistic_profile(dossier):
-            self.add_linguistic_profile(entry)
+    where: Dict[str, Any] = {}
+    if kind is not None:
+        where["kind"] = kind
+    if tags:
+        where["tags"] = list(tags)
+    return where
@@ -1,5 +1,7 @@
+import re
+import threading
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 from uuid import uuid4
 
 
@@ -41,11 +43,89 @@ class Character:
     dossier: Dict[str, Any]
 
 
+# Dossier fields with a secondary index, queried by exact (normalized) value.
+# ``parent_cid`` links a remixed character to the one it derives from.
+KEY_FIELDS = ("role", "source_material", "parent_cid")
+# Index field holding the tokens of a character's name.
+NAME_TOKEN = "name_token"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_key(value: Any) -> str:
+    """Normalize an indexed value: case-folded with whitespace collapsed."""
+
+    return " ".join(str(value).casefold().split())
+
+
+def name_tokens(name: Any) -> Set[str]:
+    """Return the case-folded word tokens of ``name``."""
+
+    return set(_TOKEN.findall(str(name).casefold()))
+
+
+def character_keys(dossier: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    """Return the ``(field, value)`` index keys of a dossier."""
+
+    keys = {(NAME_TOKEN, token) for token in name_tokens(dossier.get("name") or "")}
+    for key_field in KEY_FIELDS:
+        value = dossier.get(key_field)
+        if value:
+            keys.add((key_field, normalize_key(value)))
+    return keys
+
+
+def query_keys(
+    name: Optional[str] = None,
+    role: Optional[str] = None,
+    source_material: Optional[str] = None,
+    parent_cid: Optional[str] = None,
+) -> Set[Tuple[str, str]]:
+    """Return the index keys a character must have to match a query.
+
+    Every token of ``name`` must appear in the character's name; the other
+    fields must equal the character's value after normalization.
+    """
+
+    keys = {(NAME_TOKEN, token) for token in name_tokens(name or "")}
+    for key_field, value in zip(KEY_FIELDS, (role, source_material, parent_cid)):
+        if value is not None:
+            keys.add((key_field, normalize_key(value)))
+    return keys
+
+
+@dataclass
+class _CharacterState:
+    """Append-only contents of a :class:`CharacterStore`."""
+
+    characters: Dict[str, Character] = field(default_factory=dict)
+    # Published ids in insertion order; a reader's snapshot is a prefix.
+    order: List[str] = field(default_factory=list)
+    seq: Dict[str, int] = field(default_factory=dict)
+    keys: Dict[str, FrozenSet[Tuple[str, str]]] = field(default_factory=dict)
+    # (field, value) -> ids in insertion order.
+    index: Dict[Tuple[str, str], List[str]] = field(default_factory=dict)
+
+
 class CharacterStore:
-    """Simple in-memory persistence for ``Character`` instances."""
+    """Simple in-memory persistence for ``Character`` instances.
+
+    Name tokens and the fields in ``KEY_FIELDS`` are indexed on insert, so
+    :meth:`query` only visits characters matching its most selective filter.
+
+    The store is safe to share between threads. Characters are never
+    modified after insertion, so every structure is append-only: inserts
+    serialize on a writer lock and publish a character by appending its id
+    to the insertion order last. Readers take no lock; they grab the current
+    state once, read the length of its order and ignore anything appended
+    after it, which gives each call a consistent snapshot. :meth:`clear`
+    publishes a fresh state with a single assignment, so a reader sees
+    either the old contents or none, never a mix.
+    """
 
     def __init__(self) -> None:
-        self._characters: Dict[str, Character] = {}
+        self._write_lock = threading.Lock()
+        self._state = _CharacterState()
 
     def insert(self, dossier: Dict[str, Any], character_id: Optional[str] = None) -> str:
         """Persist ``dossier`` under a unique ``character_id``.
@@ -54,17 +134,66 @@ class CharacterStore:
         """
 
         cid = character_id or str(uuid4())
-        if cid in self._characters:
-            raise ValueError(f"character_id '{cid}' already exists")
-        self._characters[cid] = Character(character_id=cid, dossier=dossier)
+        with self._write_lock:
+            state = self._state
+            if cid in state.characters:
+                raise ValueError(f"character_id '{cid}' already exists")
+            keys = frozenset(character_keys(dossier))
+            state.characters[cid] = Character(character_id=cid, dossier=dossier)
+            state.seq[cid] = len(state.order)
+            state.keys[cid] = keys
+            for key in keys:
+                state.index.setdefault(key, []).append(cid)
+            state.order.append(cid)
         return cid
 
     def get(self, character_id: str) -> Optional[Character]:
         """Retrieve a stored ``Character`` by its id."""
 
-        return self._characters.get(character_id)
+        return self._state.characters.get(character_id)
 
     def all(self) -> List[Character]:
         """Return all persisted characters."""
 
-        return list(self._characters.values())
+        state = self._state
+        order = state.order[: len(state.order)]
+        return [state.characters[cid] for cid in order]
+
+    def query(
+        self,
+        name: Optional[str] = None,
+        role: Optional[str] = None,
+        source_material: Optional[str] = None,
+        parent_cid: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Character]:
+        """Return characters matching every given filter, in insertion order.
+
+        See :func:`query_keys` for how filters match. Lookups go through the
+        secondary indexes; at most ``limit`` characters are returned.
+        """
+
+        state = self._state
+        published = len(state.order)
+        keys = query_keys(name, role, source_material, parent_cid)
+        if keys:
+            postings = [state.index.get(key, []) for key in keys]
+            ids: Iterable[str] = (
+                cid
+                for cid in min(postings, key=len)[:]
+                if state.seq[cid] < published and keys <= state.keys[cid]
+            )
+        else:
+            ids = state.order[:published]
+        results: List[Character] = []
+        for cid in ids:
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(state.characters[cid])
+        return results
+
+    def clear(self) -> None:
+        """Remove every character."""
+
+        with self._write_lock:
+            self._state = _CharacterState()
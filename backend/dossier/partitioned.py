@@ -0,0 +1,256 @@
+"""Per-character partitioned indexes with metadata filtering."""
+
+from __future__ import annotations
+
+import heapq
+from array import array
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from .indexes import BaseIndex, ListIndex
+
+# Metadata key that selects an item's partition.
+PARTITION_KEY = "character_id"
+# Facet holding the entry class name, e.g. ``PsychProfileEntry``.
+ENTRY_TYPE = "entry_type"
+
+
+def _facet_values(
+    item: Any, include_partition: bool = False
+) -> Iterable[Tuple[str, Hashable]]:
+    """Yield the ``(key, value)`` facets of ``item``.
+
+    Scalar metadata values become one facet; list values (such as ``tags``)
+    become one facet per element. Unhashable values are not filterable.
+    """
+
+    yield ENTRY_TYPE, type(item).__name__
+    metadata = getattr(item, "metadata", None) or {}
+    for key, value in metadata.items():
+        if key == PARTITION_KEY and not include_partition:
+            continue
+        values = value if isinstance(value, (list, tuple, set)) else (value,)
+        for element in values:
+            try:
+                hash(element)
+            except TypeError:
+                continue
+            yield key, element
+
+
+def _wanted(value: Any) -> Tuple[Any, ...]:
+    return tuple(value) if isinstance(value, (list, tuple, set)) else (value,)
+
+
+def matching_rows(items: Sequence[Any], where: Dict[str, Any]) -> List[int]:
+    """Positions of ``items`` matching every ``where`` clause, by a full scan.
+
+    Uses the same rules as :class:`PartitionedIndex` filters, including
+    ``character_id``, for indexes without facet postings.
+    """
+
+    wanted = {key: set(_wanted(value)) for key, value in where.items()}
+    rows = []
+    for row, item in enumerate(items):
+        found: Dict[str, bool] = {}
+        for key, value in _facet_values(item, include_partition=True):
+            if key in wanted and value in wanted[key]:
+                found[key] = True
+        if len(found) == len(wanted):
+            rows.append(row)
+    return rows
+
+
+class PartitionedIndex(BaseIndex):
+    """Route items into one sub-index per ``character_id``.
+
+    Each item's partition is ``item.metadata["character_id"]`` (``None`` when
+    absent), so entries without a character id share one partition. A new
+    sub-index is created by ``index_factory`` the first time a character is
+    seen. A search for one character touches only that character's
+    sub-index.
+
+    Every partition also keeps facet postings: for each metadata value the
+    positions of the items carrying it. ``where`` filters such as
+    ``{"kind": "memory_journal", "tags": "storm"}`` are resolved against
+    these postings first, and only the surviving rows are passed to the
+    sub-index for scoring. A list-valued metadata field matches when it
+    contains the requested value; a list in ``where`` matches any of its
+    values. ``entry_type`` filters on the entry class name.
+
+    Parameters
+    ----------
+    index_factory:
+        Builds an empty sub-index. Defaults to :class:`ListIndex`.
+    """
+
+    def __init__(self, index_factory: Callable[[], BaseIndex] = ListIndex) -> None:
+        self.index_factory = index_factory
+        self._partitions: Dict[Optional[str], BaseIndex] = {}
+        self._facets: Dict[Optional[str], Dict[Tuple[str, Hashable], array]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(index._items) for index in self._partitions.values())
+
+    @property
+    def _items(self) -> List[Any]:
+        """All items, partition by partition."""
+
+        return [item for index in self._partitions.values() for item in index._items]
+
+    @property
+    def partitions(self) -> Dict[Optional[str], BaseIndex]:
+        """Sub-indexes by character id."""
+
+        return dict(self._partitions)
+
+    def partition(self, character_id: Optional[str]) -> Optional[BaseIndex]:
+        return self._partitions.get(character_id)
+
+    def attach(self, character_id: Optional[str], index: BaseIndex) -> None:
+        """Install a populated ``index`` as the partition of ``character_id``."""
+
+        self._partitions[character_id] = index
+        facets: Dict[Tuple[str, Hashable], array] = {}
+        for row, item in enumerate(index._items):
+            for facet in _facet_values(item):
+                facets.setdefault(facet, array("q")).append(row)
+        self._facets[character_id] = facets
+
+    def _partition_for(self, character_id: Optional[str]) -> BaseIndex:
+        index = self._partitions.get(character_id)
+        if index is None:
+            index = self._partitions[character_id] = self.index_factory()
+            self._facets[character_id] = {}
+        return index
+
+    def add(self, item: Any) -> None:
+        self.add_many([item])
+
+    def add_many(self, items: Sequence[Any]) -> None:
+        """Group ``items`` by character and append each group in one batch."""
+
+        groups: Dict[Optional[str], List[Any]] = {}
+        for item in items:
+            metadata = getattr(item, "metadata", None) or {}
+            groups.setdefault(metadata.get(PARTITION_KEY), []).append(item)
+        for character_id, group in groups.items():
+            index = self._partition_for(character_id)
+            start = len(index._items)
+            index.add_many(group)
+            facets = self._facets[character_id]
+            for row, item in enumerate(group, start=start):
+                for facet in _facet_values(item):
+                    facets.setdefault(facet, array("q")).append(row)
+
+    @property
+    def tombstones(self) -> int:
+        return sum(index.tombstones for index in self._partitions.values())
+
+    def delete(self, item: Any) -> bool:
+        """Tombstone ``item`` in its character's partition.
+
+        Facet postings keep the row until the partition is compacted; the
+        sub-index already skips it.
+        """
+
+        metadata = getattr(item, "metadata", None) or {}
+        index = self._partitions.get(metadata.get(PARTITION_KEY))
+        return index is not None and index.delete(item)
+
+    def live_items(self) -> List[Any]:
+        return [item for index in self._partitions.values() for item in index.live_items()]
+
+    def compacted(self) -> "PartitionedIndex":
+        """Copy with every partition compacted; emptied partitions are dropped."""
+
+        index = PartitionedIndex(self.index_factory)
+        for character_id, part in self._partitions.items():
+            if part.tombstones:
+                part = part.compacted()
+            if len(part._items):
+                index.attach(character_id, part)
+        return index
+
+    def _rows(
+        self, character_id: Optional[str], where: Dict[str, Any]
+    ) -> Optional[List[int]]:
+        """Rows of a partition matching every ``where`` clause."""
+
+        facets = self._facets[character_id]
+        rows: Optional[set] = None
+        for key, wanted in where.items():
+            matched: set = set()
+            for value in _wanted(wanted):
+                matched.update(facets.get((key, value), ()))
+            rows = matched if rows is None else rows & matched
+            if not rows:
+                return []
+        return sorted(rows) if rows is not None else None
+
+    def search_scored(
+        self,
+        query: Any,
+        top_k: int = 5,
+        character_id: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Any, Optional[float]]]:
+        """Return ``(item, score)`` pairs from the selected partitions.
+
+        With ``character_id`` only that character's partition is searched.
+        Otherwise every partition is searched and the results are merged by
+        score. Scores are ``None`` for sub-indexes that do not score (such
+        as :class:`ListIndex`); their results are concatenated instead.
+        """
+
+        keys = list(self._partitions) if character_id is None else [character_id]
+        results: List[Tuple[Any, Optional[float]]] = []
+        for key in keys:
+            index = self._partitions.get(key)
+            if index is None:
+                continue
+            rows = self._rows(key, where) if where else None
+            if rows is not None and not rows:
+                continue
+            if hasattr(index, "search_scored"):
+                results.extend(index.search_scored(query, top_k, rows=rows))
+            else:
+                results.extend((item, None) for item in index.search(query, top_k, rows=rows))
+        if len(keys) > 1 and all(score is not None for _, score in results):
+            return heapq.nlargest(top_k, results, key=lambda pair: pair[1])
+        return results[:top_k]
+
+    def search(
+        self,
+        query: Any,
+        top_k: int = 5,
+        character_id: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Any]:
+        return [item for item, _ in self.search_scored(query, top_k, character_id, where)]
+
+    def search_many(
+        self,
+        queries: Sequence[Any],
+        top_k: int = 5,
+        character_id: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Any]]:
+        """Answer a batch of queries.
+
+        For one character the batch goes to the partition's own
+        ``search_many`` when it has one (one matrix product for vector
+        indexes); otherwise each query is searched in turn.
+        """
+
+        if character_id is not None:
+            index = self._partitions.get(character_id)
+            if index is None:
+                return [[] for _ in range(len(queries))]
+            rows = self._rows(character_id, where) if where else None
+            if rows is not None and not rows:
+                return [[] for _ in range(len(queries))]
+            if hasattr(index, "search_many"):
+                if rows is None:
+                    return index.search_many(queries, top_k)
+                return index.search_many(queries, top_k, rows=rows)
+        return [self.search(query, top_k, character_id, where) for query in queries]
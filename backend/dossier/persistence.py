@@ -0,0 +1,327 @@
+"""On-disk format for dossier indexes.
+
+Each index named ``<name>`` is stored in an ``indices/`` directory, following
+the ``.dossier`` layout in the ROADMAP:
+
+- ``<name>.json`` – metadata: format version, index kind, items and, for
+  inverted indexes, the term dictionary.
+- ``<name>.npy`` – unit vectors of a :class:`VectorIndex` as ``float32``.
+- ``<name>.postings`` – postings of an :class:`InvertedIndex`: an 8-byte
+  magic header followed by little-endian ``uint32`` item lengths, item ids
+  and term frequencies. Each term's postings are a contiguous slice of the
+  id and frequency regions.
+
+Loading memory-maps the binary files, so opening an index reads only its
+JSON; vectors and postings are paged in by the OS when a query touches them.
+Loaded indexes are read-only views until the first ``add``, which copies the
+affected data into memory; the exact rows of a quantized vector index move to
+its spill file instead. An ``IVFIndex`` is saved as its exact vectors and
+reopens as a ``VectorIndex``. A :class:`PartitionedIndex` writes a JSON
+list of character ids and one numbered index per partition in
+``<name>.parts/``.
+
+Compiled characters are exported with :func:`export_characters`. The stream
+starts with an 8-byte magic and the codec name. After that, each character
+is a little-endian ``uint32`` length followed by one frame: the
+``{"character_id", "dossier"}`` record encoded by the chosen
+:mod:`~backend.dossier.codecs` codec. Frames are independent, so a stream can
+be read record by record.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from array import array
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from .codecs import Codec, get_codec
+from .indexes import BaseIndex, InvertedIndex, ListIndex
+from .living_dossier import LivingDossier
+from .models import Character, CharacterStore, LinguisticProfileEntry, PsychProfileEntry
+from .partitioned import PartitionedIndex
+from .vector_index import VectorIndex
+
+FORMAT_VERSION = 1
+POSTINGS_MAGIC = b"MIPOST1\0"
+CHARACTERS_MAGIC = b"MICHAR1\0"
+_FRAME_LENGTH = struct.Struct("<I")
+INDEX_NAMES = ("psych_profile_index", "linguistic_profile_index")
+# Saved only when the dossier has them.
+OPTIONAL_INDEX_NAMES = ("psych_vector_index", "linguistic_vector_index")
+
+_ENTRY_TYPES = {
+    cls.__name__: cls for cls in (PsychProfileEntry, LinguisticProfileEntry)
+}
+
+PathLike = Union[str, Path]
+
+
+def _item_to_json(item: Any) -> Dict[str, Any]:
+    if is_dataclass(item) and type(item).__name__ in _ENTRY_TYPES:
+        data = asdict(item)
+        data["type"] = type(item).__name__
+        return data
+    return {"type": "str", "content": str(item)}
+
+
+def _item_from_json(data: Dict[str, Any]) -> Any:
+    data = dict(data)
+    kind = data.pop("type")
+    if kind == "str":
+        return data["content"]
+    return _ENTRY_TYPES[kind](**data)
+
+
+def _replace_file(path: Path, write: Callable[[BinaryIO], Any]) -> None:
+    """Write ``path`` through a temporary file renamed over it.
+
+    A loaded index may still have the old file memory-mapped; replacing the
+    directory entry keeps that mapping valid, while truncating the file in
+    place would fault it.
+    """
+
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "wb") as fh:
+        write(fh)
+    os.replace(tmp, path)
+
+
+def save_index(index: BaseIndex, directory: PathLike, name: str) -> None:
+    """Write ``index`` to ``directory`` under ``name``.
+
+    Files are replaced rather than overwritten, so an index may be saved
+    back to the directory it was loaded from.
+    """
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    if index.tombstones:
+        index = index.compacted()
+    if isinstance(index, PartitionedIndex):
+        _save_partitioned(index, directory, name)
+        return
+    items = list(index._items)
+    meta: Dict[str, Any] = {"format_version": FORMAT_VERSION, "count": len(items)}
+
+    if isinstance(index, VectorIndex):
+        meta["kind"] = "vector"
+        meta["dim"] = index.dim
+        meta["dtype"] = index.dtype
+        # Vectors live in the .npy file; do not duplicate them as JSON.
+        meta["items"] = [
+            {k: v for k, v in _item_to_json(item).items() if k != "embedding"}
+            for item in items
+        ]
+        # Keep full precision on disk so reopened indexes re-rank exactly.
+        vectors = index._exact_vectors(np.arange(len(items))) if index.quantized else None
+        if vectors is None:
+            vectors = index.vectors
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        _replace_file(directory / f"{name}.npy", lambda fh: np.save(fh, vectors))
+    elif isinstance(index, InvertedIndex):
+        meta["kind"] = "inverted"
+        meta["items"] = [_item_to_json(item) for item in items]
+        meta["k1"], meta["b"] = index.k1, index.b
+        meta["total_length"] = index._total_length
+        terms: Dict[str, list] = {}
+        doc_ids = array("I")
+        freqs = array("I")
+        for term in sorted(index._postings):
+            ids, tfs = index._postings[term]
+            terms[term] = [len(doc_ids), len(ids)]
+            doc_ids.extend(int(i) for i in ids)
+            freqs.extend(int(f) for f in tfs)
+        meta["terms"] = terms
+        lengths = np.asarray(index._lengths, dtype="<u4")
+
+        def write_postings(fh: BinaryIO) -> None:
+            fh.write(POSTINGS_MAGIC)
+            fh.write(lengths.tobytes())
+            fh.write(np.asarray(doc_ids, dtype="<u4").tobytes())
+            fh.write(np.asarray(freqs, dtype="<u4").tobytes())
+
+        _replace_file(directory / f"{name}.postings", write_postings)
+    elif isinstance(index, ListIndex):
+        meta["kind"] = "list"
+        meta["items"] = [_item_to_json(item) for item in items]
+    else:
+        raise TypeError(f"cannot persist {type(index).__name__}")
+
+    (directory / f"{name}.json").write_text(json.dumps(meta))
+
+
+def load_index(
+    directory: PathLike, name: str, dtype: Optional[str] = None
+) -> BaseIndex:
+    """Open the index ``name`` stored in ``directory`` without copying data.
+
+    For vector indexes ``dtype`` overrides the saved storage type. With a
+    quantized type the codes are built in memory from the mapped ``.npy``,
+    which stays mapped as the exact source for re-ranking.
+    """
+
+    directory = Path(directory)
+    meta = json.loads((directory / f"{name}.json").read_text())
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"unsupported index format: {meta.get('format_version')}")
+    kind = meta["kind"]
+    if kind == "partitioned":
+        return _load_partitioned(meta, directory, name, dtype)
+    items = [_item_from_json(data) for data in meta["items"]]
+
+    if kind == "vector":
+        index = VectorIndex(dim=meta["dim"], dtype=dtype or meta.get("dtype", "float32"))
+        if items:
+            index._attach(np.load(directory / f"{name}.npy", mmap_mode="r"))
+        index._items = items
+        return index
+
+    if kind == "inverted":
+        index = InvertedIndex(k1=meta["k1"], b=meta["b"])
+        index._items = items
+        index._total_length = meta["total_length"]
+        path = directory / f"{name}.postings"
+        with open(path, "rb") as fh:
+            if fh.read(len(POSTINGS_MAGIC)) != POSTINGS_MAGIC:
+                raise ValueError(f"{path} is not a postings file")
+        count = meta["count"]
+        if count:
+            data = np.memmap(path, dtype="<u4", mode="r", offset=len(POSTINGS_MAGIC))
+            total = (len(data) - count) // 2
+            doc_ids = data[count : count + total]
+            freqs = data[count + total :]
+            index._lengths = data[:count]
+            index._postings = {
+                term: (doc_ids[start : start + size], freqs[start : start + size])
+                for term, (start, size) in meta["terms"].items()
+            }
+        return index
+
+    if kind == "list":
+        index = ListIndex()
+        index._items = items
+        return index
+
+    raise ValueError(f"unknown index kind: {kind}")
+
+
+def _save_partitioned(index: PartitionedIndex, directory: Path, name: str) -> None:
+    """Save each partition as its own index under ``<name>.parts/``.
+
+    Partition files are numbered because character ids need not be valid
+    file names; the JSON maps the numbers back to ids.
+    """
+
+    parts = directory / f"{name}.parts"
+    partitions = index.partitions
+    for number, part in enumerate(partitions.values()):
+        save_index(part, parts, str(number))
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "kind": "partitioned",
+        "count": len(index),
+        "partitions": list(partitions),
+    }
+    (directory / f"{name}.json").write_text(json.dumps(meta))
+
+
+def _load_partitioned(
+    meta: Dict[str, Any], directory: Path, name: str, dtype: Optional[str]
+) -> PartitionedIndex:
+    parts = directory / f"{name}.parts"
+    loaded = [
+        load_index(parts, str(number), dtype) for number in range(len(meta["partitions"]))
+    ]
+    # New characters get an empty index of the same kind as the saved ones.
+    index = PartitionedIndex(type(loaded[0]) if loaded else ListIndex)
+    for character_id, part in zip(meta["partitions"], loaded):
+        index.attach(character_id, part)
+    return index
+
+
+def save_living_dossier(dossier: LivingDossier, root: PathLike) -> None:
+    """Write both profile indexes, and any vector companions, to ``root/indices``."""
+
+    for name in INDEX_NAMES + OPTIONAL_INDEX_NAMES:
+        index = getattr(dossier, name)
+        if index is not None:
+            save_index(index, Path(root) / "indices", name)
+
+
+def load_living_dossier(root: PathLike, **kwargs: Any) -> LivingDossier:
+    """Open the profile indexes in ``root/indices`` as a ``LivingDossier``.
+
+    Extra keyword arguments, such as ``embedding_provider``, are passed to
+    :class:`LivingDossier`.
+    """
+
+    indices = Path(root) / "indices"
+    loaded = {name: load_index(indices, name) for name in INDEX_NAMES}
+    for name in OPTIONAL_INDEX_NAMES:
+        if (indices / f"{name}.json").exists():
+            loaded[name] = load_index(indices, name)
+    return LivingDossier(**loaded, **kwargs)
+
+
+def export_characters(characters: Iterable[Character], codec: Union[str, Codec] = "compact") -> bytes:
+    """Serialize ``characters`` to a character stream with ``codec``."""
+
+    codec = get_codec(codec) if isinstance(codec, str) else codec
+    name = codec.name.encode()
+    parts = [CHARACTERS_MAGIC, bytes([len(name)]), name]
+    for character in characters:
+        frame = codec.encode(
+            {"character_id": character.character_id, "dossier": character.dossier}
+        )
+        parts += [_FRAME_LENGTH.pack(len(frame)), frame]
+    return b"".join(parts)
+
+
+def iter_characters(data: bytes) -> Iterator[Character]:
+    """Yield the characters of a stream written by :func:`export_characters`."""
+
+    view = memoryview(data)
+    if bytes(view[: len(CHARACTERS_MAGIC)]) != CHARACTERS_MAGIC:
+        raise ValueError("not a character stream")
+    pos = len(CHARACTERS_MAGIC)
+    name_length = view[pos]
+    codec = get_codec(bytes(view[pos + 1 : pos + 1 + name_length]).decode())
+    pos += 1 + name_length
+    while pos < len(view):
+        (length,) = _FRAME_LENGTH.unpack_from(view, pos)
+        pos += _FRAME_LENGTH.size
+        if pos + length > len(view):
+            raise ValueError("truncated character stream")
+        record = codec.decode(bytes(view[pos : pos + length]))
+        pos += length
+        yield Character(character_id=record["character_id"], dossier=record["dossier"])
+
+
+def save_characters(
+    store: CharacterStore, path: PathLike, codec: Union[str, Codec] = "compact"
+) -> None:
+    """Write every character in ``store`` to ``path``."""
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(export_characters(store.all(), codec))
+
+
+def load_characters(path: PathLike, store: Optional[Any] = None) -> Any:
+    """Insert the characters saved at ``path`` into ``store`` and return it.
+
+    The codec is read from the file. ``store`` defaults to a new
+    :class:`CharacterStore`; any store with ``insert`` works, e.g. a
+    ``SQLiteCharacterStore``.
+    """
+
+    store = CharacterStore() if store is None else store
+    for character in iter_characters(Path(path).read_bytes()):
+        store.insert(character.dossier, character_id=character.character_id)
+    return store
@@ -0,0 +1,212 @@
+"""SQLite persistence for compiled character dossiers."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from .codecs import JSONCodec
+from .models import Character, character_keys, query_keys
+
+DEFAULT_STORE_PATH = ".data/characters.sqlite3"
+# Dossiers are stored as JSON text so JSON1 can index them; orjson when present.
+_JSON = JSONCodec()
+
+# Dossier fields exposed as indexed generated columns.
+INDEXED_FIELDS = ("name", "role", "source_material")
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS characters ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " character_id TEXT NOT NULL UNIQUE,"
+    " dossier TEXT NOT NULL CHECK (json_valid(dossier)),"
+    + ",".join(
+        f" {field} TEXT GENERATED ALWAYS AS (json_extract(dossier, '$.{field}')) VIRTUAL"
+        for field in INDEXED_FIELDS
+    )
+    + ")",
+    *(
+        f"CREATE INDEX IF NOT EXISTS characters_{field} ON characters ({field})"
+        for field in INDEXED_FIELDS
+    ),
+    # Secondary index for :meth:`SQLiteCharacterStore.query`; rows are the
+    # normalized keys from ``character_keys``.
+    "CREATE TABLE IF NOT EXISTS character_keys ("
+    " field TEXT NOT NULL,"
+    " value TEXT NOT NULL,"
+    " seq INTEGER NOT NULL REFERENCES characters (seq),"
+    " PRIMARY KEY (field, value, seq)"
+    ") WITHOUT ROWID",
+]
+# Bumped when ``character_keys`` must be rebuilt for existing rows.
+_KEYS_VERSION = 1
+
+# Fixed statement texts, so sqlite3's per-connection statement cache
+# prepares each of them once.
+_INSERT = "INSERT INTO characters (character_id, dossier) VALUES (?, ?)"
+_INSERT_KEY = "INSERT OR IGNORE INTO character_keys (field, value, seq) VALUES (?, ?, ?)"
+_GET = "SELECT character_id, dossier FROM characters WHERE character_id = ?"
+_ALL = "SELECT character_id, dossier FROM characters ORDER BY seq"
+_FIND = {
+    field: f"SELECT character_id, dossier FROM characters WHERE {field} = ? ORDER BY seq"
+    for field in INDEXED_FIELDS
+}
+
+
+class SQLiteCharacterStore:
+    """``CharacterStore`` persisted in a local SQLite database.
+
+    Offers the ``insert``/``get``/``all`` interface of
+    :class:`~backend.dossier.models.CharacterStore`, but survives restarts and
+    is shared by every process opening the same file (e.g. several uvicorn
+    workers). The database runs in WAL mode, so readers never block the
+    writer. Each thread gets its own connection. ``name``, ``role`` and
+    ``source_material`` are JSON1 generated columns with indexes, which
+    :meth:`find` uses. The normalized keys behind :meth:`query` live in a
+    ``character_keys`` table written in the same transaction as each row.
+
+    Parameters
+    ----------
+    path:
+        Database file. Defaults to ``CHARACTER_STORE_PATH`` or
+        ``.data/characters.sqlite3``.
+    timeout:
+        Seconds to wait for a competing writer before failing.
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 30.0) -> None:
+        self.path = path or os.getenv("CHARACTER_STORE_PATH", DEFAULT_STORE_PATH)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                check_same_thread=False,
+                cached_statements=64,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._lock:
+                if not self._initialized:
+                    with conn:
+                        for statement in _SCHEMA:
+                            conn.execute(statement)
+                        self._backfill_keys(conn)
+                    self._initialized = True
+                self._connections.append(conn)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _backfill_keys(conn: sqlite3.Connection) -> None:
+        """Index rows written before ``character_keys`` existed."""
+
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= _KEYS_VERSION:
+            return
+        conn.execute("DELETE FROM character_keys")
+        for seq, dossier in conn.execute("SELECT seq, dossier FROM characters").fetchall():
+            conn.executemany(
+                _INSERT_KEY,
+                [(field, value, seq) for field, value in character_keys(_JSON.decode(dossier))],
+            )
+        conn.execute(f"PRAGMA user_version = {_KEYS_VERSION}")
+
+    @staticmethod
+    def _character(row: tuple) -> Character:
+        return Character(character_id=row[0], dossier=_JSON.decode(row[1]))
+
+    def insert(self, dossier: Dict[str, Any], character_id: Optional[str] = None) -> str:
+        """Persist ``dossier`` under a unique ``character_id``.
+
+        If ``character_id`` is not supplied, a random UUID4 string is used.
+        """
+
+        cid = character_id or str(uuid4())
+        conn = self._connection()
+        try:
+            with conn:
+                seq = conn.execute(_INSERT, (cid, _JSON.encode(dossier).decode())).lastrowid
+                conn.executemany(
+                    _INSERT_KEY,
+                    [(field, value, seq) for field, value in character_keys(dossier)],
+                )
+        except sqlite3.IntegrityError as exc:
+            raise ValueError(f"character_id '{cid}' already exists") from exc
+        return cid
+
+    def get(self, character_id: str) -> Optional[Character]:
+        """Retrieve a stored ``Character`` by its id."""
+
+        row = self._connection().execute(_GET, (character_id,)).fetchone()
+        return self._character(row) if row else None
+
+    def all(self) -> List[Character]:
+        """Return all persisted characters in insertion order."""
+
+        return [self._character(row) for row in self._connection().execute(_ALL)]
+
+    def find(self, field: str, value: str) -> List[Character]:
+        """Return characters whose dossier ``field`` equals ``value``.
+
+        ``field`` is one of ``name``, ``role`` or ``source_material``; the
+        lookup uses that column's index.
+        """
+
+        if field not in _FIND:
+            raise ValueError(f"field must be one of {INDEXED_FIELDS}")
+        return [
+            self._character(row) for row in self._connection().execute(_FIND[field], (value,))
+        ]
+
+    def query(
+        self,
+        name: Optional[str] = None,
+        role: Optional[str] = None,
+        source_material: Optional[str] = None,
+        parent_cid: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Character]:
+        """Return characters matching every given filter, in insertion order.
+
+        Same semantics as :meth:`CharacterStore.query
+        <backend.dossier.models.CharacterStore.query>`; each filter is a
+        lookup in the ``character_keys`` index.
+        """
+
+        keys = sorted(query_keys(name, role, source_material, parent_cid))
+        sql = "SELECT character_id, dossier FROM characters"
+        params: List[Any] = []
+        if keys:
+            sql += " WHERE " + " AND ".join(
+                ["seq IN (SELECT seq FROM character_keys WHERE field = ? AND value = ?)"]
+                * len(keys)
+            )
+            params = [part for key in keys for part in key]
+        sql += " ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._character(row) for row in self._connection().execute(sql, params)]
+
+    def close(self) -> None:
+        """Close the connections of all threads."""
+
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
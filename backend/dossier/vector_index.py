@@ -0,0 +1,440 @@
+"""Dense vector index over dossier entry embeddings."""
+
+from __future__ import annotations
+
+import copy
+import tempfile
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .indexes import BaseIndex, _item_text
+
+Vector = Union[Sequence[float], np.ndarray]
+Query = Union[str, Vector]
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+# Rows dequantized per block when scoring quantized storage.
+_SCORE_BLOCK = 4_096
+# Rows quantized per block when attaching exact vectors.
+_QUANTIZE_BLOCK = 65_536
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Return indices of the ``top_k`` largest ``scores``, best first.
+
+    Uses ``argpartition`` so only the selected candidates are sorted; equal
+    scores among them are ordered by index.
+    """
+
+    count = scores.shape[0]
+    if top_k <= 0 or count == 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k < count:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(count)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Encode ``float32`` rows as ``dtype`` codes.
+
+    ``int8`` codes come with one ``float32`` scale per row; the other types
+    return ``None`` for the scales.
+    """
+
+    if dtype == "float32":
+        return vectors.astype(np.float32, copy=False), None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"unsupported storage dtype: {dtype}")
+
+
+class VectorIndex(BaseIndex):
+    """Cosine-similarity index backed by a contiguous matrix.
+
+    Rows are unit-normalised on :meth:`add` and stored in a matrix whose
+    capacity doubles when full, so appends are amortised O(1). A query is a
+    single matrix-vector product followed by ``argpartition``;
+    :meth:`search_many` answers a batch with one matrix-matrix product.
+
+    With ``dtype="float16"`` or ``"int8"`` (one ``float32`` scale per row)
+    the matrix is stored quantized. Queries then score the quantized rows,
+    keep the best ``top_k * rerank_factor`` and re-rank those exactly against
+    a ``float32`` side matrix of the same rows. By default the side matrix
+    is spilled to an anonymous temporary file and memory-mapped, so the OS
+    pages in only the shortlisted rows and can evict them under memory
+    pressure; a loaded index maps its saved ``.npy`` instead (see
+    ``persistence.load_index``). :attr:`rerank_nbytes` reports the side
+    matrix when it is kept in process memory.
+
+    Items are indexed by their ``embedding`` attribute (see
+    ``_BaseEntry.embedding``). When ``embed`` is supplied it is used for items
+    without an embedding and for string queries.
+
+    Parameters
+    ----------
+    dim:
+        Embedding dimension. Inferred from the first vector when omitted.
+    embed:
+        Optional callable turning text into a vector.
+    initial_capacity:
+        Number of rows allocated up front. Defaults to ``64``.
+    dtype:
+        Storage type, one of ``float32`` (default), ``float16`` or ``int8``.
+    rerank_factor:
+        Shortlist multiplier for exact re-ranking of quantized storage.
+        Defaults to ``4``.
+    spill:
+        Keep the exact vectors of quantized storage in a temporary file
+        rather than in process memory. Defaults to ``True``.
+    spill_dir:
+        Directory for that file; the system temporary directory by default.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        embed: Optional[Callable[[str], Vector]] = None,
+        initial_capacity: int = 64,
+        dtype: str = "float32",
+        rerank_factor: int = 4,
+        spill: bool = True,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"unsupported storage dtype: {dtype}")
+        self.dim = dim
+        self.embed = embed
+        self.dtype = dtype
+        self.rerank_factor = max(1, rerank_factor)
+        self.spill = spill
+        self.spill_dir = spill_dir
+        self._items: List[Any] = []
+        self._matrix = np.empty((0, dim or 0), dtype=dtype)
+        self._scales: Optional[np.ndarray] = (
+            np.empty(0, dtype=np.float32) if dtype == "int8" else None
+        )
+        # Full-precision rows of quantized storage, used for re-ranking.
+        self._exact: Optional[np.ndarray] = None
+        # Sorted tombstoned rows, rebuilt lazily after deletes.
+        self._dead: Optional[np.ndarray] = None
+        self._initial_capacity = max(1, initial_capacity)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def quantized(self) -> bool:
+        return self.dtype != "float32"
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Stored unit vectors as ``float32``, one row per item.
+
+        A view for ``float32`` storage; a dequantized copy otherwise.
+        """
+
+        return self.rows(0, len(self._items))
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """Stored vectors ``start:stop`` as ``float32`` (dequantized if needed)."""
+
+        codes = self._matrix[start:stop]
+        if not self.quantized:
+            return codes
+        vectors = codes.astype(np.float32)
+        if self._scales is not None:
+            vectors *= self._scales[start:stop, None]
+        return vectors
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the stored rows and scales, excluding spare capacity."""
+
+        count = len(self._items)
+        size = self._matrix[:count].nbytes
+        if self._scales is not None:
+            size += self._scales[:count].nbytes
+        return size
+
+    @property
+    def rerank_nbytes(self) -> int:
+        """Process memory held by the exact vectors of quantized storage.
+
+        Zero when they are memory-mapped, i.e. spilled or loaded from disk:
+        the OS pages those rows in and out.
+        """
+
+        if self._exact is None or isinstance(self._exact, np.memmap):
+            return 0
+        return self._exact[: len(self._items)].nbytes
+
+    def _as_vector(self, value: Query) -> np.ndarray:
+        """Convert ``value`` into a unit ``float32`` vector of ``dim``."""
+
+        if isinstance(value, str):
+            if self.embed is None:
+                raise TypeError("string queries require an embed callable")
+            value = self.embed(value)
+        vector = np.asarray(value, dtype=np.float32).reshape(-1)
+        if self.dim is None:
+            self.dim = vector.shape[0]
+        if vector.shape[0] != self.dim:
+            raise ValueError(
+                f"expected vector of dimension {self.dim}, got {vector.shape[0]}"
+            )
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _item_vector(self, item: Any) -> np.ndarray:
+        embedding = getattr(item, "embedding", None)
+        if embedding is None:
+            if self.embed is None:
+                raise ValueError("item has no embedding and no embed callable is set")
+            embedding = self.embed(_item_text(item))
+        return self._as_vector(embedding)
+
+    def _allocate_exact(self, rows: int) -> np.ndarray:
+        """A ``float32`` matrix for exact rows, in a temporary file if spilling."""
+
+        if not self.spill or rows == 0:
+            return np.empty((rows, self.dim), dtype=np.float32)
+        # The file is unlinked on creation; the mapping keeps it alive.
+        with tempfile.TemporaryFile(dir=self.spill_dir) as fh:
+            return np.memmap(fh, dtype=np.float32, mode="w+", shape=(rows, self.dim))
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the matrix (and exact rows) by doubling until it holds ``rows`` rows."""
+
+        capacity = self._matrix.shape[0]
+        if rows <= capacity and self._matrix.shape[1] == self.dim:
+            return
+        new_capacity = max(capacity, self._initial_capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+        grown = np.empty((new_capacity, self.dim), dtype=self.dtype)
+        count = len(self._items)
+        if count:
+            grown[:count] = self._matrix[:count]
+        self._matrix = grown
+        if self._scales is not None:
+            scales = np.empty(new_capacity, dtype=np.float32)
+            scales[:count] = self._scales[:count]
+            self._scales = scales
+        if self.quantized:
+            exact = self._allocate_exact(new_capacity)
+            if count:
+                exact[:count] = self._exact[:count]
+            self._exact = exact
+
+    def _store(self, start: int, vectors: np.ndarray) -> None:
+        codes, scales = quantize(vectors, self.dtype)
+        self._reserve(start + len(vectors))
+        self._matrix[start : start + len(vectors)] = codes
+        if scales is not None:
+            self._scales[start : start + len(vectors)] = scales
+        if self.quantized:
+            self._exact[start : start + len(vectors)] = vectors
+
+    def _attach(self, vectors: np.ndarray) -> None:
+        """Use saved unit ``float32`` rows, e.g. a memory map, as the stored vectors.
+
+        ``float32`` storage uses ``vectors`` as its matrix. Quantized storage
+        encodes them a block at a time and keeps ``vectors`` as its exact
+        rows, so they are not copied into memory. Rows for the items must
+        be in the same order.
+        """
+
+        if not self.quantized:
+            self._matrix = vectors
+            return
+        count = len(vectors)
+        self._matrix = np.empty((count, self.dim), dtype=self.dtype)
+        if self._scales is not None:
+            self._scales = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _QUANTIZE_BLOCK):
+            codes, scales = quantize(
+                np.asarray(vectors[start : start + _QUANTIZE_BLOCK]), self.dtype
+            )
+            self._matrix[start : start + len(codes)] = codes
+            if scales is not None:
+                self._scales[start : start + len(codes)] = scales
+        self._exact = vectors
+
+    def add(self, item: Any) -> None:
+        vector = self._item_vector(item)
+        self._store(len(self._items), vector[None, :])
+        self._items.append(item)
+
+    def add_many(self, items: Sequence[Any]) -> None:
+        """Append ``items`` with a single reservation and block copy."""
+
+        if not items:
+            return
+        embeddings = [getattr(item, "embedding", None) for item in items]
+        if any(embedding is None for embedding in embeddings):
+            vectors = np.stack([self._item_vector(item) for item in items])
+        else:
+            # One conversion for the whole batch instead of one per item.
+            vectors = self._query_matrix(np.asarray(embeddings, dtype=np.float32))
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(
+                    f"expected vector of dimension {self.dim}, got {vectors.shape[1]}"
+                )
+        self._store(len(self._items), vectors)
+        self._items.extend(items)
+
+    def _query_matrix(self, queries: Sequence[Query]) -> np.ndarray:
+        if isinstance(queries, np.ndarray) and queries.ndim == 2:
+            matrix = queries.astype(np.float32, copy=False)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            return matrix / norms
+        return np.stack([self._as_vector(query) for query in queries])
+
+    def _approx_scores(
+        self, queries: np.ndarray, rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Score stored rows (all, or ``rows``) against unit ``queries``.
+
+        ``queries`` is one vector or a matrix with one query per column.
+        Quantized rows are converted to ``float32`` a block at a time.
+        """
+
+        codes = self._matrix[: len(self._items)] if rows is None else self._matrix[rows]
+        if not self.quantized:
+            scores = codes @ queries
+        else:
+            scores = np.empty((len(codes),) + queries.shape[1:], dtype=np.float32)
+            for start in range(0, len(codes), _SCORE_BLOCK):
+                block = codes[start : start + _SCORE_BLOCK].astype(np.float32)
+                scores[start : start + _SCORE_BLOCK] = block @ queries
+            if self._scales is not None:
+                scales = self._scales[: len(self._items)] if rows is None else self._scales[rows]
+                scores *= scales.reshape((-1,) + (1,) * (scores.ndim - 1))
+        if self._deleted:
+            # Tombstoned rows can never be selected.
+            dead = self._dead_rows()
+            scores[dead if rows is None else np.isin(rows, dead)] = -np.inf
+        return scores
+
+    def _dead_rows(self) -> np.ndarray:
+        if self._dead is None:
+            self._dead = np.fromiter(sorted(self._deleted), dtype=np.intp)
+        return self._dead
+
+    def _delete_row(self, row: int) -> None:
+        super()._delete_row(row)
+        self._dead = None
+
+    def compacted(self) -> "VectorIndex":
+        """Copy of the index holding only live rows, with the same settings."""
+
+        live = np.asarray(
+            [row for row in range(len(self._items)) if row not in self._deleted], dtype=np.intp
+        )
+        index = copy.copy(self)
+        index._items = [self._items[row] for row in live]
+        index._matrix = np.ascontiguousarray(self._matrix[live])
+        if self._scales is not None:
+            index._scales = np.ascontiguousarray(self._scales[live])
+        if self._exact is not None:
+            index._exact = self._allocate_exact(len(live))
+            index._exact[:] = self._exact[live]
+        index._deleted = frozenset()
+        index._key_rows = None
+        index._dead = None
+        return index
+
+    def _exact_vectors(self, rows: np.ndarray) -> Optional[np.ndarray]:
+        """Full-precision unit vectors for ``rows`` of quantized storage."""
+
+        if self._exact is None:
+            return None
+        return np.asarray(self._exact[rows], dtype=np.float32)
+
+    def _rank(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        scores: np.ndarray,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """Pick the ``top_k`` rows from approximate ``scores``.
+
+        ``rows`` maps positions in ``scores`` to row ids when only a subset
+        was scored. Quantized storage re-ranks a larger shortlist exactly.
+        """
+
+        shortlist = top_k * self.rerank_factor if self.quantized else top_k
+        best = top_k_indices(scores, shortlist)
+        if self._deleted:
+            best = best[np.isfinite(scores[best])]
+        ids = best if rows is None else rows[best]
+        if self.quantized and len(ids):
+            exact = self._exact_vectors(ids)
+            if exact is not None:
+                exact_scores = exact @ query
+                order = top_k_indices(exact_scores, top_k)
+                return [(int(ids[i]), float(exact_scores[i])) for i in order]
+        return [(int(ids[i]), float(scores[best[i]])) for i in range(min(top_k, len(ids)))]
+
+    def search_scored(
+        self, query: Query, top_k: int = 5, rows: Optional[Sequence[int]] = None
+    ) -> List[Tuple[Any, float]]:
+        """Return ``(item, cosine similarity)`` pairs for the ``top_k`` best items.
+
+        With ``rows`` only those item positions are scored.
+        """
+
+        if not self._items:
+            return []
+        vector = self._as_vector(query)
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.intp)
+        ranked = self._rank(vector, top_k, self._approx_scores(vector, rows), rows)
+        return [(self._items[row], score) for row, score in ranked]
+
+    def search(
+        self, query: Query, top_k: int = 5, rows: Optional[Sequence[int]] = None
+    ) -> List[Any]:
+        return [item for item, _ in self.search_scored(query, top_k, rows)]
+
+    def search_many(
+        self,
+        queries: Sequence[Query],
+        top_k: int = 5,
+        rows: Optional[Sequence[int]] = None,
+    ) -> List[List[Any]]:
+        """Answer a batch of queries with a single matrix product.
+
+        ``queries`` may be a 2-D array with one query vector per row or a
+        sequence of vectors and strings.
+        """
+
+        if len(queries) == 0:
+            return []
+        if not self._items:
+            return [[] for _ in range(len(queries))]
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.intp)
+        matrix = self._query_matrix(queries)
+        scores = self._approx_scores(matrix.T, rows)
+        return [
+            [
+                self._items[row]
+                for row, _ in self._rank(matrix[column], top_k, scores[:, column], rows)
+            ]
+            for column in range(scores.shape[1])
+        ]
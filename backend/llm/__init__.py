@@ -1,4 +1,18 @@
 """LLM package exposes client utilities."""
-from .client import LLMClient, CredentialsError, LLMProviderError
+from .client import (
+    AsyncLLMClient,
+    LLMClient,
+    CredentialsError,
+    LLMProviderError,
+    ContextLengthError,
+    LLMTimeoutError,
+)
 
-__all__ = ["LLMClient", "CredentialsError", "LLMProviderError"]
+__all__ = [
+    "AsyncLLMClient",
+    "LLMClient",
+    "CredentialsError",
+    "LLMProviderError",
+    "ContextLengthError",
+    "LLMTimeoutError",
+]
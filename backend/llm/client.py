@@ -1,16 +1,19 @@
 """LLM client utilities."""
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 
 import json
 import urllib.request
 import urllib.error
 
+import httpx
+
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,47 @@ class LLMProviderError(Exception):
         self.message = message
 
 
+class ContextLengthError(LLMProviderError):
+    """Raised when the provider rejects a prompt as too long.
+
+    Resending the same prompt cannot succeed, so this error is not retried.
+    """
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when the provider does not answer within ``timeout`` seconds.
+
+    Slow responses usually scale with prompt size, so the request is not
+    retried with the same payload; callers may shrink the prompt instead.
+    """
+
+
+_CONTEXT_LENGTH_MARKERS = (
+    "context_length",
+    "context length",
+    "maximum context",
+    "too many tokens",
+    "prompt is too long",
+)
+
+
+def _is_context_length_error(status_code: int, body: str) -> bool:
+    """Return ``True`` if an error response reports an oversized prompt."""
+
+    if status_code == 413:
+        return True
+    lowered = body.lower()
+    return status_code == 400 and any(m in lowered for m in _CONTEXT_LENGTH_MARKERS)
+
+
+def _provider_error(status_code: int, body: str) -> LLMProviderError:
+    """Build the appropriate provider error for an error response."""
+
+    if _is_context_length_error(status_code, body):
+        return ContextLengthError(status_code, body)
+    return LLMProviderError(status_code, body)
+
+
 @dataclass
 class LLMClient:
     """Simple HTTP client for LLM providers with retry/backoff."""
@@ -63,6 +107,13 @@ class LLMClient:
         -------
         Dict[str, Any]
             Parsed JSON response from the provider.
+
+        Raises
+        ------
+        ContextLengthError
+            If the provider rejects the prompt as too long. Not retried.
+        LLMTimeoutError
+            If no response arrives within ``timeout`` seconds. Not retried.
         """
 
         payload = {"prompt": prompt, **params}
@@ -77,15 +128,31 @@ class LLMClient:
                     headers=self._headers(),
                     method="POST",
                 )
-                with urllib.request.urlopen(req, timeout=self.timeout) as resp:
-                    body = resp.read().decode()
-                    logger.info(
-                        "LLM response attempt=%s status=%s", attempt, resp.status
-                    )
-                    logger.debug("LLM raw response: %s", body)
-                    if resp.status >= 400:
-                        raise LLMProviderError(resp.status, body)
-                    return json.loads(body)
+                try:
+                    with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                        body = resp.read().decode()
+                        logger.info(
+                            "LLM response attempt=%s status=%s",
+                            attempt,
+                            resp.status,
+                        )
+                        logger.debug("LLM raw response: %s", body)
+                        if resp.status >= 400:
+                            raise _provider_error(resp.status, body)
+                        return json.loads(body)
+                except urllib.error.HTTPError as http_exc:
+                    body = http_exc.read().decode(errors="replace")
+                    raise _provider_error(http_exc.code, body) from http_exc
+            except ContextLengthError:
+                logger.warning("LLM rejected prompt as too long")
+                raise
+            except TimeoutError as exc:
+                # Read timeouts surface as bare ``TimeoutError``; connection
+                # timeouts arrive wrapped in ``URLError`` and are retried below.
+                logger.warning("LLM request timed out after %ss", self.timeout)
+                raise LLMTimeoutError(
+                    f"LLM request timed out after {self.timeout}s"
+                ) from exc
             except (LLMProviderError, urllib.error.URLError) as exc:
                 if attempt == self.max_retries:
                     logger.exception("LLM request failed after retries")
@@ -100,3 +167,104 @@ class LLMClient:
                 )
                 time.sleep(backoff)
         raise RuntimeError("unreachable")
+
+
+@dataclass
+class AsyncLLMClient:
+    """Asyncio counterpart of :class:`LLMClient`, built on ``httpx``.
+
+    ``generate`` is a coroutine with the same retries, backoff and errors as
+    :meth:`LLMClient.generate`, but waiting on the provider never blocks the
+    event loop. Cancelling the awaiting task aborts the HTTP request. One
+    connection pool is shared by every call on the client; ``max_connections``
+    bounds it, and further calls wait their turn outside the pool. At most
+    ``max_keepalive_connections`` idle connections are kept, since the pool's
+    bookkeeping grows quadratically with the number of idle ones.
+    """
+
+    api_key: Optional[str] = None
+    api_url: Optional[str] = None
+    timeout: float = 30.0
+    max_retries: int = 3
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    # Custom ``httpx`` transport, e.g. ``httpx.MockTransport`` in tests.
+    transport: Optional[httpx.AsyncBaseTransport] = None
+    _http: Optional[httpx.AsyncClient] = field(default=None, init=False, repr=False)
+    _slots: Optional[asyncio.Semaphore] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.api_key = self.api_key or os.getenv("LLM_API_KEY")
+        self.api_url = self.api_url or os.getenv("LLM_API_URL")
+        if not self.api_key or not self.api_url:
+            raise CredentialsError("LLM_API_KEY and LLM_API_URL must be set")
+
+    def _client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool binds to the loop that first uses it.
+        if self._http is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+            self._http = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+            )
+        return self._http
+
+    async def generate(self, prompt: str, **params: Any) -> Dict[str, Any]:
+        """Generate text from the remote LLM provider.
+
+        See :meth:`LLMClient.generate` for parameters, return value and
+        errors.
+        """
+
+        payload = {"prompt": prompt, **params}
+        data = json.dumps(payload).encode()
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                logger.info("LLM request attempt=%s payload=%s", attempt, payload)
+                client = self._client()
+                async with self._slots:
+                    resp = await client.post(self.api_url, content=data)
+                logger.info("LLM response attempt=%s status=%s", attempt, resp.status_code)
+                logger.debug("LLM raw response: %s", resp.text)
+                if resp.status_code >= 400:
+                    raise _provider_error(resp.status_code, resp.text)
+                return resp.json()
+            except ContextLengthError:
+                logger.warning("LLM rejected prompt as too long")
+                raise
+            except (httpx.ReadTimeout, httpx.WriteTimeout) as exc:
+                logger.warning("LLM request timed out after %ss", self.timeout)
+                raise LLMTimeoutError(
+                    f"LLM request timed out after {self.timeout}s"
+                ) from exc
+            except (LLMProviderError, httpx.TransportError) as exc:
+                if attempt == self.max_retries:
+                    logger.exception("LLM request failed after retries")
+                    raise
+                backoff = 2 ** (attempt - 1)
+                logger.warning(
+                    "LLM request error on attempt %s/%s: %s. Retrying in %ss",
+                    attempt,
+                    self.max_retries,
+                    exc,
+                    backoff,
+                )
+                await asyncio.sleep(backoff)
+        raise RuntimeError("unreachable")
+
+    async def aclose(self) -> None:
+        """Close the connection pool."""
+
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._slots = None
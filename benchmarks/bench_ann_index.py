@@ -0,0 +1,87 @@
+"""Benchmark ``IVFIndex`` recall@k and QPS against exact ``VectorIndex``.
+
+Indexes clustered synthetic embeddings, then sweeps ``nprobe`` and reports
+recall@10 against exact search together with queries per second, so
+``nlist``/``nprobe`` can be chosen for a deployment. Arguments are the number
+of vectors and the dimension::
+
+    python -m benchmarks.bench_ann_index 200000 128
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from backend.dossier.ann_index import IVFIndex
+from backend.dossier.vector_index import VectorIndex
+
+TOP_K = 10
+QUERIES = 200
+
+
+def clustered(count: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Gaussian mixture data, closer to real embeddings than uniform noise.
+
+    Cluster centres are fixed; ``seed`` only varies membership and noise.
+    """
+
+    centers = np.random.default_rng(0).normal(size=(clusters, dim)).astype(np.float32)
+    rng = np.random.default_rng(seed + 1)
+    labels = rng.integers(clusters, size=count)
+    noise = rng.normal(scale=0.35, size=(count, dim)).astype(np.float32)
+    return centers[labels] + noise
+
+
+def timed_search(index: VectorIndex, queries: np.ndarray, **kwargs) -> tuple[List[List[int]], float]:
+    """Return results as row ids and queries per second."""
+
+    start = time.perf_counter()
+    results = [index.search(query, top_k=TOP_K, **kwargs) for query in queries]
+    qps = len(queries) / (time.perf_counter() - start)
+    return results, qps
+
+
+def main(count: int, dim: int) -> None:
+    data = clustered(count, dim, clusters=max(10, count // 2000), seed=0)
+    queries = clustered(QUERIES, dim, clusters=max(10, count // 2000), seed=1)
+    ids = list(range(count))
+
+    exact = VectorIndex(dim=dim)
+    exact.add_many([_Row(i, data[i]) for i in ids])
+    truth, exact_qps = timed_search(exact, queries)
+    truth_ids = [{row.id for row in result} for result in truth]
+    print(f"vectors={count} dim={dim}\n  exact: {exact_qps:9.1f} qps")
+
+    nlist = int(4 * np.sqrt(count))
+    ivf = IVFIndex(dim=dim, nlist=nlist)
+    start = time.perf_counter()
+    ivf.add_many([_Row(i, data[i]) for i in ids])
+    if not ivf.is_trained:
+        ivf.train()
+    print(f"  ivf nlist={nlist}: built in {time.perf_counter() - start:.2f}s")
+
+    for nprobe in (1, 2, 4, 8, 16, 32, 64):
+        if nprobe > nlist:
+            break
+        results, qps = timed_search(ivf, queries, nprobe=nprobe)
+        recall = np.mean(
+            [len({row.id for row in got} & want) / TOP_K for got, want in zip(results, truth_ids)]
+        )
+        print(f"    nprobe={nprobe:3d}: recall@{TOP_K} {recall:6.3f}  {qps:9.1f} qps")
+
+
+class _Row:
+    __slots__ = ("id", "embedding")
+
+    def __init__(self, row_id: int, embedding: np.ndarray) -> None:
+        self.id = row_id
+        self.embedding = embedding
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 200_000, args[1] if len(args) > 1 else 128)
@@ -0,0 +1,159 @@
+"""Load test of the casting compile route against a fake LLM server.
+
+Starts a local HTTP server that answers every prompt with a valid dossier
+after a fixed latency, then fires concurrent ``POST /casting-call/compile``
+requests (one candidate each) at a single in-process app, first through the
+sync router and then through the async one. Reports requests per second and
+the peak number of LLM calls the server saw in flight. Arguments are the
+number of concurrent requests and the LLM latency in seconds::
+
+    python -m benchmarks.bench_async_compile 1000 2
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from backend.casting import api, async_api
+from backend.casting.models import CharacterCandidate
+from backend.casting.pipeline import DossierCompiler
+from backend.llm import AsyncLLMClient, LLMClient
+from benchmarks.bench_codecs import synthetic_dossiers
+
+
+class FakeLLMServer:
+    """Minimal keep-alive HTTP server answering after ``latency`` seconds.
+
+    Runs in a child process so that it does not compete with the app for
+    the GIL. ``peak`` is the most requests it has had in flight at once.
+    """
+
+    def __init__(self, latency: float = 0.2, body: Optional[Dict[str, Any]] = None) -> None:
+        self.latency = latency
+        self.body = json.dumps(body or synthetic_dossiers(1)[0]).encode()
+        self.url = ""
+        self._peak = multiprocessing.Value("i", 0)
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def peak(self) -> int:
+        return self._peak.value
+
+    @peak.setter
+    def peak(self, value: int) -> None:
+        self._peak.value = value
+
+    def _serve(self, ready: Connection) -> None:
+        in_flight = 0
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            nonlocal in_flight
+            try:
+                while True:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    length = 0
+                    for line in head.split(b"\r\n"):
+                        if line.lower().startswith(b"content-length:"):
+                            length = int(line.split(b":", 1)[1])
+                    await reader.readexactly(length)
+                    in_flight += 1
+                    self._peak.value = max(self._peak.value, in_flight)
+                    try:
+                        await asyncio.sleep(self.latency)
+                    finally:
+                        in_flight -= 1
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                        b"Content-Length: %d\r\n\r\n%s" % (len(self.body), self.body)
+                    )
+                    await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        async def serve() -> None:
+            server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=4096)
+            ready.send(server.sockets[0].getsockname()[1])
+            await server.serve_forever()
+
+        asyncio.run(serve())
+
+    def __enter__(self) -> "FakeLLMServer":
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(target=self._serve, args=(sender,), daemon=True)
+        self._process.start()
+        self.url = f"http://127.0.0.1:{receiver.recv()}/generate"
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._process.terminate()
+        self._process.join()
+
+
+def prepare(count: int) -> List[int]:
+    api.casting_call_log.clear()
+    api.character_store.clear()
+    ids = api.casting_call_log.add_many(
+        [CharacterCandidate(name=f"Character {idx}") for idx in range(count)]
+    )
+    api.casting_call_log.set_selected(ids)
+    return ids
+
+
+async def fire(app: FastAPI, ids: List[int]) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(
+                client.post("/casting-call/compile", json={"candidate_ids": [idx]})
+                for idx in ids
+            )
+        )
+        seconds = time.perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    assert all("error" not in response.json()[0] for response in responses)
+    return seconds
+
+
+def run(label: str, router: Any, server: FakeLLMServer, count: int) -> None:
+    ids = prepare(count)
+    server.peak = 0
+    app = FastAPI()
+    app.include_router(router)
+    seconds = asyncio.run(fire(app, ids))
+    assert len(api.character_store.all()) == count
+    print(
+        f"  {label:6s} {count / seconds:8.1f} req/s  ({seconds:.2f}s)"
+        f"  peak LLM calls in flight={server.peak}"
+    )
+
+
+def main(count: int, latency: float) -> None:
+    with FakeLLMServer(latency=latency) as server:
+        api.compiler_factory = lambda: DossierCompiler(
+            llm_client=LLMClient(api_key="fake", api_url=server.url)
+        )
+        # One shared client, as in the default factory.
+        llm_client = AsyncLLMClient(api_key="fake", api_url=server.url, max_connections=count)
+        async_api.async_compiler_factory = lambda: DossierCompiler(llm_client=llm_client)
+        print(f"requests={count} llm_latency={latency}s")
+        run("sync", api.router, server, count)
+        run("async", async_api.router, server, count)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 2.0,
+    )
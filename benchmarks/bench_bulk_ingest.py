@@ -0,0 +1,94 @@
+"""Benchmark bulk dossier ingestion into ``LivingDossier`` indexes.
+
+Builds synthetic compiled dossiers and reports dossiers per second for a
+``store_dossier`` loop and for ``store_dossiers`` inline and with worker
+processes. Indexes are a BM25 ``InvertedIndex`` per profile plus a
+``VectorIndex`` companion, embedded with ``HashingEmbeddingProvider``.
+Arguments are the number of dossiers and of workers::
+
+    python -m benchmarks.bench_bulk_ingest 2000 4
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from backend.dossier.embeddings import HashingEmbeddingProvider
+from backend.dossier.indexes import InvertedIndex
+from backend.dossier.living_dossier import LivingDossier
+from backend.dossier.vector_index import VectorIndex
+from benchmarks.bench_dossier_indexes import synthetic_entries
+
+MEMORIES = 12
+
+
+def synthetic_dossiers(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    texts = synthetic_entries(count * (MEMORIES + 6), seed=seed)
+    dossiers = []
+    for i in range(count):
+        chunk = texts[i * (MEMORIES + 6) : (i + 1) * (MEMORIES + 6)]
+        dossiers.append(
+            {
+                "name": f"character-{i}",
+                "inner_world": {
+                    "backstory": chunk[0],
+                    "core_motivation": chunk[1],
+                    "primal_fear": chunk[2],
+                    "central_paradox": chunk[3],
+                    "memory_journal": [
+                        {"event": text, "emotion": rng.choice(["joy", "dread", "rage"])}
+                        for text in chunk[6:]
+                    ],
+                },
+                "blueprint": {
+                    "linguistic_profile": {"vocabulary_syntax": chunk[4], "rhythm_imagery": chunk[5]}
+                },
+            }
+        )
+    return dossiers
+
+
+def fresh_dossier() -> LivingDossier:
+    provider = HashingEmbeddingProvider(dim=256)
+    return LivingDossier(
+        psych_profile_index=InvertedIndex(),
+        linguistic_profile_index=InvertedIndex(),
+        psych_vector_index=VectorIndex(),
+        linguistic_vector_index=VectorIndex(),
+        embedding_provider=provider,
+    )
+
+
+def timed(label: str, count: int, ingest: Callable[[LivingDossier], None]) -> None:
+    living = fresh_dossier()
+    start = time.perf_counter()
+    ingest(living)
+    seconds = time.perf_counter() - start
+    print(f"  {label:24s} {count / seconds:9.1f} dossiers/s  ({seconds:.2f}s)")
+
+
+def main(count: int, workers: int) -> None:
+    dossiers = synthetic_dossiers(count)
+    print(f"dossiers={count} entries/dossier={MEMORIES + 6}")
+
+    def loop(living: LivingDossier) -> None:
+        for dossier in dossiers:
+            living.store_dossier(dossier)
+
+    timed("store_dossier loop", count, loop)
+    timed("store_dossiers inline", count, lambda d: d.store_dossiers(dossiers, workers=1))
+    timed(
+        f"store_dossiers workers={workers}",
+        count,
+        lambda d: d.store_dossiers(dossiers, workers=workers),
+    )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 2000, args[1] if len(args) > 1 else os.cpu_count() or 1)
@@ -0,0 +1,156 @@
+"""Benchmark candidate deduplication with bitset provenance.
+
+Compares the current ``deduplicate_candidates``/``flag_duplicate_candidates``
+against the previous list-based implementation on a synthetic book with
+thousands of chunks, reporting wall time and peak allocated memory via
+``tracemalloc``. Both paths are checked to produce identical output.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_candidate_provenance
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import sys
+import time
+import tracemalloc
+from difflib import SequenceMatcher
+from typing import Callable, List, Tuple
+
+from backend.casting.models import CharacterCandidate, CompactCandidate
+from backend.casting.pipeline import CharacterExtractionPipeline
+
+
+def legacy_deduplicate(
+    candidates: List[CharacterCandidate],
+) -> List[CharacterCandidate]:
+    """List-based deduplication as it was before bitset provenance."""
+
+    def normalize(name: str) -> str:
+        return re.sub(r"[^a-z0-9]", "", name.lower())
+
+    merged: dict[str, CharacterCandidate] = {}
+    for cand in candidates:
+        norm = normalize(cand.name)
+        match_key = None
+        for key in merged.keys():
+            if SequenceMatcher(None, norm, key).ratio() >= 0.85:
+                match_key = key
+                break
+        if match_key is None:
+            merged[norm] = CharacterCandidate(
+                name=cand.name, source_chunks=list(cand.source_chunks)
+            )
+        else:
+            existing = merged[match_key]
+            existing.source_chunks.extend(cand.source_chunks)
+            existing.source_chunks = sorted(set(existing.source_chunks))
+    return list(merged.values())
+
+
+def legacy_flag(candidates: List[CharacterCandidate]) -> List[CharacterCandidate]:
+    """Tuple-keyed duplicate flagging as it was before bitset provenance."""
+
+    groups: dict[tuple[int, ...], List[CharacterCandidate]] = {}
+    for cand in candidates:
+        groups.setdefault(tuple(sorted(cand.source_chunks)), []).append(cand)
+    for group in groups.values():
+        if len(group) > 1:
+            for cand in group:
+                cand.duplicate = True
+    for cand in candidates:
+        if len(cand.source_chunks) <= 1:
+            cand.minor_role = True
+    return candidates
+
+
+def synthetic_candidates(
+    num_chunks: int, num_names: int, mentions_per_chunk: int, seed: int = 0
+) -> List[CharacterCandidate]:
+    """Generate raw per-chunk candidates with a skewed cast distribution."""
+
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    names = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(5, 12))).title()
+        for _ in range(num_names)
+    ]
+    # Zipf-like weights: a few principals appear everywhere.
+    weights = [1.0 / (rank + 1) for rank in range(num_names)]
+    raw: List[CharacterCandidate] = []
+    for idx in range(num_chunks):
+        for name in rng.choices(names, weights=weights, k=mentions_per_chunk):
+            raw.append(CharacterCandidate(name=name, source_chunks=[idx]))
+    return raw
+
+
+def measure(
+    func: Callable[[], List[CharacterCandidate]],
+) -> Tuple[float, int, List[CharacterCandidate]]:
+    """Return elapsed seconds, peak traced bytes and the result of ``func``."""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def list_footprint(candidates: List[CharacterCandidate]) -> int:
+    """Bytes held by ``source_chunks`` lists and their int elements."""
+
+    return sum(
+        sys.getsizeof(c.source_chunks)
+        + sum(sys.getsizeof(i) for i in c.source_chunks)
+        for c in candidates
+    )
+
+
+def bitset_footprint(candidates: List[CharacterCandidate]) -> int:
+    """Bytes held by the merged bitset provenance integers."""
+
+    merged = CharacterExtractionPipeline._merge_compact(
+        CompactCandidate.from_candidate(c) for c in candidates
+    )
+    return sum(sys.getsizeof(c.provenance) for c in merged)
+
+
+def main() -> None:
+    pipeline = CharacterExtractionPipeline(llm_client=None)  # type: ignore[arg-type]
+    for num_chunks, num_names in [(300, 80), (1_000, 150)]:
+        raw = synthetic_candidates(num_chunks, num_names, mentions_per_chunk=4)
+
+        def copies() -> List[CharacterCandidate]:
+            return [
+                CharacterCandidate(name=c.name, source_chunks=list(c.source_chunks))
+                for c in raw
+            ]
+
+        legacy_input = copies()
+        legacy_t, legacy_mem, legacy_out = measure(
+            lambda: legacy_flag(legacy_deduplicate(legacy_input))
+        )
+        new_input = copies()
+        new_t, new_mem, new_out = measure(
+            lambda: pipeline.flag_duplicate_candidates(
+                pipeline.deduplicate_candidates(new_input)
+            )
+        )
+        assert new_out == legacy_out, "bitset path diverged from legacy output"
+
+        print(
+            f"chunks={num_chunks} raw={len(raw)} unique={len(new_out)}\n"
+            f"  legacy: {legacy_t:8.3f}s  peak {legacy_mem / 1e6:7.2f} MB"
+            f"  provenance {list_footprint(legacy_out) / 1e3:8.1f} KB\n"
+            f"  bitset: {new_t:8.3f}s  peak {new_mem / 1e6:7.2f} MB"
+            f"  provenance {bitset_footprint(raw) / 1e3:8.1f} KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark dossier codecs against stdlib ``json``.
+
+Builds synthetic expanded dossiers that fill every field of the schema,
+encodes each one as a separate record (as character exports do) and reports
+total size and encode/decode throughput for stdlib ``json``, the ``json``
+codec, plain zlib over JSON, and the ``compact`` codec. The output notes
+which optional packages (``orjson``, ``msgpack``, ``zstandard``) are used.
+The argument is the number of dossiers::
+
+    python -m benchmarks.bench_codecs 2000
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, List
+
+from backend.dossier import codecs
+from backend.dossier.codecs import SCHEMA_PATH, CompactCodec, JSONCodec
+from benchmarks.bench_dossier_indexes import synthetic_entries
+
+
+def _fill(schema: Dict[str, Any], rng: random.Random, texts: List[str]) -> Any:
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: _fill(sub, rng, texts) for key, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_fill(schema.get("items", {}), rng, texts) for _ in range(rng.randint(2, 5))]
+    return rng.choice(texts)
+
+
+def synthetic_dossiers(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    schema = json.loads(SCHEMA_PATH.read_text())
+    texts = synthetic_entries(5_000, seed=seed)
+    return [_fill(schema, rng, texts) for _ in range(count)]
+
+
+def measure(
+    label: str,
+    dossiers: List[Dict[str, Any]],
+    encode: Callable[[Any], bytes],
+    decode: Callable[[bytes], Any],
+) -> None:
+    start = time.perf_counter()
+    frames = [encode(dossier) for dossier in dossiers]
+    encode_s = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = [decode(frame) for frame in frames]
+    decode_s = time.perf_counter() - start
+    assert decoded == dossiers
+    size = sum(map(len, frames))
+    print(
+        f"  {label:28s} {size / 1e6:8.2f} MB  ({size / len(dossiers):7.0f} B/dossier)"
+        f"  encode {len(dossiers) / encode_s:8.0f}/s  decode {len(dossiers) / decode_s:8.0f}/s"
+    )
+
+
+def main(count: int) -> None:
+    dossiers = synthetic_dossiers(count)
+    print(
+        f"dossiers={count} orjson={codecs.orjson is not None} "
+        f"msgpack={codecs.msgpack is not None} zstandard={codecs.zstandard is not None}"
+    )
+    measure("stdlib json", dossiers, lambda d: json.dumps(d).encode(), json.loads)
+    json_codec = JSONCodec()
+    measure("json codec", dossiers, json_codec.encode, json_codec.decode)
+    measure(
+        "zlib(json), no dictionary",
+        dossiers,
+        lambda d: zlib.compress(json.dumps(d).encode(), 6),
+        lambda b: json.loads(zlib.decompress(b)),
+    )
+    compact = CompactCodec()
+    measure(
+        f"compact ({compact.serializer}+{compact.compressor})",
+        dossiers,
+        compact.encode,
+        compact.decode,
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
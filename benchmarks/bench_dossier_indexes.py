@@ -0,0 +1,65 @@
+"""Benchmark ``InvertedIndex`` against ``ListIndex``.
+
+Builds both indexes over synthetic dossier-like entries and reports build
+time and mean query latency for each size. Sizes default to 10k, 100k and
+1M entries and may be overridden on the command line::
+
+    python -m benchmarks.bench_dossier_indexes 10000 100000
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from itertools import accumulate
+from typing import List
+
+from backend.dossier.indexes import BaseIndex, InvertedIndex, ListIndex
+
+QUERIES = 50
+
+
+def synthetic_entries(count: int, seed: int = 0) -> List[str]:
+    """Generate ``count`` short texts over a Zipf-like vocabulary."""
+
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(20_000)]
+    cum_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+    return [
+        " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(8, 30)))
+        for _ in range(count)
+    ]
+
+
+def bench(index: BaseIndex, entries: List[str], queries: List[str]) -> tuple[float, float]:
+    """Return build seconds and mean per-query milliseconds."""
+
+    start = time.perf_counter()
+    for entry in entries:
+        index.add(entry)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, top_k=5)
+    per_query = (time.perf_counter() - start) / len(queries) * 1000
+    return build, per_query
+
+
+def main(sizes: List[int]) -> None:
+    rng = random.Random(1)
+    queries = [f"word{rng.randint(50, 5_000)}" for _ in range(QUERIES)]
+    for size in sizes:
+        entries = synthetic_entries(size)
+        list_build, list_query = bench(ListIndex(), entries, queries)
+        inv_build, inv_query = bench(InvertedIndex(), entries, queries)
+        print(
+            f"entries={size}\n"
+            f"  ListIndex:     build {list_build:7.2f}s  query {list_query:9.3f} ms\n"
+            f"  InvertedIndex: build {inv_build:7.2f}s  query {inv_query:9.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
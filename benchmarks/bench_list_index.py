@@ -0,0 +1,52 @@
+"""Benchmark ``PreparedListIndex.search_many`` against a per-keyword loop.
+
+Indexes synthetic mixed-case entries with the root ``list_index.ListIndex``
+and times a turn's worth of keywords searched one at a time against a single
+``search_many`` call over the prepared index. Arguments are the number of
+entries and of keywords per batch::
+
+    python -m benchmarks.bench_list_index 100000 50
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from benchmarks.bench_dossier_indexes import synthetic_entries
+from list_index import ListIndex, PreparedListIndex
+
+
+def main(count: int, keywords: int) -> None:
+    rng = random.Random(1)
+    entries = [entry.title() for entry in synthetic_entries(count)]
+    # Distinct keywords, from frequent to rare words, as context assembly uses.
+    batch = [f"word{rank} " for rank in rng.sample(range(20_000), keywords)]
+
+    plain = ListIndex(entries)
+    start = time.perf_counter()
+    expected = {keyword: plain.search(keyword) for keyword in batch}
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prepared = PreparedListIndex(entries)
+    prepare_seconds = time.perf_counter() - start
+    prepared.search_many(batch[:1])  # Builds the joined corpus once.
+    start = time.perf_counter()
+    results = prepared.search_many(batch)
+    many_seconds = time.perf_counter() - start
+    assert results == expected
+
+    print(f"entries={count} keywords={keywords}")
+    print(f"  per-keyword loop: {loop_seconds * 1000:9.1f} ms")
+    print(f"  prepare:          {prepare_seconds * 1000:9.1f} ms (once)")
+    print(
+        f"  search_many:      {many_seconds * 1000:9.1f} ms "
+        f"({loop_seconds / many_seconds:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 100_000, args[1] if len(args) > 1 else 50)
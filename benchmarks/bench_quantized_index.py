@@ -0,0 +1,73 @@
+"""Benchmark quantized ``VectorIndex`` storage: memory, recall@k and QPS.
+
+Indexes the same clustered embeddings as ``float32``, ``float16`` and
+``int8`` and reports matrix size, the process memory of the exact vectors
+kept for re-ranking, recall@10 against exact ``float32`` search with and
+without exact re-ranking (``rerank_factor=1`` disables it) and queries per
+second. Quantized rows spill their exact vectors to a temporary file; the
+``spill=False`` row keeps them in memory, and the last row reopens an
+``int8`` index with its saved vectors memory-mapped. Arguments are the
+number of vectors and the dimension::
+
+    python -m benchmarks.bench_quantized_index 200000 128
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.bench_ann_index import QUERIES, TOP_K, clustered, timed_search
+from backend.dossier.models import PsychProfileEntry
+from backend.dossier.persistence import load_index, save_index
+from backend.dossier.vector_index import VectorIndex
+
+
+def report(label: str, index: VectorIndex, queries: np.ndarray, truth_ids) -> None:
+    results, qps = timed_search(index, queries)
+    recall = np.mean(
+        [len({str(row.id) for row in got} & want) / TOP_K for got, want in zip(results, truth_ids)]
+    )
+    print(
+        f"  {label:22s} {index.nbytes / 2**20:8.1f} MiB  +{index.rerank_nbytes / 2**20:7.1f} MiB"
+        f"  {qps:9.1f} qps  recall@{TOP_K} {recall:6.3f}"
+    )
+
+
+def main(count: int, dim: int) -> None:
+    clusters = max(10, count // 2000)
+    data = clustered(count, dim, clusters=clusters, seed=0)
+    queries = clustered(QUERIES, dim, clusters=clusters, seed=1)
+    rows = [PsychProfileEntry(id=str(i), content=str(i), embedding=data[i]) for i in range(count)]
+
+    exact = VectorIndex(dim=dim)
+    exact.add_many(rows)
+    truth, _ = timed_search(exact, queries)
+    truth_ids = [{str(row.id) for row in result} for result in truth]
+    print(f"vectors={count} dim={dim}  (storage, +exact vectors held for re-ranking)")
+    report("float32", exact, queries, truth_ids)
+
+    for dtype in ("float16", "int8"):
+        for rerank_factor in (1, 4):
+            index = VectorIndex(dim=dim, dtype=dtype, rerank_factor=rerank_factor)
+            index.add_many(rows)
+            report(f"{dtype} rerank={rerank_factor}", index, queries, truth_ids)
+    in_memory = VectorIndex(dim=dim, dtype="int8", spill=False)
+    in_memory.add_many(rows)
+    report("int8 rerank=4, memory", in_memory, queries, truth_ids)
+    del in_memory
+
+    with tempfile.TemporaryDirectory() as directory:
+        save_index(exact, directory, "vectors")
+        del exact
+        # Saved items drop their embeddings; exact rows stay on disk.
+        mapped = load_index(directory, "vectors", dtype="int8")
+        mapped.rerank_factor = 4
+        report("int8 rerank=4, mmap", mapped, queries, truth_ids)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 200_000, args[1] if len(args) > 1 else 128)
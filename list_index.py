@@ -1,5 +1,10 @@
+import re
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from typing import Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Joins prepared items into one corpus; keywords containing it cannot match.
+_SEPARATOR = "\x00"
 
 
 @dataclass
@@ -50,3 +55,139 @@ class ListIndex:
                 results.append((count, item))
         results.sort(key=lambda x: x[0], reverse=True)
         return results
+
+    def prepare(self) -> "PreparedListIndex":
+        """Return a :class:`PreparedListIndex` over the same items."""
+        return PreparedListIndex(list(self.items))
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regular expression matching any of ``keywords``, factored as a trie.
+
+    Python's ``re`` tries the alternatives of ``a|b|c`` one by one at every
+    position; sharing prefixes keeps each attempt proportional to the
+    keyword length rather than the number of keywords.
+    """
+
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return build(trie)
+
+
+@dataclass
+class PreparedListIndex(ListIndex):
+    """``ListIndex`` that lowercases its items once, for repeated queries.
+
+    Results are identical to :meth:`ListIndex.search`. The lowercased items
+    are cached when the index is created, and :meth:`search_many` answers a
+    whole batch of keywords with a single pass over the corpus.
+
+    Example
+    -------
+    >>> idx = PreparedListIndex(["I love pizza", "Pizza, pizza!", "pasta"])
+    >>> idx.search_many(["pizza", "pasta"])
+    {'pizza': [(2, 'Pizza, pizza!'), (1, 'I love pizza')], 'pasta': [(1, 'pasta')]}
+    """
+
+    def __post_init__(self) -> None:
+        self.items = list(self.items)
+        self._lowered = [item.lower() for item in self.items]
+        self._corpus: Optional[str] = None
+        self._starts: List[int] = []
+
+    def add(self, item: str) -> None:
+        """Append ``item`` to the index."""
+        self.items.append(item)
+        self._lowered.append(item.lower())
+        self._corpus = None
+
+    def search(self, keyword: str) -> List[Tuple[int, str]]:
+        keyword_lower = keyword.lower()
+        results = [
+            (count, item)
+            for item, lowered in zip(self.items, self._lowered)
+            if (count := lowered.count(keyword_lower))
+        ]
+        results.sort(key=lambda x: x[0], reverse=True)
+        return results
+
+    def _prepared_corpus(self) -> str:
+        if self._corpus is None:
+            self._corpus = _SEPARATOR.join(self._lowered)
+            starts, offset = [], 0
+            for lowered in self._lowered:
+                starts.append(offset)
+                offset += len(lowered) + 1
+            self._starts = starts
+        return self._corpus
+
+    def search_many(self, keywords: Sequence[str]) -> Dict[str, List[Tuple[int, str]]]:
+        """Search for every keyword in one scan of the corpus.
+
+        A single regular expression over all keywords (a prefix trie, inside
+        a lookahead) finds every position where any keyword starts, along
+        with the longest keyword there; shorter keywords starting at the same
+        position are its prefixes. Occurrences are counted without overlap,
+        as ``str.count`` does.
+
+        Parameters
+        ----------
+        keywords:
+            Terms to look for; matching is case-insensitive.
+
+        Returns
+        -------
+        Dict[str, List[Tuple[int, str]]]
+            For each keyword, the result :meth:`search` would return.
+        """
+
+        lowered = {keyword: keyword.lower() for keyword in keywords}
+        patterns = sorted(
+            {kw for kw in lowered.values() if kw and _SEPARATOR not in kw},
+            key=len,
+            reverse=True,
+        )
+        counts: Dict[str, Dict[int, int]] = {kw: {} for kw in patterns}
+        if patterns:
+            lengths = sorted({len(kw) for kw in patterns})
+            corpus = self._prepared_corpus()
+            starts = self._starts
+            matcher = re.compile("(?=(" + _trie_pattern(patterns) + "))")
+            # Position where the next non-overlapping match of a keyword may start.
+            resume: Dict[str, int] = {}
+            for match in matcher.finditer(corpus):
+                position, longest = match.start(), match.group(1)
+                # Every keyword starting here is a prefix of the longest one.
+                for length in lengths:
+                    if length > len(longest):
+                        break
+                    kw = longest[:length]
+                    if kw in counts and position >= resume.get(kw, 0):
+                        resume[kw] = position + length
+                        row = bisect_right(starts, position) - 1
+                        counts[kw][row] = counts[kw].get(row, 0) + 1
+
+        results: Dict[str, List[Tuple[int, str]]] = {}
+        for keyword, kw in lowered.items():
+            if kw not in counts:
+                # Empty keywords and keywords spanning the separator.
+                results[keyword] = self.search(keyword)
+                continue
+            ranked = [(count, self.items[row]) for row, count in sorted(counts[kw].items())]
+            ranked.sort(key=lambda x: x[0], reverse=True)
+            results[keyword] = ranked
+        return results
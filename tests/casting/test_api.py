@@ -10,8 +10,10 @@ from fastapi.testclient import TestClient
 # Ensure the repository root is on the import path.
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from backend.casting.api import casting_call_log, router, character_store
-from backend.casting.models import CharacterCandidate
+from backend.casting import api
+from backend.casting.api import router, character_store
+from backend.casting.models import CastingCallLogStore, CharacterCandidate
+from backend.dossier.persistence import iter_characters
 
 
 @pytest.fixture
@@ -24,19 +26,19 @@ def client() -> TestClient:
 
 
 @pytest.fixture(autouse=True)
-def clear_state() -> None:
-    """Clear in-memory stores before each test."""
+def clear_state(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Give each test a fresh log and an empty character store."""
 
-    casting_call_log._logs.clear()
-    character_store._characters.clear()
+    monkeypatch.setattr(api, "casting_call_log", CastingCallLogStore())
+    character_store.clear()
 
 
 def add_candidates() -> None:
     """Populate the log with sample candidates."""
 
-    casting_call_log.add(CharacterCandidate(name="Jane"))
-    casting_call_log.add(CharacterCandidate(name="Tom"))
-    casting_call_log.add(CharacterCandidate(name="Lucy"))
+    api.casting_call_log.add(CharacterCandidate(name="Jane"))
+    api.casting_call_log.add(CharacterCandidate(name="Tom"))
+    api.casting_call_log.add(CharacterCandidate(name="Lucy"))
 
 
 def test_get_casting_call_candidates_returns_all_logs(client: TestClient) -> None:
@@ -45,35 +47,66 @@ def test_get_casting_call_candidates_returns_all_logs(client: TestClient) -> Non
     add_candidates()
     response = client.get("/casting-call/candidates")
     assert response.status_code == 200
-    assert response.json() == [
-        {
-            "candidate": {
-                "name": "Jane",
-                "source_chunks": [],
-                "duplicate": False,
-                "minor_role": False,
-            },
-            "selected": False,
-        },
-        {
-            "candidate": {
-                "name": "Tom",
-                "source_chunks": [],
-                "duplicate": False,
-                "minor_role": False,
-            },
-            "selected": False,
-        },
-        {
-            "candidate": {
-                "name": "Lucy",
-                "source_chunks": [],
-                "duplicate": False,
-                "minor_role": False,
-            },
-            "selected": False,
-        },
-    ]
+    assert response.json() == {
+        "items": [
+            {
+                "id": idx,
+                "book_id": None,
+                "candidate": {
+                    "name": name,
+                    "source_chunks": [],
+                    "duplicate": False,
+                    "minor_role": False,
+                },
+                "selected": False,
+            }
+            for idx, name in enumerate(["Jane", "Tom", "Lucy"])
+        ],
+        "next_cursor": None,
+    }
+
+
+def test_get_casting_call_candidates_paginates_with_cursor(client: TestClient) -> None:
+    """Pages follow ``next_cursor`` and filters apply server-side."""
+
+    for idx in range(5):
+        api.casting_call_log.add(
+            CharacterCandidate(name=f"Name{idx}", duplicate=idx % 2 == 1),
+            book_id="a" if idx < 3 else "b",
+        )
+    names = []
+    cursor = None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        page = client.get("/casting-call/candidates", params=params).json()
+        names += [entry["candidate"]["name"] for entry in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert names == [f"Name{idx}" for idx in range(5)]
+
+    filtered = client.get(
+        "/casting-call/candidates", params={"book_id": "a", "duplicate": "false"}
+    ).json()
+    assert [entry["id"] for entry in filtered["items"]] == [0, 2]
+    prefixed = client.get("/casting-call/candidates", params={"name_prefix": "name4"}).json()
+    assert [entry["id"] for entry in prefixed["items"]] == [4]
+    assert client.get("/casting-call/candidates", params={"cursor": "x"}).status_code == 400
+    assert client.get("/casting-call/candidates", params={"limit": 0}).status_code == 422
+
+
+def test_get_casting_call_candidates_honours_etag(client: TestClient) -> None:
+    """An unchanged log answers ``If-None-Match`` with 304."""
+
+    add_candidates()
+    etag = client.get("/casting-call/candidates").headers["etag"]
+    cached = client.get("/casting-call/candidates", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+
+    client.post("/casting-call/select", json={"selected_ids": [1]})
+    fresh = client.get("/casting-call/candidates", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
 
 
 def test_select_casting_call_candidates_updates_selection(
@@ -86,28 +119,51 @@ def test_select_casting_call_candidates_updates_selection(
         "/casting-call/select", json={"selected_ids": [0, 2]}
     )
     assert response.status_code == 200
-    assert response.json() == [
-        {
-            "candidate": {
-                "name": "Jane",
-                "source_chunks": [],
-                "duplicate": False,
-                "minor_role": False,
-            },
-            "selected": True,
-        },
-        {
-            "candidate": {
-                "name": "Lucy",
-                "source_chunks": [],
-                "duplicate": False,
-                "minor_role": False,
-            },
-            "selected": True,
-        },
-    ]
+    assert response.json() == {"selected": 2}
+
+    assert [log.selected for log in api.casting_call_log.all()] == [True, False, True]
+
+
+def test_select_all_resolves_filter_on_server(client: TestClient) -> None:
+    """``select_all`` selects every match of the filter minus exclusions."""
+
+    add_candidates()
+    api.casting_call_log.add(CharacterCandidate(name="Tim", duplicate=True))
+    response = client.post(
+        "/casting-call/select",
+        json={"select_all": True, "filter": {"duplicate": False}, "excluded_ids": [1]},
+    )
+    assert response.json() == {"selected": 2}
+    assert api.casting_call_log.ids(selected=True) == [0, 2]
+    response = client.post(
+        "/casting-call/select",
+        json={"select_all": True, "filter": {"name_prefix": "t"}},
+    )
+    assert response.json() == {"selected": 2}
+    assert [log.selected for log in api.casting_call_log.all()] == [False, True, False, True]
+
+
+def test_compile_resolves_select_all_on_server(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Compile accepts the ``select_all`` selection instead of listed ids."""
+
+    add_candidates()
+    api.casting_call_log.add(CharacterCandidate(name="Tim", duplicate=True))
+    selection = {"select_all": True, "filter": {"duplicate": False}, "excluded_ids": [1]}
+    client.post("/casting-call/select", json=selection)
+    api.casting_call_log.set_selected([0, 2, 3])
+
+    class DummyCompiler:
+        def compile(self, candidate, **options) -> dict:
+            return {"name": candidate.name}
 
-    assert [log.selected for log in casting_call_log.all()] == [True, False, True]
+    monkeypatch.setattr("backend.casting.api.compiler_factory", DummyCompiler)
+    response = client.post("/casting-call/compile", json=selection)
+    # Only selected candidates matching the filter, minus exclusions.
+    assert response.json() == [{"name": "Jane"}, {"name": "Lucy"}]
+    response = client.post("/casting-call/compile", json={"select_all": True})
+    assert [dossier["name"] for dossier in response.json()] == ["Jane", "Lucy", "Tim"]
 
 
 def test_compile_generates_dossiers_for_selected_ids(
@@ -119,7 +175,7 @@ def test_compile_generates_dossiers_for_selected_ids(
     client.post("/casting-call/select", json={"selected_ids": [0, 2]})
 
     class DummyCompiler:
-        def compile(self, candidate, retries: int = 1) -> dict:
+        def compile(self, candidate, retries: int = 1, **options) -> dict:
             return {
                 "name": candidate.name,
                 "summary": f"{candidate.name} dossier",
@@ -155,7 +211,7 @@ def test_compile_handles_partial_failures(
     client.post("/casting-call/select", json={"selected_ids": [0, 1]})
 
     class DummyCompiler:
-        def compile(self, candidate, retries: int = 1) -> dict:
+        def compile(self, candidate, retries: int = 1, **options) -> dict:
             if candidate.name == "Tom":
                 return {"name": "Tom", "error": "boom"}
             return {"name": candidate.name, "summary": f"{candidate.name} dossier"}
@@ -177,3 +233,33 @@ def test_compile_handles_partial_failures(
     stored = [char.dossier for char in character_store.all()]
     assert stored == [{"name": "Jane", "summary": "Jane dossier"}]
 
+
+
+def test_list_characters_filters_through_store(client: TestClient) -> None:
+    """``GET /characters`` returns summaries matching every filter."""
+
+    character_store.insert({"name": "Jane Eyre", "role": "protagonist"}, "jane")
+    character_store.insert({"name": "Jane Doe", "role": "extra", "parent_cid": "jane"}, "doe")
+    response = client.get("/characters", params={"name": "jane", "role": "Protagonist"})
+    assert response.json() == [
+        {
+            "character_id": "jane",
+            "name": "Jane Eyre",
+            "role": "protagonist",
+            "source_material": None,
+            "parent_cid": None,
+        }
+    ]
+    lineage = client.get("/characters", params={"parent_cid": "jane"}).json()
+    assert [c["character_id"] for c in lineage] == ["doe"]
+    assert len(client.get("/characters", params={"limit": 1}).json()) == 1
+
+
+def test_export_characters_streams_store(client: TestClient) -> None:
+    """``GET /characters/export`` returns a decodable character stream."""
+
+    character_store.insert({"name": "Jane Eyre"}, "jane")
+    response = client.get("/characters/export")
+    assert response.status_code == 200
+    assert [c.character_id for c in iter_characters(response.content)] == ["jane"]
+    assert client.get("/characters/export", params={"codec": "pickle"}).status_code == 400
@@ -0,0 +1,223 @@
+"""Tests for the asyncio casting router."""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+# Ensure the repository root is on the import path.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from backend.casting import api, async_api
+from backend.casting.api import CompilePayload
+from backend.casting.cache import DossierCache
+from backend.casting.models import CastingCallLogStore, CharacterCandidate
+from backend.casting.pipeline import DossierCompiler
+from backend.llm import AsyncLLMClient
+from benchmarks.bench_async_compile import FakeLLMServer
+from benchmarks.bench_codecs import synthetic_dossiers
+
+DOSSIER = synthetic_dossiers(1)[0]
+
+
+class SlowLLM:
+    """Async LLM stub that records how many calls overlap."""
+
+    def __init__(self, delay: float = 0.01) -> None:
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def generate(self, prompt: str, **params) -> dict:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return dict(DOSSIER, name=prompt.rsplit("Name: ", 1)[1])
+
+
+class FakeRequest:
+    """Stands in for a ``Request`` whose client leaves after ``polls`` checks."""
+
+    def __init__(self, polls: int) -> None:
+        self.polls = polls
+
+    async def is_disconnected(self) -> bool:
+        self.polls -= 1
+        return self.polls < 0
+
+
+@pytest.fixture
+def llm(monkeypatch: pytest.MonkeyPatch) -> SlowLLM:
+    monkeypatch.setattr(api, "casting_call_log", CastingCallLogStore())
+    api.character_store.clear()
+    api.compile_requests.clear()
+    ids = api.casting_call_log.add_many(
+        [CharacterCandidate(name=f"Name {idx}") for idx in range(10)]
+    )
+    api.casting_call_log.set_selected(ids[:8])
+    llm = SlowLLM()
+    monkeypatch.setattr(
+        async_api, "async_compiler_factory", lambda: DossierCompiler(llm_client=llm)
+    )
+    monkeypatch.setattr(async_api, "DISCONNECT_POLL_SECONDS", 0.001)
+    yield llm
+    api.character_store.clear()
+    api.compile_requests.clear()
+
+
+@pytest.fixture
+def client(llm: SlowLLM) -> TestClient:
+    app = FastAPI()
+    app.include_router(async_api.router)
+    return TestClient(app)
+
+
+def test_compile_bounds_concurrency_and_keeps_order(client: TestClient, llm: SlowLLM) -> None:
+    response = client.post("/casting-call/compile", json={"candidate_ids": list(range(10))})
+    assert response.status_code == 200
+    names = [f"Name {idx}" for idx in range(8)]
+    assert [dossier["name"] for dossier in response.json()] == names
+    assert [char.dossier["name"] for char in api.character_store.all()] == names
+    assert llm.peak == async_api.COMPILE_CONCURRENCY
+
+
+def test_compile_resolves_select_all_on_server(client: TestClient) -> None:
+    body = {"select_all": True, "filter": {"name_prefix": "name"}, "excluded_ids": [3]}
+    response = client.post("/casting-call/compile", json=body)
+    names = [f"Name {idx}" for idx in range(8) if idx != 3]
+    assert [dossier["name"] for dossier in response.json()] == names
+
+
+def test_other_routes_are_shared_with_sync_router(client: TestClient) -> None:
+    response = client.get("/casting-call/candidates", params={"selected": True})
+    assert [entry["id"] for entry in response.json()["items"]] == list(range(8))
+
+
+def test_compile_with_same_key_replays(client: TestClient, llm: SlowLLM) -> None:
+    body = {"candidate_ids": [0]}
+    headers = {"Idempotency-Key": "click-1"}
+    first = client.post("/casting-call/compile", json=body, headers=headers)
+    second = client.post("/casting-call/compile", json=body, headers=headers)
+    assert first.json() == second.json() == [dict(DOSSIER, name="Name 0")]
+    assert second.headers["idempotent-replayed"] == "true"
+    assert len(api.character_store.all()) == 1
+    conflict = client.post("/casting-call/compile", json={"candidate_ids": [1]}, headers=headers)
+    assert conflict.status_code == 422
+
+
+def test_many_duplicates_do_not_exhaust_the_default_executor(
+    tmp_path, llm: SlowLLM, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """More same-key duplicates than executor threads still all complete:
+    waiting for the first run must not hold a thread it needs itself."""
+
+    llm.delay = 0.05
+    cache = DossierCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(
+        async_api,
+        "async_compiler_factory",
+        lambda: DossierCompiler(llm_client=llm, cache=cache),
+    )
+    app = FastAPI()
+    app.include_router(async_api.router)
+    threads = 2
+
+    async def fire():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(threads))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return await asyncio.wait_for(
+                asyncio.gather(
+                    *(
+                        client.post(
+                            "/casting-call/compile",
+                            json={"candidate_ids": [0], "source_work": "Work"},
+                            headers={"Idempotency-Key": "double-click"},
+                        )
+                        for _ in range(threads * 3)
+                    )
+                ),
+                timeout=10,
+            )
+
+    responses = asyncio.run(fire())
+    assert [response.json() for response in responses] == [
+        [dict(DOSSIER, name="Name 0")]
+    ] * (threads * 3)
+    assert sum("idempotent-replayed" in r.headers for r in responses) == threads * 3 - 1
+    assert len(api.character_store.all()) == 1
+
+
+def test_disconnect_cancels_llm_calls_and_stores_nothing(llm: SlowLLM) -> None:
+    llm.delay = 10
+
+    async def compile_and_leave():
+        return await async_api.compile_casting_call_candidates(
+            CompilePayload(candidate_ids=list(range(8))),
+            FakeRequest(polls=2),
+            Response(),
+            idempotency_key="leaving",
+        )
+
+    response = asyncio.run(compile_and_leave())
+    assert response.status_code == async_api.CLIENT_CLOSED_REQUEST
+    assert llm.cancelled == async_api.COMPILE_CONCURRENCY
+    assert llm.in_flight == 0
+    assert api.character_store.all() == []
+    # The key is released, so a retry compiles afresh.
+    assert len(api.compile_requests) == 0
+
+
+def test_single_worker_serves_many_concurrent_compiles(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Load test: one event loop keeps far more LLM calls in flight than the
+    sync router's 40 threadpool threads."""
+
+    count = 120
+    monkeypatch.setattr(api, "casting_call_log", CastingCallLogStore())
+    api.character_store.clear()
+    ids = api.casting_call_log.add_many(
+        [CharacterCandidate(name=f"Name {idx}") for idx in range(count)]
+    )
+    api.casting_call_log.set_selected(ids)
+    app = FastAPI()
+    app.include_router(async_api.router)
+
+    async def fire(url: str):
+        llm_client = AsyncLLMClient(api_key="fake", api_url=url, max_connections=count)
+        monkeypatch.setattr(
+            async_api,
+            "async_compiler_factory",
+            lambda: DossierCompiler(llm_client=llm_client),
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            responses = await asyncio.gather(
+                *(
+                    client.post("/casting-call/compile", json={"candidate_ids": [idx]})
+                    for idx in ids
+                )
+            )
+        await llm_client.aclose()
+        return responses
+
+    try:
+        with FakeLLMServer(latency=1.0) as server:
+            responses = asyncio.run(fire(server.url))
+        assert all(response.status_code == 200 for response in responses)
+        assert all("error" not in response.json()[0] for response in responses)
+        assert len(api.character_store.all()) == count
+        assert server.peak > 40
+    finally:
+        api.character_store.clear()
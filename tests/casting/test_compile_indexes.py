@@ -9,8 +9,9 @@ from fastapi.testclient import TestClient
 # Ensure repository root on path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from backend.casting.api import casting_call_log, router
-from backend.casting.models import CharacterCandidate
+from backend.casting import api
+from backend.casting.api import router
+from backend.casting.models import CastingCallLogStore, CharacterCandidate
 from backend.casting.pipeline import DossierCompiler
 from backend.dossier.living_dossier import LivingDossier
 
@@ -56,13 +57,13 @@ def store(monkeypatch: pytest.MonkeyPatch) -> DummyStore:
 
 
 @pytest.fixture(autouse=True)
-def clear_state() -> None:
-    casting_call_log._logs.clear()
+def clear_state(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api, "casting_call_log", CastingCallLogStore())
 
 
 def add_candidates() -> None:
-    casting_call_log.add(CharacterCandidate(name="Jane"))
-    casting_call_log.add(CharacterCandidate(name="Tom"))
+    api.casting_call_log.add(CharacterCandidate(name="Jane"))
+    api.casting_call_log.add(CharacterCandidate(name="Tom"))
 
 
 def test_compile_stores_dossier_and_indexes(
@@ -0,0 +1,157 @@
+"""Stress tests for the casting stores under concurrent requests."""
+
+import os
+import random
+import sys
+import threading
+
+import pytest
+from fastapi import Response
+
+# Ensure the repository root is on the import path.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from backend.casting import api
+from backend.casting.api import (
+    CompilePayload,
+    SelectionPayload,
+    character_store,
+    compile_casting_call_candidates,
+    select_casting_call_candidates,
+)
+from backend.casting.models import CastingCallLogStore, CharacterCandidate
+
+CANDIDATES = 200
+EVENS = list(range(0, CANDIDATES, 2))
+ODDS = list(range(1, CANDIDATES, 2))
+ROUNDS = 150
+
+
+class DummyCompiler:
+    def compile(self, candidate, **options) -> dict:
+        return {"name": candidate.name, "role": "extra", "source_material": "Stress"}
+
+
+@pytest.fixture(autouse=True)
+def stores(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(api, "casting_call_log", CastingCallLogStore())
+    character_store.clear()
+    api.casting_call_log.add_many(
+        [CharacterCandidate(name=f"Name {idx}") for idx in range(CANDIDATES)]
+    )
+    monkeypatch.setattr(api, "compiler_factory", DummyCompiler)
+    interval = sys.getswitchinterval()
+    # Switch threads far more often than usual to provoke interleavings.
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+    character_store.clear()
+
+
+def run_threads(*targets) -> None:
+    errors = []
+    start = threading.Barrier(len(targets))
+
+    def wrap(target):
+        def run():
+            start.wait()
+            try:
+                target()
+            except BaseException as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        return run
+
+    threads = [threading.Thread(target=wrap(target)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_concurrent_select_compile_and_reads_stay_consistent() -> None:
+    compiled = []
+
+    def selector(seed: int):
+        rng = random.Random(seed)
+
+        def run():
+            for _ in range(ROUNDS):
+                ids = rng.choice([EVENS, ODDS])
+                response = select_casting_call_candidates(SelectionPayload(selected_ids=ids))
+                assert response == {"selected": len(ids)}
+
+        return run
+
+    def compiler():
+        for _ in range(ROUNDS // 3):
+            results = compile_casting_call_candidates(
+                CompilePayload(candidate_ids=list(range(0, CANDIDATES, 20))),
+                Response(),
+                idempotency_key=None,
+            )
+            compiled.extend(results)
+
+    def reader():
+        for _ in range(ROUNDS):
+            # One call sees one snapshot: either every even or every odd
+            # candidate is selected, never a mix of two selections.
+            selected = [log_id for log_id, log in api.casting_call_log.query() if log.selected]
+            assert selected in ([], EVENS, ODDS)
+            assert api.casting_call_log.ids(selected=True) in ([], EVENS, ODDS)
+            page, _ = api.casting_call_log.page(limit=50, selected=False)
+            assert all(not log.selected for _, log in page)
+            characters = character_store.query(role="extra", source_material="stress")
+            assert characters == character_store.all()[: len(characters)]
+
+    run_threads(selector(0), selector(1), compiler, compiler, reader, reader)
+    assert len(api.casting_call_log) == CANDIDATES
+    assert len(character_store.all()) == len(compiled)
+    assert len(character_store.query(source_material="stress")) == len(compiled)
+
+
+def test_concurrent_adds_assign_unique_ids() -> None:
+    def adder(book_id: str):
+        def run():
+            for idx in range(ROUNDS):
+                api.casting_call_log.add(CharacterCandidate(name=f"{book_id} {idx}"), book_id=book_id)
+
+        return run
+
+    run_threads(adder("a"), adder("b"), adder("c"))
+    assert len(api.casting_call_log) == CANDIDATES + 3 * ROUNDS
+    assert api.casting_call_log.ids() == list(range(CANDIDATES + 3 * ROUNDS))
+    for book_id in ("a", "b", "c"):
+        assert len(api.casting_call_log.ids(book_id=book_id)) == ROUNDS
+
+
+def test_clear_during_reads_never_exposes_torn_state() -> None:
+    done = threading.Event()
+
+    def writer():
+        for round_ in range(ROUNDS):
+            for idx in range(20):
+                character_store.insert({"name": f"Name {idx}", "role": f"round {round_}"})
+            character_store.clear()
+            api.casting_call_log.clear()
+            api.casting_call_log.add_many(
+                [CharacterCandidate(name=f"Name {idx}") for idx in range(10)], book_id="x"
+            )
+        done.set()
+
+    def reader():
+        while not done.is_set():
+            # A clear swaps the whole state at once: readers see all of the
+            # old contents or none of them.
+            characters = character_store.all()
+            assert len({char.dossier["role"] for char in characters}) <= 1
+            for char in character_store.query(name="name"):
+                assert char.dossier["name"].startswith("Name")
+            entries = api.casting_call_log.query(book_id="x")
+            assert [log.candidate.name for _, log in entries] in (
+                [],
+                [f"Name {idx}" for idx in range(10)],
+            )
+
+    run_threads(writer, reader, reader)
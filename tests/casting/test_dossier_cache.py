@@ -0,0 +1,118 @@
+import os
+import sys
+
+from fastapi import Response
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from backend.casting import api
+from backend.casting.cache import DossierCache
+from backend.casting.models import CastingCallLogStore, CharacterCandidate
+from backend.casting.pipeline import DossierCompiler, work_title
+
+
+class CountingLLM:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate(self, prompt: str) -> dict:
+        self.calls += 1
+        return {"name": "Sherlock Holmes", "source_material": "Doyle", "n": self.calls}
+
+
+def test_cache_persists_and_matches_fuzzily(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    DossierCache(path).put(
+        "Sherlock Holmes", "The Adventures of Sherlock Holmes", {"name": "SH"}
+    )
+
+    cache = DossierCache(path)
+    assert cache.get("Mr. Sherlock Holmes", "Adventures of Sherlock Holmes") == {
+        "name": "SH"
+    }
+    assert cache.get("Sherlock Holmes", "Dracula") is None
+    assert cache.get("Mycroft Holmes", "Adventures of Sherlock Holmes") is None
+    # The same name may be another character elsewhere, so a lookup without
+    # a work never hits.
+    assert cache.get("sherlock holmes") is None
+
+    cache.put("Sherlock Holmes", "The Hound of the Baskervilles", {"name": "SH2"})
+    assert cache.get("Sherlock Holmes", "Hound of the Baskervilles") == {"name": "SH2"}
+
+
+def test_compiler_reuses_cached_dossier_unless_forced(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "backend.casting.pipeline.jsonschema.validate", lambda instance, schema: None
+    )
+    llm = CountingLLM()
+    compiler = DossierCompiler(
+        llm_client=llm, cache=DossierCache(str(tmp_path / "cache.sqlite3"))
+    )
+    candidate = CharacterCandidate(name="Sherlock Holmes")
+
+    first = compiler.compile(candidate, source_work="Doyle")
+    again = compiler.compile(CharacterCandidate(name="Mr. Sherlock Holmes"), source_work="Doyle")
+    assert llm.calls == 1
+    assert again == first
+
+    refreshed = compiler.compile(candidate, source_work="Doyle", force_refresh=True)
+    assert llm.calls == 2
+    assert refreshed["n"] == 2
+    assert compiler.compile(candidate, source_work="Doyle")["n"] == 2
+
+
+def test_similar_ids_never_match(tmp_path) -> None:
+    cache = DossierCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("Elizabeth", "1342", {"book": "1342"})
+    cache.put("Holmes", "gutenberg:12345", {"book": "12345"})
+    assert cache.get("Elizabeth", "1342") == {"book": "1342"}
+    assert cache.get("Elizabeth", "11342") is None
+    assert cache.get("Elizabeth", "13420") is None
+    assert cache.get("Holmes", "gutenberg:12346") is None
+    assert cache.get("Holmes", "Gutenberg 12345") == {"book": "12345"}
+
+
+def test_work_title_reads_gutenberg_header() -> None:
+    text = "The Project Gutenberg eBook of Emma\n\nTitle: Emma  \r\nAuthor: Jane Austen\n"
+    assert work_title(text) == "Emma"
+    assert work_title("Call me Ishmael.") is None
+
+
+def test_compile_route_keys_cache_by_work_title(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(
+        "backend.casting.pipeline.jsonschema.validate", lambda instance, schema: None
+    )
+    llm = CountingLLM()
+    cache = DossierCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(
+        api, "compiler_factory", lambda: DossierCompiler(llm_client=llm, cache=cache)
+    )
+    log = CastingCallLogStore()
+    monkeypatch.setattr(api, "casting_call_log", log)
+    api.character_store.clear()
+    first = log.add(CharacterCandidate(name="John"), selected=True, book_id="1")
+    again = log.add(CharacterCandidate(name="John"), selected=True, book_id="1")
+    edition = log.add(CharacterCandidate(name="John"), selected=True, book_id="2")
+    similar = log.add(CharacterCandidate(name="John"), selected=True, book_id="11")
+    unknown = log.add(CharacterCandidate(name="John"), selected=True)
+
+    def compile_ids(ids, **body):
+        payload = api.CompilePayload(candidate_ids=ids, **body)
+        return api.compile_casting_call_candidates(payload, Response(), idempotency_key=None)
+
+    try:
+        # Book 1 has no known title, so its first candidate compiles and
+        # records the dossier's source material as the title.
+        compile_ids([first, again])
+        assert llm.calls == 1 and log.work_of("1") == "Doyle"
+        # Another edition of the same work reuses it, whatever its id.
+        log.set_work("2", "Doyle")
+        assert compile_ids([edition])[0]["n"] == 1
+        # A book with a similar id but no title, or no book at all, misses.
+        assert compile_ids([similar])[0]["n"] == 2
+        assert compile_ids([unknown])[0]["n"] == 3
+        # Each compile replaced the cached dossier for the work.
+        assert compile_ids([unknown], source_work="Doyle")[0]["n"] == 3
+        assert llm.calls == 3
+    finally:
+        api.character_store.clear()
@@ -0,0 +1,122 @@
+"""Tests for idempotent compile requests."""
+
+import os
+import sys
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Ensure the repository root is on the import path.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from backend.casting import api
+from backend.casting.idempotency import IdempotencyCache, IdempotencyConflict
+from backend.casting.models import CastingCallLogStore, CharacterCandidate
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_results_replay_until_expiry() -> None:
+    clock = FakeClock()
+    cache = IdempotencyCache(ttl=10, clock=clock)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.run("k", "body", compute) == (1, False)
+    clock.now = 9.9
+    assert cache.run("k", "body", compute) == (1, True)
+    with pytest.raises(IdempotencyConflict):
+        cache.run("k", "other body", compute)
+    clock.now = 10.0
+    assert cache.run("k", "body", compute) == (2, False)
+    assert len(cache) == 1
+
+
+def test_concurrent_duplicates_wait_for_the_first_run() -> None:
+    cache = IdempotencyCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "dossiers"
+
+    first = threading.Thread(target=lambda: cache.run("k", "body", compute))
+    first.start()
+    started.wait()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(cache.run("k", "body", compute)))
+    waiter.start()
+    release.set()
+    first.join()
+    waiter.join()
+    assert results == [("dossiers", True)] and calls == [1]
+
+
+def test_failures_are_not_cached() -> None:
+    cache = IdempotencyCache(ttl=60)
+
+    def fail():
+        raise RuntimeError("llm down")
+
+    with pytest.raises(RuntimeError):
+        cache.run("k", "body", fail)
+    assert cache.run("k", "body", lambda: "ok") == ("ok", False)
+    with pytest.raises(ValueError):
+        cache.run("", "body", fail)
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(api, "casting_call_log", CastingCallLogStore())
+    api.character_store.clear()
+    api.compile_requests.clear()
+    api.casting_call_log.add(CharacterCandidate(name="Jane"), selected=True)
+    calls = []
+
+    class CountingCompiler:
+        def compile(self, candidate, **options) -> dict:
+            calls.append(candidate.name)
+            return {"name": candidate.name, "run": len(calls)}
+
+    monkeypatch.setattr(api, "compiler_factory", CountingCompiler)
+    app = FastAPI()
+    app.include_router(api.router)
+    client = TestClient(app)
+    client.calls = calls
+    yield client
+    api.character_store.clear()
+    api.compile_requests.clear()
+
+
+def test_compile_with_same_key_runs_once(client: TestClient) -> None:
+    body = {"candidate_ids": [0]}
+    headers = {"Idempotency-Key": "click-1"}
+    first = client.post("/casting-call/compile", json=body, headers=headers)
+    second = client.post("/casting-call/compile", json=body, headers=headers)
+    assert first.json() == second.json() == [{"name": "Jane", "run": 1}]
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert client.calls == ["Jane"]
+    assert len(api.character_store.all()) == 1
+
+    conflict = client.post(
+        "/casting-call/compile", json={"candidate_ids": [0, 1]}, headers=headers
+    )
+    assert conflict.status_code == 422
+    # Without a key every request compiles.
+    client.post("/casting-call/compile", json=body)
+    assert client.calls == ["Jane", "Jane"]
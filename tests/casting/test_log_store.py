@@ -0,0 +1,98 @@
+import os
+import sys
+
+import pytest
+
+# Ensure repository root on path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from backend.casting import models
+from backend.casting.models import CastingCallLogStore, CharacterCandidate
+
+
+def build_store() -> CastingCallLogStore:
+    store = CastingCallLogStore()
+    store.add(CharacterCandidate(name="Ahab"), book_id="moby")
+    store.add(CharacterCandidate(name="Ahab", duplicate=True), book_id="moby")
+    store.add(CharacterCandidate(name="Pip", minor_role=True), book_id="moby")
+    store.add(CharacterCandidate(name="Elizabeth"), selected=True, book_id="pride")
+    return store
+
+
+def test_ids_are_stable_and_lookups_direct() -> None:
+    store = build_store()
+    assert len(store) == 4 and 3 in store and 4 not in store
+    assert store.get(2).candidate.name == "Pip"
+    assert store.get(-1) is None
+    assert store.book_of(3) == "pride"
+    assert store.books() == ["moby", "pride"]
+    assert store.add(CharacterCandidate(name="Jane")) == 4
+
+    store.clear()
+    assert len(store) == 0 and 4 not in store and store.get(0) is None
+    assert store.ids() == [] and store.books() == []
+    # Ids are never reused, not even after a clear.
+    assert store.add(CharacterCandidate(name="Tom")) == 5
+    assert store.ids() == [5] and store.page(limit=1)[0][0][0] == 5
+
+
+def test_flag_and_book_filters_use_indexes() -> None:
+    store = build_store()
+    assert store.ids() == [0, 1, 2, 3]
+    assert store.ids(book_id="moby") == [0, 1, 2]
+    assert store.ids(book_id="moby", duplicate=False, minor_role=False) == [0]
+    assert store.ids(duplicate=True) == [1]
+    assert store.ids(selected=False) == [0, 1, 2]
+    assert store.ids(book_id="missing") == []
+    assert [(i, log.candidate.name) for i, log in store.query(minor_role=True)] == [(2, "Pip")]
+
+
+def test_update_and_set_selected_keep_indexes_in_sync() -> None:
+    store = build_store()
+    store.update(0, CharacterCandidate(name="Ahab", duplicate=True))
+    assert store.ids(duplicate=True) == [0, 1]
+
+    assert store.set_selected([2, 0, 99]) == [0, 2]
+    assert [log.selected for log in store.all()] == [True, False, True, False]
+    assert store.ids(selected=True, book_id="moby") == [0, 2]
+    assert store.set_selected([]) == []
+    assert store.ids(selected=True) == []
+
+
+def test_pages_resume_after_cursor_and_track_version() -> None:
+    store = build_store()
+    page, after = store.page(limit=2)
+    assert [log_id for log_id, _ in page] == [0, 1] and after == 1
+    page, after = store.page(after, limit=2)
+    assert [log_id for log_id, _ in page] == [2, 3] and after is None
+    assert store.page(0, book_id="moby", name_prefix="p")[0][0][0] == 2
+
+    version = store.version
+    store.set_selected([1])
+    assert store.version > version
+
+
+def test_writes_copy_only_touched_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(models, "CHUNK_SIZE", 4)
+    store = CastingCallLogStore()
+    store.add(CharacterCandidate(name="Gone"))
+    store.clear()
+    ids = store.add_many(
+        [CharacterCandidate(name=f"N{idx}", minor_role=idx % 3 == 0) for idx in range(10)],
+        book_id="moby",
+    )
+    assert ids == list(range(1, 11))
+    before = store._snapshot
+    store.set_selected([2, 9])
+    after = store._snapshot
+    # Only the chunks holding ids 2 and 9 were copied.
+    assert [a is b for a, b in zip(before.chunks, after.chunks)] == [False, True, False]
+    assert store.ids(selected=True) == [2, 9]
+    assert store.ids(minor_role=True, after=3) == [4, 7, 10]
+    assert store.ids(book_id="moby", selected=False, after=8) == [10]
+    # Snapshots taken earlier still read their own state.
+    assert before.get(9).selected is False and len(before.books["moby"]) == 10
+
+    store.add(CharacterCandidate(name="Late"), book_id="moby")
+    assert store.ids(book_id="moby")[-2:] == [10, 11]
+    assert before.book_sizes["moby"] == 10
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.ann_index import IVFIndex
+from backend.dossier.vector_index import VectorIndex
+
+
+def clustered(count: int, dim: int = 16, clusters: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(clusters, size=count)
+    return centers[labels] + 0.1 * rng.normal(size=(count, dim))
+
+
+def test_ivf_trains_automatically_and_matches_exact_at_full_probe() -> None:
+    data = clustered(600)
+    exact = VectorIndex()
+    ivf = IVFIndex(nlist=10, nprobe=2, train_size=300, workers=2)
+    for i, vector in enumerate(data):
+        exact.add(_Item(i, vector))
+        ivf.add(_Item(i, vector))
+        if i == 298:
+            assert not ivf.is_trained
+    assert ivf.is_trained
+    # Rows added after training were assigned incrementally.
+    assert sum(len(lst) for lst in ivf._lists) == 600
+
+    queries = clustered(20, seed=1)
+    for query in queries:
+        assert ivf.search(query, top_k=5, nprobe=10) == exact.search(query, top_k=5)
+
+
+def test_ivf_recall_is_high_with_few_probes() -> None:
+    data = clustered(2000, clusters=40)
+    exact = VectorIndex()
+    exact.add_many([_Item(i, v) for i, v in enumerate(data)])
+    ivf = IVFIndex(nlist=40, nprobe=4)
+    ivf.add_many([_Item(i, v) for i, v in enumerate(data)])
+    ivf.train()
+
+    queries = clustered(50, clusters=40, seed=2)
+    hits = sum(
+        len(set(ivf.search(q, top_k=10)) & set(exact.search(q, top_k=10)))
+        for q in queries
+    )
+    assert hits / (50 * 10) >= 0.9
+
+
+class _Item:
+    def __init__(self, item_id: int, embedding) -> None:
+        self.id = item_id
+        self.embedding = embedding
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Item) and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
@@ -3,11 +3,22 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from backend.casting.pipeline import CharacterExtractionPipeline
+from backend.casting import pipeline as pipeline_module
+from backend.casting.pipeline import (
+    CharacterExtractionPipeline,
+    DedupState,
+    _cut_text,
+    _normalize_name,
+)
+from backend.casting.prompts import CASTING_DIRECTOR_PROMPT
+from backend.llm import ContextLengthError, LLMTimeoutError
 from backend.casting.models import (
     CharacterCandidate,
     CastingCallLog,
     CastingCallLogStore,
+    CompactCandidate,
+    bitset_to_chunks,
+    chunks_to_bitset,
 )
 
 
@@ -16,6 +27,25 @@ class DummyLLMClient:
         return {"characters": [{"name": "Alice"}, {"name": "Bob"}]}
 
 
+class ChunkNameLLMClient:
+    """Returns the comma-separated names found in the chunk text."""
+
+    def generate(self, prompt: str):
+        text = prompt.rsplit("\n", 1)[-1]
+        return {"characters": [{"name": n} for n in text.split(",") if n]}
+
+
+SPELLINGS = ["Elizabeth", "Elizabet", "Mr. Darcy", "Mr Darcy", "Jane", "Jayne",
+             "Lydia", "Wickham", "Wickam", "Kitty"]
+
+
+def shuffled_chunks(count: int):
+    return [
+        ",".join(SPELLINGS[(i * 7 + j * 3) % len(SPELLINGS)] for j in range(i % 4 + 1))
+        for i in range(count)
+    ]
+
+
 def test_extract_characters_parses_candidates():
     pipeline = CharacterExtractionPipeline(llm_client=DummyLLMClient())
     candidates = pipeline.extract_characters(["chunk one", "chunk two"])
@@ -41,6 +71,34 @@ def test_deduplicate_candidates_merges_sources():
     ]
 
 
+def test_deduplicate_candidates_fuzzy_merges_unsorted_provenance():
+    pipeline = CharacterExtractionPipeline(llm_client=DummyLLMClient())
+    raw = [
+        CharacterCandidate(name="Elizabeth", source_chunks=[5]),
+        CharacterCandidate(name="Bob", source_chunks=[2]),
+        CharacterCandidate(name="Elizabet", source_chunks=[1, 5]),
+    ]
+    deduped = pipeline.deduplicate_candidates(raw)
+    assert deduped == [
+        CharacterCandidate(name="Elizabeth", source_chunks=[1, 5]),
+        CharacterCandidate(name="Bob", source_chunks=[2]),
+    ]
+
+
+def test_bitset_round_trip_and_compact_merge():
+    assert chunks_to_bitset([3, 0, 3]) == 0b1001
+    assert bitset_to_chunks(0b1001) == [0, 3]
+
+    first = CompactCandidate.from_candidate(
+        CharacterCandidate(name="Alice", source_chunks=[0, 2])
+    )
+    first.merge(CompactCandidate(name="alice", provenance=chunks_to_bitset([2, 7])))
+    assert first.chunk_count == 3
+    assert first.to_candidate() == CharacterCandidate(
+        name="Alice", source_chunks=[0, 2, 7]
+    )
+
+
 def test_run_persists_candidates():
     class DummyPipeline(CharacterExtractionPipeline):
         def fetch_text(self, book_id, source):
@@ -96,3 +154,185 @@ def test_flag_duplicate_candidates_marks_duplicates_and_minor_roles():
             name="Charlie", source_chunks=[1, 2], duplicate=False, minor_role=False
         ),
     ]
+
+
+def test_map_reduce_matches_sequential_path():
+    pipeline = CharacterExtractionPipeline(llm_client=ChunkNameLLMClient())
+    chunks = shuffled_chunks(40)
+    sequential = pipeline.deduplicate_candidates(
+        pipeline.extract_characters(chunks)
+    )
+    parallel = pipeline.map_reduce_candidates(chunks, workers=2, shard_size=3)
+    assert parallel == sequential
+
+
+def test_dedup_state_merge_is_associative():
+    pipeline = CharacterExtractionPipeline(llm_client=ChunkNameLLMClient())
+    chunks = shuffled_chunks(12)
+
+    def state(start: int, stop: int) -> DedupState:
+        part = DedupState()
+        part.update(pipeline.extract_characters(chunks[start:stop], offset=start))
+        return part
+
+    left = state(0, 4).merge(state(4, 8)).merge(state(8, 12))
+    right = state(0, 4).merge(state(4, 8).merge(state(8, 12)))
+    assert left.finalize() == right.finalize()
+    assert [c.to_candidate() for c in left.finalize()] == (
+        pipeline.deduplicate_candidates(pipeline.extract_characters(chunks))
+    )
+
+
+def test_preview_returns_sample_then_fills_log_in_background():
+    names = [f"Name{i}" for i in range(10)]
+
+    class ChunkPipeline(CharacterExtractionPipeline):
+        def fetch_text(self, book_id, source):
+            return ""
+
+        def chunk_text(self, text):
+            return [f"{names[i]},{names[(i + 1) % 10]}" for i in range(10)]
+
+    store = CastingCallLogStore()
+    store.add(CharacterCandidate(name="Earlier"), selected=True)
+    pipeline = ChunkPipeline(llm_client=ChunkNameLLMClient(), store=store)
+
+    provisional = pipeline.run(book_id="1", preview=True, preview_chunks=2)
+    # Strata [0, 5) and [5, 10) are sampled at chunks 2 and 7.
+    assert [c.name for c in provisional] == ["Name2", "Name3", "Name7", "Name8"]
+
+    final = pipeline.wait_for_preview(timeout=5)
+    assert final is not None
+    assert sorted((c.name, c.source_chunks) for c in final) == [
+        (names[i], sorted({i, (i - 1) % 10})) for i in range(10)
+    ]
+    logs = store.all()
+    assert logs[0].candidate.name == "Earlier" and logs[0].selected
+    # Provisional entries keep their log rows; later names are appended.
+    assert [log.candidate.name for log in logs[1:5]] == [c.name for c in provisional]
+    assert {log.candidate.name: log.candidate for log in logs[1:]} == {
+        c.name: c for c in final
+    }
+
+
+def test_preview_ends_with_the_result_of_a_full_run():
+    chunks = shuffled_chunks(20)
+
+    class ChunkPipeline(CharacterExtractionPipeline):
+        def fetch_text(self, book_id, source):
+            return ""
+
+        def chunk_text(self, text):
+            return chunks
+
+    full = ChunkPipeline(llm_client=ChunkNameLLMClient()).run(book_id="1")
+    store = CastingCallLogStore()
+    pipeline = ChunkPipeline(llm_client=ChunkNameLLMClient(), store=store)
+
+    provisional = pipeline.run(book_id="1", preview=True, preview_chunks=3)
+    final = pipeline.wait_for_preview(timeout=5)
+
+    assert final == full
+    logged = [log.candidate for log in store.all()]
+    assert all(cand in logged for cand in final)
+    # Each provisional name kept its row, possibly respelled or merged.
+    assert [_normalize_name(c.name) for c in logged[: len(provisional)]] == [
+        _normalize_name(c.name) for c in provisional
+    ]
+    # Rows whose name was merged into an earlier one are flagged, not dropped.
+    merged = [c for c in logged if c not in final]
+    assert merged and all(c.duplicate for c in merged)
+
+
+class LengthLimitedLLMClient:
+    """Rejects prompts whose text is longer than ``limit`` characters."""
+
+    model = "tiny-context"
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.sizes = []
+
+    def generate(self, prompt: str):
+        text = prompt[len(CASTING_DIRECTOR_PROMPT) + 1 :]
+        self.sizes.append(len(text))
+        if len(text) > self.limit:
+            raise ContextLengthError(400, "maximum context length exceeded")
+        return {"characters": [{"name": n} for n in text.split()]}
+
+
+def test_oversized_chunks_are_bisected_and_safe_size_is_learned():
+    client = LengthLimitedLLMClient(limit=300)
+    pipeline = CharacterExtractionPipeline(llm_client=client)
+    words = [f"N{i:03d}" for i in range(200)]
+    chunks = [" ".join(words[:100]), " ".join(words[100:])]
+
+    candidates = pipeline.extract_characters(chunks)
+
+    assert [c.name for c in candidates] == words
+    assert all(c.source_chunks == [0] for c in candidates[:100])
+    assert all(c.source_chunks == [1] for c in candidates[100:])
+    learned = pipeline.safe_chunk_sizes["tiny-context"]
+    assert learned <= 300
+    # Only the first chunk was sent whole; the second was cut up front.
+    second_chunk_sizes = client.sizes[-len(_cut_text(chunks[1], learned)):]
+    assert all(size <= learned for size in second_chunk_sizes)
+    assert sum(size > 300 for size in client.sizes) == 1
+
+
+class FlakyLLMClient(LengthLimitedLLMClient):
+    """Length-limited client whose first ``timeouts`` requests time out."""
+
+    def __init__(self, limit: int, timeouts: int) -> None:
+        super().__init__(limit)
+        self.timeouts = timeouts
+
+    def generate(self, prompt: str):
+        if self.timeouts:
+            self.timeouts -= 1
+            self.sizes.append(None)
+            raise LLMTimeoutError("timed out")
+        return super().generate(prompt)
+
+
+def test_timeouts_are_retried_without_shrinking_safe_size():
+    client = FlakyLLMClient(limit=1_000, timeouts=1)
+    pipeline = CharacterExtractionPipeline(
+        llm_client=client, safe_chunk_sizes={"tiny-context": 600}
+    )
+    chunk = " ".join(f"N{i:03d}" for i in range(100))
+
+    candidates = pipeline.extract_characters([chunk])
+
+    assert len(candidates) == 100
+    # The timed-out piece was resent whole, not bisected.
+    assert client.sizes == [None, len(chunk)]
+    assert pipeline.safe_chunk_sizes["tiny-context"] == 600
+
+
+def test_persistent_timeouts_split_only_that_chunk():
+    client = FlakyLLMClient(limit=1_000, timeouts=2)
+    pipeline = CharacterExtractionPipeline(llm_client=client)
+    chunk = " ".join(f"N{i:03d}" for i in range(100))
+
+    candidates = pipeline.extract_characters([chunk])
+
+    assert [c.name for c in candidates] == chunk.split()
+    assert client.sizes[2] < len(chunk)
+    assert pipeline.safe_chunk_sizes == {}
+
+
+def test_safe_size_recovers_after_successes(monkeypatch):
+    monkeypatch.setattr(pipeline_module, "SAFE_SIZE_RECOVERY", 3)
+    client = LengthLimitedLLMClient(limit=1_000)
+    pipeline = CharacterExtractionPipeline(
+        llm_client=client, safe_chunk_sizes={"tiny-context": 200}
+    )
+    words = [f"N{i:03d}" for i in range(60)]
+    chunks = [" ".join(words)] * 6
+
+    pipeline.extract_characters(chunks)
+
+    assert pipeline.safe_chunk_sizes["tiny-context"] > 300
+    # Early chunks were cut to the old safe size, later ones sent whole.
+    assert max(client.sizes[:2]) <= 200 and client.sizes[-1] == len(chunks[0])
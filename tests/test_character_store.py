@@ -19,3 +19,24 @@ def test_insert_duplicate_id_raises():
     assert cid == "abc"
     with pytest.raises(ValueError):
         store.insert({"name": "Charlie"}, character_id="abc")
+
+
+def test_query_combines_indexed_filters():
+    store = CharacterStore()
+    store.insert({"name": "Captain Ahab", "role": "Antagonist", "source_material": "Moby-Dick"}, "ahab")
+    store.insert({"name": "Ishmael", "role": "narrator", "source_material": "Moby-Dick"}, "ishmael")
+    store.insert(
+        {"name": "Ahab the Younger", "role": "antagonist", "parent_cid": "ahab"}, "remix"
+    )
+
+    def ids(**filters):
+        return [c.character_id for c in store.query(**filters)]
+
+    assert ids() == ["ahab", "ishmael", "remix"]
+    assert ids(name="ahab") == ["ahab", "remix"]
+    assert ids(name="captain AHAB") == ["ahab"]
+    assert ids(role="  ANTAGONIST ") == ["ahab", "remix"]
+    assert ids(role="antagonist", source_material="moby-dick") == ["ahab"]
+    assert ids(parent_cid="ahab") == ["remix"]
+    assert ids(source_material="Moby-Dick", limit=1) == ["ahab"]
+    assert ids(name="starbuck") == []
@@ -0,0 +1,80 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier import codecs
+from backend.dossier.codecs import CompactCodec, JSONCodec, get_codec, schema_dictionary
+from backend.dossier.models import CharacterStore
+from backend.dossier.persistence import (
+    export_characters,
+    iter_characters,
+    load_characters,
+    save_characters,
+)
+from backend.dossier.sqlite_store import SQLiteCharacterStore
+
+DOSSIER = {
+    "name": "Ahab",
+    "role": "antagonist",
+    "source_material": "Moby-Dick",
+    "blueprint": {
+        "verifiable_facts": ["Lost a leg to the whale", "Captains the Pequod"],
+        "linguistic_profile": {"vocabulary_syntax": "Archaic", "rhythm_imagery": "Biblical"},
+    },
+    "inner_world": {"core_motivation": "Revenge", "primal_fear": "Impotence"},
+}
+
+
+@pytest.mark.parametrize("codec", [JSONCodec(), CompactCodec()])
+def test_codecs_round_trip(codec) -> None:
+    assert codec.decode(codec.encode(DOSSIER)) == DOSSIER
+
+
+def test_json_codec_matches_stdlib_without_orjson(monkeypatch) -> None:
+    fast = JSONCodec().encode(DOSSIER)
+    monkeypatch.setattr(codecs, "orjson", None)
+    assert json.loads(fast) == DOSSIER
+    assert JSONCodec().decode(fast) == DOSSIER
+
+
+def test_schema_dictionary_shrinks_frames() -> None:
+    dictionary = schema_dictionary("json")
+    assert b'"verifiable_facts"' in dictionary
+    compact = CompactCodec(serializer="json", compressor="zlib")
+    frame = compact.encode(DOSSIER)
+    assert len(frame) < len(JSONCodec().encode(DOSSIER)) / 2
+
+
+def test_compact_frames_reject_other_dictionaries(tmp_path) -> None:
+    schema = tmp_path / "schema.json"
+    schema.write_text(json.dumps({"type": "object", "properties": {"other": {}}}))
+    frame = CompactCodec(schema_path=schema).encode(DOSSIER)
+    with pytest.raises(ValueError):
+        CompactCodec().decode(frame)
+    with pytest.raises(ValueError):
+        CompactCodec().decode(b"\xff" + frame[1:])
+    with pytest.raises(ValueError):
+        get_codec("pickle")
+
+
+@pytest.mark.parametrize("codec", ["json", "compact"])
+def test_characters_export_and_reload(tmp_path, codec) -> None:
+    store = CharacterStore()
+    store.insert(DOSSIER, character_id="ahab")
+    store.insert({"name": "Ishmael"}, character_id="ishmael")
+    data = export_characters(store.all(), codec)
+    assert [c.character_id for c in iter_characters(data)] == ["ahab", "ishmael"]
+    with pytest.raises(ValueError):
+        list(iter_characters(data[:-3]))
+
+    save_characters(store, tmp_path / "characters.bin", codec)
+    loaded = load_characters(tmp_path / "characters.bin")
+    assert loaded.all() == store.all()
+    sqlite_store = SQLiteCharacterStore(str(tmp_path / "characters.sqlite3"))
+    load_characters(tmp_path / "characters.bin", store=sqlite_store)
+    assert sqlite_store.get("ahab").dossier == DOSSIER
+    sqlite_store.close()
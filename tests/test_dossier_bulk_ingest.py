@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.embeddings import HashingEmbeddingProvider
+from backend.dossier.indexes import InvertedIndex
+from backend.dossier.living_dossier import LivingDossier
+from backend.dossier.partitioned import PartitionedIndex
+from backend.dossier.vector_index import VectorIndex
+
+
+def make_dossier(i: int) -> dict:
+    return {
+        "name": f"Character {i}",
+        "inner_world": {
+            "core_motivation": f"Motivation number {i}",
+            "memory_journal": [{"event": f"Event {i}", "tags": [f"t{i % 3}"]}],
+        },
+        "blueprint": {"linguistic_profile": {"rhythm_imagery": f"Imagery {i}"}},
+    }
+
+
+def build() -> LivingDossier:
+    provider = HashingEmbeddingProvider(dim=32)
+    return LivingDossier(
+        psych_profile_index=PartitionedIndex(InvertedIndex),
+        linguistic_profile_index=InvertedIndex(),
+        psych_vector_index=VectorIndex(),
+        embedding_provider=provider,
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bulk_ingest_matches_sequential_store(workers: int) -> None:
+    dossiers = [make_dossier(i) for i in range(25)]
+    ids = [f"c{i % 10}" for i in range(25)]
+    sequential = build()
+    for dossier, character_id in zip(dossiers, ids):
+        sequential.store_dossier(dossier, character_id)
+    sequential.compact()
+
+    bulk = build()
+    bulk.store_dossiers(dossiers, character_ids=ids, workers=workers, chunk_size=4)
+    bulk.compact()
+
+    for name in ("psych_profile_index", "linguistic_profile_index", "psych_vector_index"):
+        expected = getattr(sequential, name).live_items()
+        got = getattr(bulk, name).live_items()
+        assert sorted((e.id, e.content, e.embedding) for e in got) == sorted(
+            (e.id, e.content, e.embedding) for e in expected
+        )
+    assert [e.content for e in bulk.search("event", character_id="c3", top_k=10)] == [
+        "Event: Event 23"
+    ]
+
+
+def test_bulk_ingest_validates_character_ids() -> None:
+    with pytest.raises(ValueError):
+        build().store_dossiers([make_dossier(0)], character_ids=["a", "b"])
+    assert build().store_dossiers([], workers=2) == 0
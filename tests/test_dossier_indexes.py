@@ -0,0 +1,59 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.indexes import InvertedIndex
+from backend.dossier.living_dossier import LivingDossier
+from backend.dossier.models import PsychProfileEntry
+
+
+def test_inverted_index_ranks_by_bm25() -> None:
+    index = InvertedIndex()
+    for text in [
+        "The storm broke over the harbour",
+        "Fear of the sea, fear of the storm, fear of drowning",
+        "A quiet afternoon in the garden",
+        "Fear of failure",
+    ]:
+        index.add(text)
+
+    assert index.search("fear storm", top_k=1) == [
+        "Fear of the sea, fear of the storm, fear of drowning",
+    ]
+    # Equal term frequency: the shorter entry scores higher.
+    assert index.search("storm") == [
+        "The storm broke over the harbour",
+        "Fear of the sea, fear of the storm, fear of drowning",
+    ]
+    assert index.search("lighthouse") == []
+
+
+def test_inverted_index_ties_keep_insertion_order() -> None:
+    index = InvertedIndex()
+    for text in ["red door", "blue door", "green door"]:
+        index.add(text)
+    assert index.search("door", top_k=2) == ["red door", "blue door"]
+
+
+def test_inverted_index_drops_into_living_dossier() -> None:
+    dossier = LivingDossier(
+        psych_profile_index=InvertedIndex(),
+        linguistic_profile_index=InvertedIndex(),
+    )
+    dossier.store_dossier(
+        {
+            "inner_world": {
+                "core_motivation": "Seek justice for the drowned",
+                "primal_fear": "Deep water",
+            },
+            "blueprint": {"linguistic_profile": {"rhythm_imagery": "Sea imagery"}},
+        }
+    )
+    results = dossier.psych_profile_index.search("water")
+    assert results == [
+        PsychProfileEntry(id="primal_fear", content="Deep water", metadata={"kind": "trait"})
+    ]
+    assert [e.id for e in dossier.linguistic_profile_index.search("imagery")] == [
+        "rhythm_imagery"
+    ]
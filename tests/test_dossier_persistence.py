@@ -0,0 +1,166 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.embeddings import HashingEmbeddingProvider
+from backend.dossier.indexes import InvertedIndex
+from backend.dossier.living_dossier import LivingDossier
+from backend.dossier.models import PsychProfileEntry
+from backend.dossier.persistence import (
+    load_index,
+    load_living_dossier,
+    save_index,
+    save_living_dossier,
+)
+from backend.dossier.vector_index import VectorIndex
+
+DOSSIER = {
+    "inner_world": {
+        "backstory": "Raised by lighthouse keepers on a storm coast",
+        "core_motivation": "Keep the light burning",
+        "primal_fear": "Drowning in deep water",
+        "memory_journal": [
+            {"event": "Shipwreck", "emotion": "terror", "sensory_anchor": "salt"}
+        ],
+    },
+    "blueprint": {
+        "linguistic_profile": {
+            "vocabulary_syntax": "Nautical slang, clipped sentences",
+            "rhythm_imagery": "Storm and tide imagery",
+        }
+    },
+}
+
+
+def test_round_trip_memory_maps_indexes(tmp_path) -> None:
+    provider = HashingEmbeddingProvider(dim=64)
+    original = LivingDossier(
+        psych_profile_index=InvertedIndex(),
+        linguistic_profile_index=VectorIndex(embed=provider.embed),
+        embedding_provider=provider,
+    )
+    original.store_dossier(DOSSIER)
+    save_living_dossier(original, tmp_path)
+
+    assert sorted(p.name for p in (tmp_path / "indices").iterdir()) == [
+        "linguistic_profile_index.json",
+        "linguistic_profile_index.npy",
+        "psych_profile_index.json",
+        "psych_profile_index.postings",
+    ]
+
+    loaded = load_living_dossier(tmp_path)
+    psych = loaded.psych_profile_index
+    linguistic = loaded.linguistic_profile_index
+    assert isinstance(psych._lengths, np.memmap)
+    assert isinstance(linguistic._matrix, np.memmap)
+
+    for query in ["deep water", "storm", "light"]:
+        assert psych.search(query) == original.psych_profile_index.search(query)
+    query = provider.embed("tide imagery")
+    assert [e.id for e in linguistic.search(query)] == [
+        e.id for e in original.linguistic_profile_index.search(query)
+    ]
+
+
+def test_loaded_indexes_accept_new_entries(tmp_path) -> None:
+    original = LivingDossier(
+        psych_profile_index=InvertedIndex(),
+        linguistic_profile_index=VectorIndex(dim=2),
+    )
+    original.store_dossier({"inner_world": {"primal_fear": "Deep water"}})
+    original.linguistic_profile_index.add(PsychProfileEntry("a", "a", embedding=[1, 0]))
+    save_living_dossier(original, tmp_path)
+
+    loaded = load_living_dossier(tmp_path)
+    loaded.psych_profile_index.add(PsychProfileEntry("calm", "Calm water"))
+    assert [e.id for e in loaded.psych_profile_index.search("water")] == [
+        "primal_fear",
+        "calm",
+    ]
+    loaded.linguistic_profile_index.add(PsychProfileEntry("b", "b", embedding=[0, 1]))
+    assert [e.id for e in loaded.linguistic_profile_index.search([0, 1], top_k=1)] == ["b"]
+
+
+def test_loaded_dossier_saves_back_to_its_own_root(tmp_path) -> None:
+    provider = HashingEmbeddingProvider(dim=64)
+    original = LivingDossier(
+        psych_profile_index=InvertedIndex(),
+        linguistic_profile_index=VectorIndex(embed=provider.embed),
+        embedding_provider=provider,
+        compaction_threshold=None,
+    )
+    for name in ("Keeper", "Sailor"):
+        original.store_dossier(dict(DOSSIER, name=name))
+    save_living_dossier(original, tmp_path)
+
+    loaded = load_living_dossier(tmp_path, compaction_threshold=None)
+    assert loaded.delete_dossier("Keeper") == 6
+    # Saving compacts, so the files shrink while ``loaded`` still maps them.
+    save_living_dossier(loaded, tmp_path)
+    assert not list((tmp_path / "indices").glob("*.tmp"))
+
+    query = provider.embed("tide imagery")
+    reloaded = load_living_dossier(tmp_path)
+    for dossier in (loaded, reloaded):
+        hits = dossier.psych_profile_index.search("storm")
+        assert [e.metadata["dossier_name"] for e in hits] == ["Sailor"]
+        hits = dossier.linguistic_profile_index.search(query, top_k=10)
+        assert {e.metadata["dossier_name"] for e in hits} == {"Sailor"}
+
+
+def test_quantized_vector_index_reopens_with_exact_rerank(tmp_path) -> None:
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(200, 16))
+    exact = VectorIndex()
+    quantized = VectorIndex(dtype="int8", rerank_factor=8)
+    entries = [
+        PsychProfileEntry(id=f"e{i}", content=f"e{i}", embedding=v.tolist())
+        for i, v in enumerate(vectors)
+    ]
+    exact.add_many(entries)
+    quantized.add_many(entries)
+    dossier = LivingDossier(psych_profile_index=quantized)
+    save_living_dossier(dossier, tmp_path)
+
+    loaded = load_living_dossier(tmp_path).psych_profile_index
+    assert loaded.dtype == "int8"
+    assert loaded._exact is not None
+    query = rng.normal(size=16)
+    assert [e.id for e in loaded.search(query, top_k=5)] == [
+        e.id for e in exact.search(query, top_k=5)
+    ]
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_quantized_index_loaded_from_disk_accepts_new_entries(tmp_path, dtype) -> None:
+    rng = np.random.default_rng(4)
+    vectors = rng.normal(size=(60, 8))
+    entries = [
+        PsychProfileEntry(id=f"e{i}", content=f"e{i}", embedding=v.tolist())
+        for i, v in enumerate(vectors)
+    ]
+    exact = VectorIndex()
+    exact.add_many(entries)
+    saved = VectorIndex()
+    saved.add_many(entries[:40])
+    save_index(saved, tmp_path, "vectors")
+
+    loaded = load_index(tmp_path, "vectors", dtype=dtype)
+    # Exact rows are memory-mapped, and new rows join them in the spill file.
+    assert loaded.rerank_nbytes == 0
+    loaded.add_many(entries[40:])
+    assert loaded.rerank_nbytes == 0
+    for item in entries:
+        item.embedding = None
+    for query in rng.normal(size=(5, 8)):
+        assert [e.id for e in loaded.search(query, top_k=5)] == [
+            e.id for e in exact.search(query, top_k=5)
+        ]
+    loaded.delete(entries[0])
+    compacted = loaded.compacted()
+    assert [e.id for e in compacted.search(vectors[50], top_k=1)] == ["e50"]
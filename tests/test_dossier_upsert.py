@@ -0,0 +1,169 @@
+import copy
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.ann_index import IVFIndex
+from backend.dossier.embeddings import HashingEmbeddingProvider
+from backend.dossier.indexes import InvertedIndex, ListIndex
+from backend.dossier.living_dossier import LivingDossier
+from backend.dossier.models import PsychProfileEntry
+from backend.dossier.partitioned import PartitionedIndex
+from backend.dossier.persistence import load_living_dossier, save_living_dossier
+from backend.dossier.vector_index import VectorIndex
+
+DOSSIER = {
+    "name": "Ahab",
+    "inner_world": {
+        "core_motivation": "Hunt the white whale",
+        "primal_fear": "Drowning in deep water",
+        "memory_journal": [{"event": "Lost a leg", "tags": ["whale"]}],
+    },
+    "blueprint": {"linguistic_profile": {"rhythm_imagery": "Biblical cadence"}},
+}
+
+
+class CountingProvider(HashingEmbeddingProvider):
+    def __init__(self) -> None:
+        super().__init__(dim=32, cache_size=0)
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return super().encode(texts)
+
+
+def test_restoring_a_dossier_only_touches_changed_entries() -> None:
+    provider = CountingProvider()
+    living = LivingDossier(
+        psych_profile_index=InvertedIndex(),
+        psych_vector_index=VectorIndex(),
+        embedding_provider=provider,
+        compaction_threshold=None,
+    )
+    assert living.store_dossier(DOSSIER) == 4
+    assert living.store_dossier(copy.deepcopy(DOSSIER)) == 0
+
+    edited = copy.deepcopy(DOSSIER)
+    edited["inner_world"]["primal_fear"] = "Losing the whale forever"
+    del edited["inner_world"]["memory_journal"]
+    provider.encoded.clear()
+    assert living.store_dossier(edited) == 1
+    assert provider.encoded == ["Losing the whale forever"]
+
+    index = living.psych_profile_index
+    assert len(index) == 4 and index.tombstones == 2
+    assert [e.content for e in index.search("whale", top_k=10)] == [
+        "Hunt the white whale",
+        "Losing the whale forever",
+    ]
+    assert living.search("drowning") == []
+    vector_hits = living.psych_vector_index.search(provider.embed("drowning deep water"), top_k=10)
+    assert {e.id for e in vector_hits} == {"core_motivation", "primal_fear"}
+
+
+def test_delete_and_compaction_keep_search_results() -> None:
+    living = LivingDossier(
+        psych_profile_index=PartitionedIndex(InvertedIndex), compaction_threshold=None
+    )
+    for name in ("ahab", "ishmael", "queequeg"):
+        living.store_dossier(DOSSIER, character_id=name)
+    assert living.delete_dossier("ishmael") == 4
+    assert living.delete_dossier("ishmael") == 0
+    before = living.search("whale", top_k=10)
+    assert {e.metadata["character_id"] for e in before} == {"ahab", "queequeg"}
+
+    living.compact()
+    index = living.psych_profile_index
+    assert index.tombstones == 0
+    assert set(index.partitions) == {"ahab", "queequeg"}
+    assert living.search("whale", top_k=10) == before
+
+
+def test_dossiers_sharing_an_entry_are_replaced_independently() -> None:
+    living = LivingDossier(psych_profile_index=InvertedIndex(), compaction_threshold=None)
+    shared = {"core_motivation": "Find water"}
+    living.store_dossier({"name": "A", "inner_world": dict(shared)})
+    living.store_dossier({"name": "B", "inner_world": dict(shared)})
+    living.store_dossier({"name": "A", "inner_world": {"core_motivation": "Find land"}})
+
+    hits = living.search("water", top_k=10)
+    assert [e.metadata["dossier_name"] for e in hits] == ["B"]
+    assert [e.metadata["dossier_name"] for e in living.search("land")] == ["A"]
+
+
+def test_namesakes_from_different_works_are_kept_apart() -> None:
+    living = LivingDossier(psych_profile_index=InvertedIndex(), compaction_threshold=None)
+    first = {"name": "John", "source_material": "Book A", "inner_world": {"bond": "His brother"}}
+    second = {"name": "John", "source_material": "Book B", "inner_world": {"bond": "His ship"}}
+    living.store_dossier(first)
+    living.store_dossier(second)
+    assert [e.content for e in living.search("brother")] == ["His brother"]
+    assert living.store_dossiers([first, second], workers=1) == 0
+
+    assert living.delete_dossier("John", source_material="Book A") == 1
+    assert living.search("brother") == []
+    assert [e.content for e in living.search("ship")] == ["His ship"]
+
+
+def test_dossiers_without_an_owner_are_appended() -> None:
+    living = LivingDossier(psych_profile_index=InvertedIndex(), compaction_threshold=None)
+    living.store_dossier({"inner_world": {"bond": "A brother"}})
+    living.store_dossier({"inner_world": {"bond": "A sister"}})
+    living.store_dossiers([{"inner_world": {"bond": "A cousin"}}] * 2, workers=1)
+    assert len(living.psych_profile_index) == 4
+    assert living.psych_profile_index.tombstones == 0
+
+
+def test_background_compaction_triggers_past_threshold() -> None:
+    living = LivingDossier(compaction_threshold=0.25)
+    living.store_dossier(DOSSIER)
+    original = living.psych_profile_index
+    edited = copy.deepcopy(DOSSIER)
+    edited["inner_world"]["core_motivation"] = "Rest at last"
+    edited["inner_world"]["primal_fear"] = "Nothing"
+    living.store_dossier(edited)
+    assert living.wait_for_compaction(timeout=5)
+    assert living.psych_profile_index is not original
+    assert isinstance(living.psych_profile_index, ListIndex)
+    assert living.psych_profile_index.tombstones == 0
+    assert [e.content for e in living.psych_profile_index._items] == [
+        "Event: Lost a leg",
+        "Rest at last",
+        "Nothing",
+    ]
+
+
+def test_vector_tombstones_and_compaction() -> None:
+    rng = np.random.default_rng(0)
+    entries = [
+        PsychProfileEntry(id=f"e{i}", content=f"e{i}", embedding=rng.normal(size=8).tolist())
+        for i in range(300)
+    ]
+    for index in (VectorIndex(dtype="int8"), IVFIndex(nlist=8, train_size=100)):
+        index.add_many(entries)
+        query = np.asarray(entries[7].embedding)
+        assert index.search(query, top_k=1)[0].id == "e7"
+        assert index.delete(entries[7])
+        assert not index.delete(entries[7])
+        assert "e7" not in {e.id for e in index.search(query, top_k=10)}
+        compacted = index.compacted()
+        assert len(compacted) == 299
+        assert [e.id for e in compacted.search(query, top_k=10)] == [
+            e.id for e in index.search(query, top_k=10)
+        ]
+
+
+def test_reloaded_dossier_upserts_against_saved_entries(tmp_path) -> None:
+    living = LivingDossier(psych_profile_index=InvertedIndex(), compaction_threshold=None)
+    living.store_dossier(DOSSIER)
+    living.store_dossier({**DOSSIER, "inner_world": {"primal_fear": "Calm seas"}})
+    save_living_dossier(living, tmp_path)
+
+    loaded = load_living_dossier(tmp_path)
+    assert loaded.psych_profile_index.tombstones == 0
+    assert [e.content for e in loaded.psych_profile_index._items] == ["Calm seas"]
+    assert loaded.store_dossier({**DOSSIER, "inner_world": {"primal_fear": "Calm seas"}}) == 0
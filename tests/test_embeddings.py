@@ -0,0 +1,62 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.embeddings import HashingEmbeddingProvider
+from backend.dossier.living_dossier import LivingDossier
+from backend.dossier.vector_index import VectorIndex
+
+
+class CountingProvider(HashingEmbeddingProvider):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        return super().encode(texts)
+
+
+def test_hashing_embeddings_are_stable_and_similarity_aware() -> None:
+    provider = HashingEmbeddingProvider(dim=512)
+    vectors = provider.embed_batch(
+        ["fear of deep water", "afraid of the deep waters", "a sunny picnic"]
+    )
+    assert vectors.shape == (3, 512)
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+    fresh = HashingEmbeddingProvider(dim=512).embed("fear of deep water")
+    assert np.array_equal(fresh, vectors[0])
+
+
+def test_embed_batch_caches_by_content_and_batches_misses() -> None:
+    provider = CountingProvider(dim=64, batch_size=2)
+    provider.embed_batch(["a", "b", "a", "c"])
+    assert provider.batches == [["a", "b"], ["c"]]
+    provider.embed_batch(["c", "d"])
+    assert provider.batches[-1] == ["d"]
+
+
+def test_store_dossier_embeds_all_entries_in_one_batch() -> None:
+    provider = CountingProvider(dim=128)
+    dossier = LivingDossier(
+        psych_profile_index=VectorIndex(embed=provider.embed),
+        linguistic_profile_index=VectorIndex(embed=provider.embed),
+        embedding_provider=provider,
+    )
+    dossier.store_dossier(
+        {
+            "inner_world": {
+                "core_motivation": "Protect the lighthouse",
+                "primal_fear": "Drowning in deep water",
+            },
+            "blueprint": {"linguistic_profile": {"rhythm_imagery": "Nautical slang"}},
+        }
+    )
+    assert len(provider.batches) == 1
+    assert len(provider.batches[0]) == 3
+    assert dossier.psych_profile_index.search("deep water", top_k=1)[0].id == "primal_fear"
@@ -0,0 +1,115 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.embeddings import HashingEmbeddingProvider
+from backend.dossier.fusion import reciprocal_rank_fusion
+from backend.dossier.indexes import InvertedIndex
+from backend.dossier.living_dossier import LivingDossier
+from backend.dossier.partitioned import PartitionedIndex
+from backend.dossier.persistence import load_living_dossier, save_living_dossier
+from backend.dossier.vector_index import VectorIndex
+
+DOSSIER = {
+    "inner_world": {
+        "core_motivation": "Hunt the white whale",
+        "primal_fear": "Drowning in deep water",
+        "memory_journal": [
+            {"event": "Lost a leg to the whale", "emotion": "rage", "tags": ["whale"]},
+            {"event": "Storm off the cape", "emotion": "dread", "tags": ["sea"]},
+        ],
+    },
+    "blueprint": {
+        "linguistic_profile": {
+            "signature_phrase": "From hell's heart I stab at thee",
+            "rhythm_imagery": "Biblical cadence, ocean imagery",
+        }
+    },
+}
+
+
+def hybrid_dossier(**kwargs) -> LivingDossier:
+    provider = HashingEmbeddingProvider(dim=128)
+    living = LivingDossier(
+        psych_profile_index=InvertedIndex(),
+        linguistic_profile_index=InvertedIndex(),
+        psych_vector_index=VectorIndex(embed=provider.embed),
+        linguistic_vector_index=VectorIndex(embed=provider.embed),
+        embedding_provider=provider,
+        **kwargs,
+    )
+    living.store_dossier(DOSSIER)
+    return living
+
+
+def test_reciprocal_rank_fusion_rewards_agreement() -> None:
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert [item for item, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    assert len(reciprocal_rank_fusion([["a", "b"], ["c"]], top_k=1)) == 1
+
+
+def test_hybrid_search_fuses_lexical_and_vector_hits() -> None:
+    living = hybrid_dossier()
+    results = living.hybrid_search("hell's heart", top_k=3)
+    assert results[0].id == "signature_phrase"
+    # Each entry appears once even though both indexes return it.
+    ids = [e.id for e in living.hybrid_search("whale", top_k=10)]
+    assert len(ids) == len(set(ids)) == 6
+    assert ids[0] in {"core_motivation", "memory_journal_0"}
+
+
+def test_batch_queries_match_single_queries() -> None:
+    living = hybrid_dossier()
+    queries = ["whale", "deep water", "ocean imagery"]
+    batch = living.hybrid_search(queries, top_k=4)
+    assert batch == [living.hybrid_search(query, top_k=4) for query in queries]
+    assert living.hybrid_search([], top_k=4) == []
+
+
+def test_entries_drop_embeddings_once_a_quantized_index_holds_them() -> None:
+    provider = HashingEmbeddingProvider(dim=128)
+    living = LivingDossier(
+        psych_profile_index=InvertedIndex(),
+        psych_vector_index=VectorIndex(dtype="int8"),
+        embedding_provider=provider,
+    )
+    living.store_dossier(DOSSIER)
+    entries = living.psych_profile_index.live_items()
+    assert entries and all(e.embedding is None for e in entries)
+    assert living.psych_vector_index.rerank_nbytes == 0
+    assert living.hybrid_search("white whale", top_k=1)[0].id == "core_motivation"
+
+
+def test_hybrid_search_applies_filters() -> None:
+    living = hybrid_dossier()
+    memories = living.hybrid_search("whale", top_k=10, kind="memory_journal")
+    assert {e.id for e in memories} == {"memory_journal_0", "memory_journal_1"}
+    assert [e.id for e in living.hybrid_search("whale", tags=["sea"])] == ["memory_journal_1"]
+
+    provider = HashingEmbeddingProvider(dim=64)
+    partitioned = LivingDossier(
+        psych_profile_index=PartitionedIndex(InvertedIndex),
+        psych_vector_index=PartitionedIndex(lambda: VectorIndex(embed=provider.embed)),
+        embedding_provider=provider,
+    )
+    partitioned.store_dossier(DOSSIER, character_id="ahab")
+    partitioned.store_dossier(DOSSIER, character_id="starbuck")
+    results = partitioned.hybrid_search(
+        ["whale", "storm"], top_k=10, character_id="starbuck", entry_types=["psych_profile"]
+    )
+    assert all(e.metadata["character_id"] == "starbuck" for batch in results for e in batch)
+    assert len(results[0]) == 4
+
+
+def test_vector_companions_round_trip(tmp_path) -> None:
+    living = hybrid_dossier()
+    save_living_dossier(living, tmp_path)
+    loaded = load_living_dossier(tmp_path, embedding_provider=living.embedding_provider)
+    assert isinstance(loaded.psych_vector_index, VectorIndex)
+    assert [e.id for e in loaded.hybrid_search("deep water", top_k=3)] == [
+        e.id for e in living.hybrid_search("deep water", top_k=3)
+    ]
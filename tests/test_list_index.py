@@ -0,0 +1,35 @@
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from list_index import ListIndex, PreparedListIndex
+
+
+def test_prepared_search_matches_list_index() -> None:
+    items = ["I love pizza", "Pizza, PIZZA and pasta", "aaaa", "nothing here"]
+    plain = ListIndex(items)
+    prepared = plain.prepare()
+    for keyword in ["pizza", "PASTA", "aa", "a", "", "missing"]:
+        assert prepared.search(keyword) == plain.search(keyword)
+
+
+def test_search_many_matches_per_keyword_loop() -> None:
+    rng = random.Random(0)
+    words = ["storm", "sea", "whale", "ship", "Sea-salt", "ahab", "aha", "ha"]
+    items = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 12))) for _ in range(300)]
+    keywords = ["sea", "SEA", "whale", "aha", "ha", "a", "sea-salt", "", "absent", "p s"]
+    plain = ListIndex(items)
+    prepared = PreparedListIndex(items)
+    results = prepared.search_many(keywords)
+    assert list(results) == list(dict.fromkeys(keywords))
+    for keyword in keywords:
+        assert results[keyword] == plain.search(keyword)
+
+
+def test_added_items_are_searchable() -> None:
+    prepared = PreparedListIndex(["calm sea"])
+    assert prepared.search_many(["sea"]) == {"sea": [(1, "calm sea")]}
+    prepared.add("Sea, sea, SEA")
+    assert prepared.search_many(["sea"]) == {"sea": [(3, "Sea, sea, SEA"), (1, "calm sea")]}
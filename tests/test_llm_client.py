@@ -0,0 +1,101 @@
+import asyncio
+import io
+import os
+import sys
+import urllib.error
+
+import httpx
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.llm import AsyncLLMClient, ContextLengthError, LLMClient, LLMTimeoutError
+
+
+@pytest.fixture
+def client() -> LLMClient:
+    return LLMClient(api_key="key", api_url="http://llm.invalid", max_retries=3)
+
+
+def test_context_length_error_is_not_retried(client, monkeypatch):
+    calls = []
+
+    def fake_urlopen(req, timeout):
+        calls.append(req)
+        body = b'{"error": {"code": "context_length_exceeded"}}'
+        raise urllib.error.HTTPError(
+            req.full_url, 400, "Bad Request", {}, io.BytesIO(body)
+        )
+
+    monkeypatch.setattr("urllib.request.urlopen", fake_urlopen)
+    with pytest.raises(ContextLengthError) as exc_info:
+        client.generate("long prompt")
+    assert exc_info.value.status_code == 400
+    assert len(calls) == 1
+
+
+def test_read_timeout_raises_llm_timeout_without_retry(client, monkeypatch):
+    calls = []
+
+    def fake_urlopen(req, timeout):
+        calls.append(req)
+        raise TimeoutError("timed out")
+
+    monkeypatch.setattr("urllib.request.urlopen", fake_urlopen)
+    with pytest.raises(LLMTimeoutError):
+        client.generate("slow prompt")
+    assert len(calls) == 1
+
+
+def async_client(handler) -> AsyncLLMClient:
+    return AsyncLLMClient(
+        api_key="key",
+        api_url="http://llm.invalid",
+        max_retries=3,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def test_async_context_length_error_is_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": {"code": "context_length_exceeded"}})
+
+    with pytest.raises(ContextLengthError) as exc_info:
+        asyncio.run(async_client(handler).generate("long prompt"))
+    assert exc_info.value.status_code == 400
+    assert len(calls) == 1
+
+
+def test_async_read_timeout_raises_llm_timeout_without_retry():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(async_client(handler).generate("slow prompt"))
+    assert len(calls) == 1
+
+
+def test_async_provider_errors_are_retried(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503, text="busy")
+        return httpx.Response(200, json={"name": "Jane"})
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr("backend.llm.client.asyncio.sleep", no_sleep)
+    client = async_client(handler)
+    assert asyncio.run(client.generate("prompt", temperature=0)) == {"name": "Jane"}
+    assert len(calls) == 3
+    assert calls[0].headers["Authorization"] == "Bearer key"
+    assert calls[0].read() == b'{"prompt": "prompt", "temperature": 0}'
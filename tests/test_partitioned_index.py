@@ -0,0 +1,90 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.embeddings import HashingEmbeddingProvider
+from backend.dossier.indexes import InvertedIndex
+from backend.dossier.living_dossier import LivingDossier
+from backend.dossier.models import PsychProfileEntry
+from backend.dossier.partitioned import PartitionedIndex
+from backend.dossier.persistence import load_living_dossier, save_living_dossier
+from backend.dossier.vector_index import VectorIndex
+
+
+def dossier(fear: str, memory: str, tags):
+    return {
+        "inner_world": {
+            "primal_fear": fear,
+            "memory_journal": [{"event": memory, "tags": tags}],
+        },
+        "blueprint": {"linguistic_profile": {"rhythm_imagery": f"{fear} imagery"}},
+    }
+
+
+def build() -> LivingDossier:
+    living = LivingDossier(
+        psych_profile_index=PartitionedIndex(InvertedIndex),
+        linguistic_profile_index=PartitionedIndex(InvertedIndex),
+    )
+    living.store_dossier(dossier("Deep water", "Fell into the water", ["sea"]), "ahab")
+    living.store_dossier(dossier("Open water", "Swam in cold water", ["lake"]), "ishmael")
+    return living
+
+
+def test_character_search_touches_only_its_partition() -> None:
+    living = build()
+    index = living.psych_profile_index
+    assert set(index.partitions) == {"ahab", "ishmael"}
+    assert len(index) == 4
+
+    results = living.search("water", character_id="ahab")
+    assert {e.id for e in results} == {"primal_fear", "memory_journal_0"}
+    assert all(e.metadata["character_id"] == "ahab" for e in results)
+    assert len(living.search("water", top_k=10)) == 4
+
+
+def test_metadata_filters_apply_before_scoring() -> None:
+    living = build()
+    memories = living.search("water", character_id="ishmael", kind="memory_journal")
+    assert [e.content for e in memories] == ["Event: Swam in cold water"]
+    assert [e.id for e in living.search("water", kind="trait", top_k=10)] == [
+        "primal_fear",
+        "primal_fear",
+    ]
+    tagged = living.search("water", tags=["sea"], top_k=10)
+    assert [e.metadata["character_id"] for e in tagged] == ["ahab"]
+    assert living.search("water", character_id="ahab", tags=["lake"]) == []
+    assert living.psych_profile_index.search(
+        "water", where={"entry_type": "LinguisticProfileEntry"}
+    ) == []
+
+
+def test_unpartitioned_index_filters_by_scan() -> None:
+    living = LivingDossier(psych_profile_index=InvertedIndex())
+    living.store_dossier(dossier("Deep water", "Fell into the water", ["sea"]), "ahab")
+    living.store_dossier(dossier("Open water", "Swam in cold water", ["lake"]), "ishmael")
+    results = living.search("water", character_id="ishmael", kind="trait")
+    assert [e.content for e in results] == ["Open water"]
+
+
+def test_vector_partitions_merge_by_score_and_round_trip(tmp_path) -> None:
+    provider = HashingEmbeddingProvider(dim=64)
+    index = PartitionedIndex(lambda: VectorIndex(embed=provider.embed))
+    for character, text in [("a", "storm at sea"), ("b", "quiet garden"), ("a", "calm garden")]:
+        entry = PsychProfileEntry(
+            id=text, content=text, metadata={"character_id": character, "kind": "trait"}
+        )
+        entry.embedding = provider.embed(text).tolist()
+        index.add(entry)
+    query = provider.embed("garden")
+    assert [e.id for e in index.search(query, top_k=1, character_id="a")] == ["calm garden"]
+    assert {e.id for e in index.search(query, top_k=2)} == {"quiet garden", "calm garden"}
+
+    save_living_dossier(LivingDossier(psych_profile_index=index), tmp_path)
+    loaded = load_living_dossier(tmp_path).psych_profile_index
+    assert isinstance(loaded, PartitionedIndex)
+    assert set(loaded.partitions) == {"a", "b"}
+    assert [e.id for e in loaded.search(query, top_k=1, character_id="b", where={"kind": "trait"})] == [
+        "quiet garden"
+    ]
@@ -0,0 +1,96 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.sqlite_store import SQLiteCharacterStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteCharacterStore(str(tmp_path / "characters.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_insert_get_all_and_duplicate_ids(store) -> None:
+    dossier = {"name": "Alice", "role": "protagonist", "source_material": "Wonderland"}
+    cid = store.insert(dossier)
+    assert store.get(cid).dossier == dossier
+    assert store.get("missing") is None
+    assert store.insert({"name": "Bob"}, character_id="abc") == "abc"
+    with pytest.raises(ValueError):
+        store.insert({"name": "Charlie"}, character_id="abc")
+    assert [c.character_id for c in store.all()] == [cid, "abc"]
+
+
+def test_data_survives_reopen_and_uses_wal(tmp_path) -> None:
+    path = str(tmp_path / "characters.sqlite3")
+    first = SQLiteCharacterStore(path)
+    first.insert({"name": "Alice"}, character_id="a")
+    first.close()
+
+    second = SQLiteCharacterStore(path)
+    assert second.get("a").dossier == {"name": "Alice"}
+    conn = second._connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    second.close()
+
+
+def test_find_uses_generated_column_indexes(store) -> None:
+    store.insert({"name": "Ahab", "role": "antagonist", "source_material": "Moby-Dick"}, "ahab")
+    store.insert({"name": "Ishmael", "role": "narrator", "source_material": "Moby-Dick"}, "ish")
+    assert [c.character_id for c in store.find("source_material", "Moby-Dick")] == ["ahab", "ish"]
+    assert [c.character_id for c in store.find("role", "narrator")] == ["ish"]
+    with pytest.raises(ValueError):
+        store.find("dossier", "x")
+    for field in ("name", "role", "source_material"):
+        plan = store._connection().execute(
+            f"EXPLAIN QUERY PLAN SELECT character_id FROM characters WHERE {field} = ?", ("x",)
+        ).fetchall()
+        assert f"characters_{field}" in " ".join(str(row[-1]) for row in plan)
+
+
+def test_threads_use_their_own_connections(store) -> None:
+    errors = []
+
+    def worker(n: int) -> None:
+        try:
+            for i in range(20):
+                store.insert({"name": f"c{n}-{i}"})
+            store.all()
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(store.all()) == 80
+    assert len(store._connections) == 5
+
+
+def test_query_uses_key_index_and_backfills_old_rows(tmp_path) -> None:
+    path = str(tmp_path / "characters.sqlite3")
+    store = SQLiteCharacterStore(path)
+    store.insert({"name": "Captain Ahab", "role": "Antagonist"}, character_id="ahab")
+    store.insert({"name": "Ahab Jr", "parent_cid": "ahab"}, character_id="remix")
+    assert [c.character_id for c in store.query(name="ahab")] == ["ahab", "remix"]
+    assert [c.character_id for c in store.query(name="ahab", limit=1)] == ["ahab"]
+    assert [c.character_id for c in store.query(parent_cid="AHAB")] == ["remix"]
+    assert [c.character_id for c in store.query(role="antagonist", name="jr")] == []
+
+    # A database written before the key index existed is indexed on open.
+    conn = store._connection()
+    with conn:
+        conn.execute("DELETE FROM character_keys")
+        conn.execute("PRAGMA user_version = 0")
+    store.close()
+    reopened = SQLiteCharacterStore(path)
+    assert [c.character_id for c in reopened.query(role="ANTAGONIST")] == ["ahab"]
+    reopened.close()
@@ -0,0 +1,108 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backend.dossier.models import PsychProfileEntry
+from backend.dossier.vector_index import VectorIndex
+
+
+def entry(entry_id: str, embedding) -> PsychProfileEntry:
+    return PsychProfileEntry(id=entry_id, content=entry_id, embedding=embedding)
+
+
+def test_search_ranks_by_cosine_similarity() -> None:
+    index = VectorIndex()
+    index.add(entry("east", [1.0, 0.0]))
+    index.add(entry("north", [0.0, 5.0]))
+    index.add(entry("north_east", [1.0, 1.0]))
+
+    assert [e.id for e in index.search([0.1, 1.0], top_k=2)] == ["north", "north_east"]
+    scored = index.search_scored([2.0, 0.0], top_k=1)
+    assert scored[0][0].id == "east"
+    assert scored[0][1] == pytest.approx(1.0)
+
+
+def test_matrix_grows_by_doubling() -> None:
+    index = VectorIndex(dim=3, initial_capacity=4)
+    rng = np.random.default_rng(0)
+    for i in range(100):
+        index.add(entry(f"e{i}", rng.normal(size=3)))
+    assert len(index) == 100
+    assert index._matrix.shape == (128, 3)
+    assert index._matrix.dtype == np.float32
+
+
+def test_search_many_matches_single_queries() -> None:
+    rng = np.random.default_rng(1)
+    index = VectorIndex()
+    for i in range(50):
+        index.add(entry(f"e{i}", rng.normal(size=8)))
+    queries = rng.normal(size=(5, 8))
+    assert index.search_many(queries, top_k=3) == [
+        index.search(query, top_k=3) for query in queries
+    ]
+
+
+def test_string_queries_and_missing_embeddings_use_embed() -> None:
+    def embed(text: str):
+        return [text.count("a"), text.count("b")]
+
+    index = VectorIndex(embed=embed)
+    index.add(PsychProfileEntry(id="a", content="aaa"))
+    index.add(PsychProfileEntry(id="b", content="bbb"))
+    assert [e.id for e in index.search("ab b", top_k=1)] == ["b"]
+
+    with pytest.raises(ValueError):
+        VectorIndex().add(PsychProfileEntry(id="x", content="no vector"))
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_quantized_storage_shrinks_and_reranks_exactly(dtype: str) -> None:
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(300, 32))
+    exact = VectorIndex()
+    quantized = VectorIndex(dtype=dtype, rerank_factor=8)
+    entries = [entry(f"e{i}", vector) for i, vector in enumerate(vectors)]
+    exact.add_many(entries)
+    quantized.add_many(entries)
+
+    assert quantized.nbytes < exact.nbytes
+    # Exact rows are spilled to a temporary file, not held in process memory.
+    assert isinstance(quantized._exact, np.memmap)
+    assert quantized.rerank_nbytes == exact.rerank_nbytes == 0
+    assert quantized.vectors.dtype == np.float32
+    # Re-ranking reads the index's own exact rows, not the items.
+    for item in entries:
+        item.embedding = None
+    for query in rng.normal(size=(10, 32)):
+        expected = exact.search_scored(query, top_k=5)
+        got = quantized.search_scored(query, top_k=5)
+        assert [e.id for e, _ in got] == [e.id for e, _ in expected]
+        assert [s for _, s in got] == pytest.approx([s for _, s in expected], abs=1e-5)
+
+
+def test_quantized_exact_rows_can_stay_in_memory() -> None:
+    rng = np.random.default_rng(5)
+    vectors = rng.normal(size=(100, 16))
+    exact = VectorIndex()
+    quantized = VectorIndex(dtype="int8", spill=False)
+    for i, vector in enumerate(vectors):
+        exact.add(entry(f"e{i}", vector))
+        quantized.add(entry(f"e{i}", vector))
+
+    assert quantized.rerank_nbytes == exact.nbytes
+    compacted = quantized.compacted()
+    assert compacted.rerank_nbytes == exact.nbytes
+    query = rng.normal(size=16)
+    assert [e.id for e in compacted.search(query, top_k=5)] == [
+        e.id for e in exact.search(query, top_k=5)
+    ]
+
+
+def test_unknown_storage_dtype_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        VectorIndex(dtype="float64")